@@ -0,0 +1,256 @@
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from lumibot.entities import Asset, Data
+import logging
+import os
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Default location of the cache, next to the `logs/` directory
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "bars")
+TIMEZONE = "America/New_York"  # Market timezone used to split bars into days
+
+# On-disk record layout: one row per bar, timestamps in UTC nanoseconds
+BAR_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+class BarStore:
+    """
+    Persistent OHLCV cache stored as memory-mapped NumPy files partitioned by symbol and day.
+
+    Layout: `<root>/<SYMBOL>/<timestep>/<YYYY-MM-DD>.npy`. A day with no bars (weekend,
+    holiday) is stored as an empty file, but only when the source returned bars after it or
+    no trading day follows it in the fetched range; empty trading days after the last stored
+    bar are fetched again, so a fetch that came back empty or cut short never hides data that
+    shows up later. Only completed days are cached; the current day is always fetched fresh.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT):
+        """Initialize the store rooted at the given directory."""
+        self.root = root
+
+    def _path(self, symbol, timestep, day):
+        """Return the file path holding one day of bars."""
+        return os.path.join(self.root, symbol.upper(), timestep, f"{day.isoformat()}.npy")
+
+    def has_day(self, symbol, day, timestep="day"):
+        """Whether the given day is already on disk."""
+        return os.path.exists(self._path(symbol, timestep, day))
+
+    def last_bar_day(self, symbol, timestep="day"):
+        """Latest day holding at least one stored bar, or None."""
+        directory = os.path.join(self.root, symbol.upper(), timestep)
+        if not os.path.isdir(directory):
+            return None
+        for name in sorted((name for name in os.listdir(directory) if name.endswith(".npy")), reverse=True):
+            if np.load(os.path.join(directory, name), mmap_mode="r").shape[0]:
+                return date.fromisoformat(name[:-len(".npy")])
+        return None
+
+    def missing_ranges(self, symbol, start, end, timestep="day"):
+        """Return the contiguous (first_day, last_day) ranges not yet on disk (empty trading days past the last bar count as missing)."""
+        last_bar_day = self.last_bar_day(symbol, timestep)
+        sessions = _sessions(_to_date(start), _to_date(end))
+        ranges = []
+        current = None
+        for day in _days(start, end):
+            settled = (last_bar_day is not None and day <= last_bar_day) or day not in sessions
+            if self.has_day(symbol, day, timestep) and settled:
+                if current is not None:
+                    ranges.append(tuple(current))
+                    current = None
+            elif current is None:
+                current = [day, day]
+            else:
+                current[1] = day
+        if current is not None:
+            ranges.append(tuple(current))
+        return ranges
+
+    def write(self, symbol, df, first_day, last_day, timestep="day"):
+        """
+        Write the bars of `df` into one file per day between first_day and last_day.
+
+        Days after the last returned bar are not written while a trading day among them is
+        missing: the source may not have it yet. Returns the number of days written.
+        """
+        bars = frame_to_bars(df)
+        if not len(bars):
+            return 0  # An empty response says nothing about the range; leave it missing
+        days = pd.to_datetime(bars["time"], utc=True).tz_convert(TIMEZONE).date
+        last_day = _to_date(last_day)
+        if days.max() < last_day and _sessions(days.max() + timedelta(days=1), last_day):
+            last_day = days.max()  # Cut short before a trading day; only a weekend or holiday can end the range empty
+        today = date.today()
+        written = 0
+        for day in _days(first_day, last_day):
+            if day >= today:
+                continue  # The current day is still forming; never cache it
+            path = self._path(symbol, timestep, day)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, bars[days == day])
+            os.replace(tmp_path, path)  # Atomic, so readers never see a partial file
+            written += 1
+        return written
+
+    def iter_days(self, symbol, start, end, timestep="day"):
+        """Yield read-only memory-mapped arrays for each cached day (zero-copy)."""
+        for day in _days(start, end):
+            path = self._path(symbol, timestep, day)
+            if not os.path.exists(path):
+                continue
+            bars = np.load(path, mmap_mode="r")
+            if bars.shape[0]:
+                yield bars
+
+    def read(self, symbol, start, end, timestep="day"):
+        """
+        Return the cached bars between start and end as one structured array.
+
+        A single day is returned as its read-only memory map; several days are concatenated
+        into one in-memory copy. Use iter_days() to walk a long range without copying.
+        """
+        chunks = list(self.iter_days(symbol, start, end, timestep))
+        if not chunks:
+            return np.empty(0, dtype=BAR_DTYPE)
+        if len(chunks) == 1:
+            return chunks[0]  # Single partition: hand back the memory map itself
+        return np.concatenate(chunks)
+
+    def get_bars(self, symbol, start, end, fetch, timestep="day"):
+        """
+        Return bars between start and end as a DataFrame, fetching only the missing days.
+
+        `fetch(symbol, start, end)` must return a DataFrame indexed by timestamp with
+        open/high/low/close/volume columns, or None if nothing is available.
+        """
+        start, end = _to_date(start), _to_date(end)
+        today = date.today()
+        last_complete = min(end, today - timedelta(days=1))
+        for first_day, last_day in self.missing_ranges(symbol, start, last_complete, timestep):
+            if not _sessions(first_day, last_day):
+                continue  # Only weekends and holidays: there is nothing to fetch
+            logger.info(f"Fetching {symbol} {timestep} bars from {first_day} to {last_day}")
+            df = fetch(symbol, first_day, last_day)
+            if df is None or len(df) == 0:
+                logger.error(f"No data returned for {symbol} from {first_day} to {last_day}")
+                continue
+            self.write(symbol, df, first_day, last_day, timestep)
+
+        df = bars_to_frame(self.read(symbol, start, last_complete, timestep))
+        if end >= today:
+            # Today's bars are never cached, so pull them straight from the source
+            fresh = fetch(symbol, today, end)
+            if fresh is not None and len(fresh):
+                fresh = bars_to_frame(frame_to_bars(fresh))
+                df = pd.concat([df, fresh[fresh.index.date >= today]])
+        return df
+
+
+def frame_to_bars(df):
+    """Convert an OHLCV DataFrame into a structured bar array."""
+    if df is None or len(df) == 0:
+        return np.empty(0, dtype=BAR_DTYPE)
+    df = df.rename(columns=str.lower)
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is None:
+        index = index.tz_localize(TIMEZONE)
+    bars = np.empty(len(df), dtype=BAR_DTYPE)
+    bars["time"] = index.tz_convert("UTC").asi8
+    for column in COLUMNS:
+        bars[column] = df[column].to_numpy(dtype=float) if column in df else np.nan
+    return bars
+
+
+def bars_to_frame(bars):
+    """Convert a structured bar array into an OHLCV DataFrame in market time."""
+    index = pd.to_datetime(np.asarray(bars["time"]), utc=True).tz_convert(TIMEZONE)
+    return pd.DataFrame({column: np.asarray(bars[column]) for column in COLUMNS}, index=index)
+
+
+def yahoo_fetcher(interval="1d"):
+    """Return a fetch function that downloads bars from Yahoo Finance."""
+    import yfinance as yf
+
+    def fetch(symbol, start, end):
+        df = yf.Ticker(symbol).history(start=start, end=end + timedelta(days=1), interval=interval, auto_adjust=False)
+        return df if len(df) else None
+
+    return fetch
+
+
+def alpaca_fetcher(config):
+    """Return a fetch function that downloads daily bars from Alpaca's market data API, the broker's own data source."""
+    from alpaca.data.enums import Adjustment
+    from alpaca.data.historical import StockHistoricalDataClient
+    from alpaca.data.requests import StockBarsRequest
+    from alpaca.data.timeframe import TimeFrame
+
+    client = StockHistoricalDataClient(config["API_KEY"], config["API_SECRET"])
+
+    def fetch(symbol, start, end):
+        # Split-adjusted like lumibot's Alpaca data source, so cached and broker bars agree
+        request = StockBarsRequest(symbol_or_symbols=symbol, timeframe=TimeFrame.Day, adjustment=Adjustment.ALL,
+                                   start=datetime.combine(start, time()), end=datetime.combine(end + timedelta(days=1), time()))
+        df = client.get_stock_bars(request).df
+        if df is None or len(df) == 0:
+            return None
+        if isinstance(df.index, pd.MultiIndex):
+            df = df.xs(symbol, level="symbol")
+        return df[COLUMNS]
+
+    return fetch
+
+
+def build_pandas_data(symbols, start, end, store=None, fetch=None):
+    """Build the `pandas_data` mapping for PandasDataBacktesting from the bar store."""
+    store = store or BarStore()
+    fetch = fetch or yahoo_fetcher()
+    pandas_data = {}
+    for symbol in symbols:
+        df = store.get_bars(symbol, start, end, fetch)
+        if df.empty:
+            logger.error(f"No cached or fetched data for {symbol}. Skipping.")
+            continue
+        asset = Asset(symbol=symbol, asset_type="stock")
+        pandas_data[asset] = Data(asset, df, timestep="day")
+    return pandas_data
+
+
+def _to_date(value):
+    """Normalize a datetime or date to a date."""
+    return value.date() if isinstance(value, datetime) else value
+
+
+@lru_cache(maxsize=256)
+def _sessions(start, end):
+    """Trading days between start and end, inclusive, from the NYSE calendar (weekdays without pandas_market_calendars)."""
+    try:
+        import pandas_market_calendars as mcal
+    except ImportError:
+        return frozenset(day for day in _days(start, end) if day.weekday() < 5)
+    if start > end:
+        return frozenset()
+    return frozenset(mcal.get_calendar("NYSE").valid_days(start, end).date)
+
+
+def _days(start, end):
+    """Iterate over calendar days from start to end, inclusive."""
+    day, end = _to_date(start), _to_date(end)
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
@@ -0,0 +1,362 @@
+from indicators import IndicatorState
+from lumibot_buy_hold import BuyHold
+from lumibot_swing_high import SwingHigh
+from model_store import ModelStore, OnlineClassifier
+from replay import ReplayBroker, ReplayHarness
+from vector_backtest import simulate
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Reference numbers to compare against. Timings are specific to the machine that recorded them: re-record the
+# baseline with --save-baseline on the machine that runs the regression check. Hot-path metrics are also stored
+# relative to a calibration loop timed alongside them, which absorbs load and clock changes on that machine but
+# does not make numbers portable between machines.
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+HISTORY_PATH = os.path.join(REPO_ROOT, "benchmarks", "history.jsonl")  # One line of results per run
+TIMEZONE = "America/New_York"
+HISTORY_DAYS = 40  # Daily bars before the first replayed session, enough to warm up indicators and the model
+
+# Synthetic data sizes, smallest to largest
+SIZES = {
+    "sessions": [1, 5],  # Minute-bar sessions replayed through SwingHigh
+    "symbols": [10, 100],  # BuyHold universe sizes
+    "bars": [10_000, 100_000, 1_000_000],  # Bars pushed through the vectorized backtester
+    "lookbacks": [10, 50, 200],  # Indicator window sizes
+    "rows": [1_000, 10_000, 100_000],  # Model training rows
+    "memory_sessions": 5,  # Sessions replayed while tracking the memory high-water mark
+    "repeat": 5,  # Runs per measurement; hot-path metrics are the median across runs, others the best
+}
+SMALL_SIZES = {"sessions": [1], "symbols": [10], "bars": [10_000], "lookbacks": [10], "rows": [1_000], "memory_sessions": 1,
+               "repeat": 3}
+
+# Metrics on the hot path; a slowdown past the threshold on any of these is a regression
+HOT_PATH = ("swing_high_iteration", "buy_hold_iteration", "replay_throughput", "indicator_update")
+CALIBRATION = "calibration"  # Fixed workload timed next to each hot-path run to measure how fast the machine is right now
+
+
+def synthetic_prices(n, seed=0):
+    """Geometric random walk starting at 100."""
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+
+
+def synthetic_bars(sessions, seed=0, history_days=HISTORY_DAYS):
+    """Daily history followed by `sessions` days of minute bars; returns the frame and the first replayed bar."""
+    daily_index = pd.date_range("2022-01-03", periods=history_days, freq="B", tz=TIMEZONE)
+    first_session = daily_index[-1] + pd.offsets.BDay(1)
+    days = pd.date_range(first_session, periods=sessions, freq="B")
+    session_indexes = [pd.date_range(day + pd.Timedelta(hours=9, minutes=30), periods=390, freq="min") for day in days]
+    minute_index = session_indexes[0].append(session_indexes[1:])
+    index = daily_index.append(minute_index)
+    close = synthetic_prices(len(index), seed)
+    df = pd.DataFrame({"open": close, "high": close, "low": close, "close": close, "volume": 1000}, index=index)
+    return df, minute_index[0]
+
+
+def best_of(fn, repeat=5):
+    """Run fn `repeat` times and return the shortest wall time in seconds with the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def calibration_loop(n=50_000):
+    """Fixed interpreter-bound workload with small numpy calls, like a strategy iteration."""
+    values = np.arange(16, dtype=float)
+    total = 0.0
+    for i in range(n):
+        total += (i * i) % 7
+        if i % 100 == 0:
+            total += float(values.mean())
+    return total
+
+
+def calibration_seconds():
+    """Shortest of three calibration loops, in seconds."""
+    seconds, _ = best_of(calibration_loop, 3)
+    return seconds
+
+
+def calibrated_runs(fn, repeat):
+    """Run fn `repeat` times, each between two calibration timings; returns [(result, calibration seconds)]."""
+    runs = []
+    for _ in range(repeat):
+        before = calibration_seconds()
+        result = fn()
+        runs.append((result, (before + calibration_seconds()) / 2))
+    return runs
+
+
+def calibrated_metric(runs, unit, better):
+    """Median over calibrated runs, plus the median relative to the calibration loop that the regression check uses."""
+    values = np.array([value for value, _ in runs], dtype=float)
+    seconds = np.array([calibration for _, calibration in runs])
+    relative = values / seconds if better == "lower" else values * seconds
+    return metric(np.median(values), unit, better, relative=np.median(relative))
+
+
+def bench_calibration(repeat):
+    """Time of the calibration loop, for reading the other numbers against."""
+    seconds, _ = best_of(calibration_loop, repeat)
+    return {CALIBRATION: metric(seconds * 1e3, "ms", "lower")}
+
+
+def time_iterations(strategy, iteration_ns):
+    """Record the duration of every on_trading_iteration call of a strategy instance in nanoseconds."""
+    iterate = strategy.on_trading_iteration
+
+    def on_trading_iteration():
+        begin = time.perf_counter_ns()
+        iterate()
+        iteration_ns.append(time.perf_counter_ns() - begin)
+    strategy.on_trading_iteration = on_trading_iteration
+
+
+def replay_swing_high(sessions, model_root):
+    """Replay SwingHigh over synthetic minute sessions, timing each on_trading_iteration call."""
+    df, start = synthetic_bars(sessions)
+    iteration_ns = []
+
+    def setup(strategy):
+        strategy.model_store = ModelStore(model_root)  # Keep benchmark models out of the real cache
+        time_iterations(strategy, iteration_ns)
+
+    harness = ReplayHarness(SwingHigh, ReplayBroker({"GOOG": df}), start=start,
+                            parameters={"sleeptime": "1M", "instrument": False})
+    result = harness.run(on_initialize=setup)
+    return result, np.array(iteration_ns[1:])  # The first iteration trains the model and is measured separately
+
+
+def bench_swing_high(sizes, model_root, repeat):
+    """Median per-iteration cost of SwingHigh and event-driven replay throughput in bars/second, over `repeat` replays."""
+    results = {}
+    for sessions in sizes:
+        run_roots = iter(os.path.join(model_root, f"{sessions}_{run}") for run in range(repeat))
+
+        def replay():
+            # A fresh model cache per run, so every replay trains its model the same way
+            result, iteration_ns = replay_swing_high(sessions, next(run_roots))
+            return np.median(iteration_ns) / 1e3, result.iterations / result.wall_seconds
+        runs = calibrated_runs(replay, repeat)
+        results[f"swing_high_iteration[sessions={sessions}]"] = calibrated_metric(
+            [(iteration_us, seconds) for (iteration_us, _), seconds in runs], "us", "lower")
+        results[f"replay_throughput[sessions={sessions}]"] = calibrated_metric(
+            [(throughput, seconds) for (_, throughput), seconds in runs], "bars/s", "higher")
+    return results
+
+
+def bench_buy_hold(sizes, repeat):
+    """Median per-iteration cost of BuyHold rebalancing every day over a synthetic universe, over `repeat` replays."""
+    results = {}
+    for count in sizes:
+        index = pd.date_range("2022-01-03", periods=30, freq="B", tz=TIMEZONE)
+        symbols = [f"S{i:04d}" for i in range(count)]
+        bars = {symbol: pd.DataFrame({"close": synthetic_prices(len(index), seed=i)}, index=index)
+                for i, symbol in enumerate(symbols)}
+        parameters = {"symbols": symbols, "rebalance": True, "rebalance_every": 1, "instrument": False}
+
+        def replay():
+            iteration_ns = []
+            harness = ReplayHarness(BuyHold, ReplayBroker(bars), parameters=parameters)
+            harness.run(on_initialize=lambda strategy: time_iterations(strategy, iteration_ns))
+            return np.median(iteration_ns) / 1e3
+        results[f"buy_hold_iteration[symbols={count}]"] = calibrated_metric(calibrated_runs(replay, repeat), "us", "lower")
+    return results
+
+
+def bench_vector_backtest(sizes, repeat):
+    """Bars/second of the vectorized backtester."""
+    results = {}
+    for bars in sizes:
+        prices = synthetic_prices(bars)
+        seconds, _ = best_of(lambda: simulate(prices), repeat)
+        results[f"vector_throughput[bars={bars}]"] = metric(bars / seconds, "bars/s", "higher")
+    return results
+
+
+def bench_indicators(lookbacks, repeat, bars=100_000):
+    """Vectorized warm-up time and streaming per-bar update cost versus lookback length."""
+    results = {}
+    prices = synthetic_prices(bars)
+    for window in lookbacks:
+        seconds, _ = best_of(lambda: IndicatorState(window).warm_up(prices), repeat)
+        results[f"indicator_warm_up[lookback={window}]"] = metric(seconds * 1e3, "ms", "lower")
+
+        state = IndicatorState(window)
+        state.warm_up(prices[:1000])
+        updates = prices[1000:11000].tolist()
+
+        def update():
+            start = time.perf_counter()
+            for close in updates:
+                state.update(close)
+            return (time.perf_counter() - start) / len(updates) * 1e9
+        results[f"indicator_update[lookback={window}]"] = calibrated_metric(calibrated_runs(update, repeat), "ns", "lower")
+    return results
+
+
+def bench_model_training(sizes, repeat):
+    """Model training time versus training rows."""
+    results = {}
+    rng = np.random.default_rng(0)
+    for rows in sizes:
+        X = rng.normal(size=(rows, 3))
+        y = (X[:, 2] > 0).astype(int)
+        seconds, _ = best_of(lambda: OnlineClassifier().fit(X, y), repeat)
+        results[f"model_training[rows={rows}]"] = metric(seconds * 1e3, "ms", "lower")
+    return results
+
+
+def bench_memory(sessions, model_root):
+    """Python heap high-water mark while replaying a multi-day SwingHigh session."""
+    tracemalloc.start()
+    try:
+        replay_swing_high(sessions, model_root)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {f"memory_peak[sessions={sessions}]": metric(peak / 2 ** 20, "MiB", "lower")}
+
+
+def metric(value, unit, better, relative=None):
+    """One benchmark number with its unit, which direction is an improvement and, if calibrated, its relative value."""
+    result = {"value": float(value), "unit": unit, "better": better}
+    if relative is not None:
+        result["relative"] = float(relative)
+    return result
+
+
+def run_benchmarks(sizes=SIZES):
+    """Run the whole suite on synthetic data and return {name: metric}."""
+    previous = logging.root.manager.disable
+    logging.disable(logging.INFO)  # Per-iteration strategy logging would dominate the measurements
+    try:
+        with tempfile.TemporaryDirectory() as model_root:
+            repeat = sizes["repeat"]
+            results = bench_calibration(repeat)
+            results.update(bench_swing_high(sizes["sessions"], model_root, repeat))
+            results.update(bench_buy_hold(sizes["symbols"], repeat))
+            results.update(bench_vector_backtest(sizes["bars"], repeat))
+            results.update(bench_indicators(sizes["lookbacks"], repeat))
+            results.update(bench_model_training(sizes["rows"], repeat))
+            results.update(bench_memory(sizes["memory_sessions"], os.path.join(model_root, "memory")))
+    finally:
+        logging.disable(previous)
+    return results
+
+
+def find_regressions(results, baseline, threshold=0.25, metrics=HOT_PATH):
+    """
+    Compare hot-path results to a baseline.
+
+    Returns {name: relative slowdown} for every metric that got worse by more than `threshold`
+    (0.25 means 25% slower, or 25% less throughput). Metrics calibrated on both sides are compared by
+    their values relative to the calibration loop, so a busier or throttled machine is not a regression.
+    """
+    regressions = {}
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if reference is None or name.split("[")[0] not in metrics:
+            continue
+        key = "relative" if "relative" in current and "relative" in reference else "value"
+        if reference[key] <= 0 or current[key] <= 0:
+            continue
+        if current["better"] == "lower":
+            slowdown = current[key] / reference[key] - 1
+        else:
+            slowdown = reference[key] / current[key] - 1
+        if slowdown > threshold:
+            regressions[name] = slowdown
+    return regressions
+
+
+def git_commit():
+    """Short hash of the checked-out commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def load_baseline(path=BASELINE_PATH):
+    """Load saved baseline results, or None when there is no baseline to compare against."""
+    if not os.path.exists(path):
+        logger.error(f"No benchmark baseline at {path}; record one with --save-baseline")
+        return None
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def save_results(results, path):
+    """Write results with the commit they were measured on."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"commit": git_commit(), "results": results}, f, indent=2)
+
+
+def append_history(results, path=HISTORY_PATH):
+    """Append one line of results so numbers can be tracked across commits."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps({"commit": git_commit(), "time": pd.Timestamp.now().isoformat(), "results": results}) + "\n")
+
+
+def format_results(results, baseline=None):
+    """Render results, with the change against the baseline where there is one, as a text table."""
+    baseline = baseline or {}
+    lines = []
+    for name, current in results.items():
+        line = f"{name:45s} {current['value']:>14,.2f} {current['unit']}"
+        reference = baseline.get(name)
+        if reference and reference["value"]:
+            line += f"  ({current['value'] / reference['value'] - 1:+.1%} vs baseline)"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    save_baseline = "--save-baseline" in sys.argv  # Record this run as the new baseline
+    quick = "--quick" in sys.argv  # Smallest sizes only
+    threshold = 0.25  # Allowed slowdown of a hot-path metric before the run fails
+
+    try:
+        results = run_benchmarks(SMALL_SIZES if quick else SIZES)
+        baseline = load_baseline()
+        append_history(results)
+        logger.info(f"Benchmark results:\n{format_results(results, baseline)}")
+        if save_baseline:
+            save_results(results, BASELINE_PATH)
+            logger.info(f"Baseline saved to {BASELINE_PATH}")
+        elif baseline is None:
+            sys.exit(1)  # Without a baseline the regression gate would pass anything
+        else:
+            compared = [name for name in results if name in baseline and name.split("[")[0] in HOT_PATH]
+            if not compared:
+                logger.error("The baseline has none of this run's hot-path metrics; nothing was checked")
+                sys.exit(1)
+            regressions = find_regressions(results, baseline, threshold)
+            for name, slowdown in regressions.items():
+                logger.error(f"Regression: {name} is {slowdown:.0%} slower than the baseline")
+            if regressions:
+                sys.exit(1)
+    except Exception as e:
+        logger.error(f"An error occurred while running the benchmarks: {e}")
+        sys.exit(1)
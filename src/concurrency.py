@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting how many broker calls start per second.
+
+    `rate` tokens are added every second up to `burst`; each call takes one token and
+    waits when the bucket is empty. A rate of None disables limiting.
+    """
+
+    def __init__(self, rate=None, burst=None):
+        """Initialize a limiter allowing `rate` calls per second with bursts of `burst`."""
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate or 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed to start."""
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ConcurrentExecutor:
+    """
+    Thread pool for fanning broker calls out over many symbols.
+
+    At most `max_workers` calls run at once, call starts are paced by a shared RateLimiter,
+    and an exception in one call is captured for that item without affecting the others.
+    """
+
+    def __init__(self, max_workers=8, rate_limit=None, burst=None):
+        """Initialize the executor with a concurrency cap and an optional calls-per-second limit."""
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate_limit, burst)
+
+    def _call(self, fn, item):
+        """Run one rate-limited call, returning (result, error)."""
+        self.limiter.acquire()
+        try:
+            return fn(item), None
+        except Exception as e:
+            return None, e
+
+    def map(self, fn, items):
+        """
+        Call `fn(item)` for every item concurrently.
+
+        Returns two dicts keyed by item: the results of the calls that succeeded and the
+        exceptions of those that failed.
+        """
+        items = list(items)
+        results, errors = {}, {}
+        if not items:
+            return results, errors
+        if self.max_workers == 1:
+            # Serial: calls run in order on the calling thread, so their effects are deterministic
+            for item in items:
+                result, error = self._call(fn, item)
+                if error is None:
+                    results[item] = result
+                else:
+                    errors[item] = error
+            return results, errors
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            outcomes = pool.map(lambda item: self._call(fn, item), items)
+            for item, (result, error) in zip(items, outcomes):
+                if error is None:
+                    results[item] = result
+                else:
+                    errors[item] = error
+        return results, errors
@@ -0,0 +1,477 @@
+from collections import defaultdict
+from concurrent.futures import Future
+from config import ALPACA_CONFIG
+from instrumentation import parse_sleeptime
+from ledger import symbol_of
+from lumibot.strategies import Strategy
+from replay import ReplayOrder, ReplayPosition
+import logging
+import threading
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FILL_TOLERANCE = 1e-9  # Shares left on an order after pro rata splits that count as rounding, not an open quantity
+
+
+class SharedMarketData:
+    """
+    Market data shared by every coordinated strategy, deduplicated per symbol and timestamp.
+
+    Concurrent requests for the same key wait on a single broker call (single flight), and
+    the cache is dropped whenever the coordinator's clock moves on.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self.lock = threading.Lock()
+        self.entries = {}  # Key -> Future holding the broker's answer
+        self.timestamp = None
+        self.requests = 0  # Requests made by strategies
+        self.broker_calls = 0  # Requests that actually reached the broker
+
+    def advance(self, timestamp):
+        """Start a new timestamp, dropping everything cached for the previous one."""
+        with self.lock:
+            if timestamp != self.timestamp:
+                self.entries = {}
+                self.timestamp = timestamp
+
+    def get(self, key, fetch):
+        """Return the cached value for a key, calling `fetch` once if no strategy asked for it yet."""
+        with self.lock:
+            self.requests += 1
+            entry = self.entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self.entries[key] = Future()
+                self.broker_calls += 1
+        if owner:
+            try:
+                entry.set_result(fetch())
+            except Exception as e:
+                entry.set_exception(e)
+        return entry.result()
+
+    def prefetch_prices(self, symbols, fetch_many):
+        """Fill the last prices of every missing symbol with one batched broker call."""
+        with self.lock:
+            missing = [symbol for symbol in dict.fromkeys(symbols) if ("price", symbol) not in self.entries]
+            futures = {symbol: self.entries.setdefault(("price", symbol), Future()) for symbol in missing}
+            if missing:
+                self.broker_calls += 1
+        if not missing:
+            return
+        try:
+            prices = {symbol_of(asset): price for asset, price in (fetch_many(missing) or {}).items()}
+            for symbol, future in futures.items():
+                future.set_result(prices.get(symbol))
+        except Exception as e:
+            for future in futures.values():
+                future.set_exception(e)
+
+
+class StrategyBook:
+    """Virtual cash and positions of one coordinated strategy inside the shared account."""
+
+    def __init__(self, cash):
+        """Initialize the book with the strategy's share of the account's cash."""
+        self.cash = float(cash)
+        self.positions = {}
+        self.last_prices = {}  # Last price each symbol was booked or marked at
+
+    def fill(self, symbol, side, quantity, price):
+        """Book one fill; sells are capped at the quantity held. Returns the booked quantity."""
+        position = self.positions.get(symbol) or ReplayPosition(symbol)
+        if side == "sell":
+            quantity = min(quantity, position.quantity)  # No short selling
+        if quantity <= 0:
+            return 0
+        if side == "buy":
+            cost = position.avg_fill_price * position.quantity + price * quantity
+            position.quantity += quantity
+            position.avg_fill_price = cost / position.quantity
+            self.cash -= quantity * price
+        else:
+            position.quantity -= quantity
+            self.cash += quantity * price
+        if position.quantity > 0:
+            self.positions[symbol] = position
+        else:
+            self.positions.pop(symbol, None)
+        self.last_prices[symbol] = price
+        return quantity
+
+    def value(self, price_of):
+        """Cash plus positions marked at `price_of(symbol)`, or their last booked price."""
+        value = self.cash
+        for symbol, position in self.positions.items():
+            price = price_of(symbol)
+            value += position.quantity * (price if price is not None else self.last_prices[symbol])
+        return value
+
+
+class NettingOrderQueue:
+    """
+    One order queue for every coordinated strategy.
+
+    On flush, orders for the same symbol are netted against each other: shares crossed
+    between strategies are filled at the shared last price, and only the net quantity per
+    symbol is sent to the broker, in a single batched submission. The broker's fills of a
+    net order are split between the strategies behind it, pro rata to their share of it.
+    """
+
+    def __init__(self):
+        """Initialize an empty queue."""
+        self.lock = threading.Lock()
+        self.pending = []  # (strategy, order) in submission order
+        # id(net order) -> (net order, [strategy, order, shares still to fill] for each strategy behind it).
+        # Keyed on the object, not its identifier: brokers replace the identifier on submission.
+        self.working = {}
+        self.netted_shares = 0  # Shares crossed between strategies instead of being sent
+        self.orders_sent = 0
+
+    def put(self, strategy, order):
+        """Queue one strategy order."""
+        with self.lock:
+            self.pending.append((strategy, order))
+
+    def flush(self, price_of, create_order, submit_orders):
+        """Cross the queued orders and send the net order per symbol; returns the orders sent."""
+        with self.lock:
+            pending, self.pending = self.pending, []
+        by_symbol = defaultdict(list)
+        for strategy, order in pending:
+            by_symbol[order.asset.symbol].append((strategy, order))
+
+        orders = []
+        for symbol, entries in by_symbol.items():
+            price = price_of(symbol)
+            if price is None:
+                logger.error(f"No price for {symbol}; dropping {len(entries)} orders")
+                continue
+
+            # Sells are capped at what each book holds, less the sells it already queued (no short selling)
+            requested = []
+            selling = defaultdict(float)
+            for strategy, order in entries:
+                quantity = float(order.quantity)
+                if order.side == "sell":
+                    position = strategy.book.positions.get(symbol)
+                    quantity = min(quantity, (position.quantity if position else 0.0) - selling[id(strategy)])
+                    selling[id(strategy)] += max(quantity, 0.0)
+                order.quantity = max(quantity, 0.0)
+                if quantity <= 0:
+                    order.status = "canceled"
+                    continue
+                requested.append((strategy, order))
+
+            buys = sum(order.quantity for _, order in requested if order.side == "buy")
+            sells = sum(order.quantity for _, order in requested if order.side == "sell")
+            crossed = min(buys, sells)
+            net = buys - sells
+            working = []
+            for strategy, order in requested:
+                # Every order crosses the same fraction of its side; the rest waits for the broker
+                internal = order.quantity * crossed / (buys if order.side == "buy" else sells)
+                if internal:
+                    self._fill_child(strategy, order, internal, price)
+                remaining = order.quantity - internal
+                if remaining > 0:
+                    working.append([strategy, order, remaining])
+                    order.status = "submitted"
+                else:
+                    order.status = "filled"
+            self.netted_shares += 2 * crossed
+            if net:
+                order = create_order(symbol, abs(net), "buy" if net > 0 else "sell")
+                with self.lock:
+                    self.working[id(order)] = (order, working)  # Registered first: a broker may fill on submission
+                orders.append(order)
+        if orders:
+            submit_orders(orders)
+            self.orders_sent += len(orders)
+        return orders
+
+    def orders_of(self, strategy):
+        """Orders of one strategy still queued or waiting on a broker fill."""
+        with self.lock:
+            orders = [order for owner, order in self.pending if owner is strategy]
+            for _, working in self.working.values():
+                orders.extend(order for owner, order, _ in working if owner is strategy)
+        return orders
+
+    def allocate(self, order, price, quantity, multiplier=1):
+        """Split a broker fill of a net order between the strategies behind it, pro rata; returns the shares allocated."""
+        with self.lock:
+            key = self._working_key(order)
+            if key is None:
+                return 0.0
+            working = self.working[key][1]
+            if not working:
+                return 0.0
+            total = sum(remaining for _, _, remaining in working)
+            quantity = min(float(quantity), total)
+            shares = [remaining * quantity / total for _, _, remaining in working]
+            shares[-1] = quantity - sum(shares[:-1])  # Rounding goes to the last strategy so the shares add up
+            for entry, share in zip(working, shares):
+                entry[2] -= share
+            if quantity >= total - FILL_TOLERANCE:
+                del self.working[key]
+        for (strategy, child_order, remaining), share in zip(working, shares):
+            if share > 0:
+                self._fill_child(strategy, child_order, share, price, multiplier)
+            if remaining <= FILL_TOLERANCE:
+                child_order.status = "filled"
+        return quantity
+
+    def cancel(self, order):
+        """Drop a net order the broker canceled; the strategies behind it are left with what was filled."""
+        with self.lock:
+            key = self._working_key(order)
+            working = self.working.pop(key)[1] if key is not None else []
+        for strategy, child_order, remaining in working:
+            child_order.status = "canceled"
+            logger.warning(f"Net order for {child_order.asset.symbol} canceled with {remaining:.2f} shares "
+                           f"of a {type(strategy).__name__} order unfilled")
+
+    def _working_key(self, order):
+        """Key of the working net order a broker event refers to: the same object, or one with its current identifier."""
+        entry = self.working.get(id(order))
+        if entry is not None and entry[0] is order:
+            return id(order)
+        identifier = getattr(order, "identifier", None)
+        if identifier is not None:
+            for key, (net_order, _) in self.working.items():
+                if getattr(net_order, "identifier", None) == identifier:
+                    return key
+        return None
+
+    def _fill_child(self, strategy, order, quantity, price, multiplier=1):
+        """Book a fill in a strategy's book and notify the strategy."""
+        symbol = order.asset.symbol
+        quantity = strategy.book.fill(symbol, order.side, quantity, price)
+        if quantity:
+            order.fill_price = price
+            strategy.on_filled_order(strategy.book.positions.get(symbol), order, price, quantity, multiplier)
+
+
+def coordinated_strategy_class(strategy_class):
+    """Subclass a strategy so its data requests and orders go through its coordinator."""
+
+    class Coordinated(strategy_class):
+        first_iteration = None  # Plain attribute in place of lumibot's read-only property
+        sleeptime = None  # Plain attribute in place of lumibot's broker-bound property
+
+        @property
+        def is_backtesting(self):
+            return self.coordinator.is_backtesting
+
+        @property
+        def cash(self):
+            return self.book.cash
+
+        @property
+        def portfolio_value(self):
+            return self.get_portfolio_value()
+
+        def get_datetime(self, *args, **kwargs):
+            return self.coordinator.get_datetime()
+
+        def get_last_price(self, asset, *args, **kwargs):
+            return self.coordinator.shared_price(symbol_of(asset))
+
+        def get_last_prices(self, assets, *args, **kwargs):
+            symbols = [symbol_of(asset) for asset in assets]
+            self.coordinator.market_data.prefetch_prices(symbols, self.coordinator.get_last_prices)
+            return {symbol: self.coordinator.shared_price(symbol) for symbol in symbols}
+
+        def get_historical_prices(self, asset, length, timestep="day", *args, **kwargs):
+            return self.coordinator.shared_history(symbol_of(asset), length, timestep)
+
+        def get_position(self, asset, *args, **kwargs):
+            return self.book.positions.get(symbol_of(asset))
+
+        def get_positions(self, *args, **kwargs):
+            return list(self.book.positions.values())
+
+        def get_orders(self, *args, **kwargs):
+            return self.coordinator.orders.orders_of(self)
+
+        def get_portfolio_value(self):
+            return self.book.value(self.coordinator.shared_price)
+
+        def create_order(self, asset, quantity, side, *args, **kwargs):
+            return ReplayOrder(symbol_of(asset), quantity, side)
+
+        def submit_order(self, order, *args, **kwargs):
+            self.coordinator.orders.put(self, order)
+            return order
+
+        def submit_orders(self, orders, *args, **kwargs):
+            return [self.submit_order(order) for order in orders]
+
+        def sell_all(self, *args, **kwargs):
+            for position in list(self.book.positions.values()):
+                self.submit_order(ReplayOrder(position.asset.symbol, position.quantity, "sell"))
+
+    Coordinated.__name__ = strategy_class.__name__
+    Coordinated.__qualname__ = strategy_class.__qualname__
+    return Coordinated
+
+
+class PortfolioCoordinator(Strategy):
+    """
+    Runs many strategy instances in one lumibot strategy, sharing one data feed and order queue.
+
+    Each child runs on its own sleeptime, with start offsets one tick apart so iterations of
+    different children do not land on the same tick. At every tick the last
+    prices of all due children's symbols are fetched in one call, and their orders are netted
+    and sent in one batch once they have all run.
+    """
+
+    # Default parameters; `strategies` is a list of (strategy class, parameters) pairs
+    parameters = {
+        "strategies": [],  # Children to run, e.g. [(SwingHigh, {"window_size": 5}), (BuyHold, {})]
+        "sleeptime": None,  # Coordinator tick; defaults to the shortest child sleeptime split across the children
+        "stagger": True,  # Offset the children's schedules by one tick each
+    }
+
+    def initialize(self):
+        """Build the children, split the cash between them and stagger their schedules."""
+        self.market_data = SharedMarketData()
+        self.orders = NettingOrderQueue()
+        specs = self.parameters.get("strategies") or []
+        self.children = []
+        classes = {}
+        for strategy_class, parameters in specs:
+            if strategy_class not in classes:
+                classes[strategy_class] = coordinated_strategy_class(strategy_class)
+            child = classes[strategy_class].__new__(classes[strategy_class])  # Skip the lumibot broker wiring
+            child.coordinator = self
+            # Books only change through the coordinator's fills, so children need no background reconciliation
+            child.parameters = {**(getattr(strategy_class, "parameters", None) or {}), "reconcile_every": None,
+                                **(parameters or {})}
+            child.book = StrategyBook(child.parameters.get("budget") or self.cash / max(len(specs), 1))
+            child.initialize()
+            self.children.append(child)
+
+        self.periods = [parse_sleeptime(child.sleeptime) for child in self.children]
+        # Spread the children's first iterations one tick apart across the shortest period
+        tick = max(1, int(min(self.periods or [60]) / max(len(self.children), 1)))
+        stagger = self.parameters.get("stagger", True)
+        self.offsets = [i * tick if stagger else 0 for i in range(len(self.children))]
+        self.next_due = None
+        self.sleeptime = self.parameters.get("sleeptime") or f"{tick}S"
+        logger.info(f"Coordinator initialized with {len(self.children)} strategies, ticking every {self.sleeptime}")
+
+    def shared_price(self, symbol):
+        """Last price of a symbol, fetched at most once per tick."""
+        return self.market_data.get(("price", symbol), lambda: self.get_last_price(symbol))
+
+    def shared_history(self, symbol, length, timestep="day"):
+        """Historical bars of a symbol, fetched at most once per tick for each length and timestep."""
+        return self.market_data.get(("history", symbol, length, timestep),
+                                    lambda: self.get_historical_prices(symbol, length, timestep=timestep))
+
+    def due_children(self, now):
+        """Children whose next iteration is due at `now`; advances their schedules."""
+        if self.next_due is None:
+            self.next_due = [now + pd.Timedelta(seconds=offset) for offset in self.offsets]
+        due = []
+        for i, child in enumerate(self.children):
+            if now >= self.next_due[i]:
+                due.append(child)
+                period = pd.Timedelta(seconds=self.periods[i])
+                while self.next_due[i] <= now:
+                    self.next_due[i] += period
+        return due
+
+    def flush_orders(self):
+        """Net and send every queued child order."""
+        return self.orders.flush(self.shared_price, self.create_order, self.submit_orders)
+
+    def on_trading_iteration(self):
+        """Run every due child against the shared data, then send their netted orders."""
+        try:
+            now = self.get_datetime()
+            self.market_data.advance(now)
+            due = self.due_children(now)
+            if not due:
+                return
+
+            # One batched price request for every symbol the due children trade
+            symbols = [symbol for child in due for symbol in _child_symbols(child)]
+            self.market_data.prefetch_prices(symbols, self.get_last_prices)
+
+            for child in due:
+                try:
+                    child.on_trading_iteration()
+                except Exception as e:
+                    logger.error(f"{type(child).__name__} iteration failed: {e}")
+            self.flush_orders()
+        except Exception as e:
+            logger.error(f"An error occurred during coordinated iteration: {e}")
+
+    def before_market_closes(self):
+        """Let every child close out, then send the resulting orders."""
+        self.market_data.advance(self.get_datetime())
+        for child in self.children:
+            try:
+                child.before_market_closes()
+            except Exception as e:
+                logger.error(f"{type(child).__name__} before_market_closes failed: {e}")
+        self.flush_orders()
+
+    def on_strategy_end(self):
+        """Forward the end of the run to every child and log how much work was shared."""
+        for child in self.children:
+            if hasattr(child, "on_strategy_end"):
+                child.on_strategy_end()
+        logger.info(f"Coordinator served {self.market_data.requests} data requests with "
+                    f"{self.market_data.broker_calls} broker calls; netted {self.orders.netted_shares:.0f} shares "
+                    f"and sent {self.orders.orders_sent} orders")
+
+    def on_filled_order(self, position, order, price, quantity, multiplier):
+        """Split the broker's fill of a net order between the children that placed it."""
+        self.orders.allocate(order, price, quantity, multiplier)
+
+    def on_canceled_order(self, order):
+        """Release the children's share of a canceled net order."""
+        self.orders.cancel(order)
+
+    def on_error(self, error):
+        """Handle any errors that occur during trading."""
+        logger.error(f"Error occurred: {error}")
+
+
+def _child_symbols(child):
+    """Symbols a child strategy trades."""
+    symbols = getattr(child, "symbols", None)
+    return list(symbols) if symbols else [child.symbol]
+
+
+if __name__ == "__main__":
+    from lumibot.brokers import Alpaca
+    from lumibot.traders import Trader
+    from lumibot_buy_hold import BuyHold
+    from lumibot_swing_high import SwingHigh
+
+    try:
+        # One buy-and-hold sleeve and three swing high variants on the same feed and account
+        strategies = [
+            (BuyHold, {"symbols": ["GOOG", "AAPL", "MSFT"]}),
+            (SwingHigh, {"symbol": "GOOG", "window_size": 5}),
+            (SwingHigh, {"symbol": "GOOG", "window_size": 10}),
+            (SwingHigh, {"symbol": "AAPL", "window_size": 10}),
+        ]
+        broker = Alpaca(ALPACA_CONFIG)
+        strategy = PortfolioCoordinator(broker=broker, parameters={"strategies": strategies})
+        trader = Trader()
+        trader.add_strategy(strategy)
+        logger.info("Starting coordinated trader...")
+        trader.run_all()
+    except Exception as e:
+        logger.error(f"An error occurred while running the coordinator: {e}")
@@ -0,0 +1,137 @@
+import numpy as np
+
+
+class IndicatorState:
+    """
+    Streaming SMA/EMA/price-change state for a single price series.
+
+    The state is warmed up once from a block of historical closes with NumPy and then
+    updated in constant time for every new bar, producing the same numbers as the
+    pandas rolling()/ewm(adjust=False)/pct_change() path.
+    """
+
+    def __init__(self, window_size=10):
+        """Initialize an empty indicator state for the given window size."""
+        if window_size < 1:
+            raise ValueError("window_size must be at least 1")
+        self.window_size = window_size
+        self.alpha = 2.0 / (window_size + 1)  # Same smoothing factor as ewm(span=window_size)
+        self._window = np.empty(window_size, dtype=float)  # Last `window_size` closes, circular
+        self._pos = 0  # Next slot to overwrite in the circular window
+        self._count = 0  # Number of closes seen so far
+        self._sum = 0.0  # Running sum of the closes in the window
+        self.prev_close = None  # Previous close, used for the price change
+        self._ema_before = np.nan  # EMA before the last close, so the last close can be revised
+        self._close_before = None  # Close before the last one, for the revised price change
+        self.sma = np.nan
+        self.ema = np.nan
+        self.price_change = np.nan
+
+    @property
+    def ready(self):
+        """Whether every indicator has a defined (non-NaN) value."""
+        return self._count >= max(self.window_size, 2)
+
+    def values(self):
+        """Return the current (SMA, EMA, Price_Change) tuple."""
+        return self.sma, self.ema, self.price_change
+
+    def update(self, close):
+        """Fold one new close into the state in O(1) and return the current indicators."""
+        close = float(close)
+
+        # Rolling sum: drop the value leaving the window, add the new one
+        if self._count >= self.window_size:
+            self._sum -= self._window[self._pos]
+        self._window[self._pos] = close
+        self._sum += close
+        self._pos = (self._pos + 1) % self.window_size
+        self._count += 1
+        self.sma = self._sum / self.window_size if self._count >= self.window_size else np.nan
+
+        # Exponential moving average seeded with the first close (adjust=False)
+        self._ema_before = self.ema
+        self.ema = close if self._count == 1 else self.alpha * close + (1 - self.alpha) * self.ema
+
+        # Percentage change from the previous close
+        self._close_before = self.prev_close
+        self.price_change = np.nan if self.prev_close is None else close / self.prev_close - 1
+        self.prev_close = close
+        return self.values()
+
+    def revise(self, close):
+        """Replace the last close (e.g. today's still-forming daily bar) in O(1) and return the indicators."""
+        if self._count == 0:
+            return self.update(close)
+        close = float(close)
+
+        # Swap the last close in the window and the running sum
+        last = (self._pos - 1) % self.window_size
+        self._sum += close - self._window[last]
+        self._window[last] = close
+        self.sma = self._sum / self.window_size if self._count >= self.window_size else np.nan
+
+        # Recompute the last EMA step and price change from the state before that close
+        self.ema = close if self._count == 1 else self.alpha * close + (1 - self.alpha) * self._ema_before
+        self.price_change = np.nan if self._close_before is None else close / self._close_before - 1
+        self.prev_close = close
+        return self.values()
+
+    def warm_up(self, closes):
+        """
+        Reset the state from a block of historical closes in one vectorized pass.
+
+        Returns the full SMA, EMA and price-change arrays aligned with `closes`, with NaN
+        where pandas would produce NaN.
+        """
+        closes = np.asarray(closes, dtype=float)
+        self.__init__(self.window_size)
+        n = len(closes)
+        if n == 0:
+            return np.empty(0), np.empty(0), np.empty(0)
+
+        # Simple moving average from a cumulative sum
+        sma = np.full(n, np.nan)
+        if n >= self.window_size:
+            csum = np.cumsum(np.insert(closes, 0, 0.0))
+            sma[self.window_size - 1:] = (csum[self.window_size:] - csum[:-self.window_size]) / self.window_size
+
+        ema = _ema(closes, self.alpha)
+
+        change = np.full(n, np.nan)
+        change[1:] = closes[1:] / closes[:-1] - 1
+
+        # Carry the tail of the block over so update() continues seamlessly
+        tail = closes[-self.window_size:]
+        self._window[:len(tail)] = tail
+        self._pos = len(tail) % self.window_size
+        self._count = n
+        self._sum = float(tail.sum())
+        self.prev_close = float(closes[-1])
+        self._ema_before = ema[-2] if n > 1 else np.nan
+        self._close_before = float(closes[-2]) if n > 1 else None
+        self.sma, self.ema, self.price_change = sma[-1], ema[-1], change[-1]
+        return sma, ema, change
+
+
+def _ema(values, alpha):
+    """Vectorized EMA with adjust=False, evaluated in blocks to keep the decay powers finite."""
+    n = len(values)
+    decay = 1.0 - alpha
+    out = np.empty(n)
+    if decay == 0.0:
+        out[:] = values
+        return out
+
+    # Within a block of length L, ema_j = decay^(j+1) * ema_prev + alpha * decay^j * cumsum(x_k * decay^-k)
+    block = max(1, int(np.log(1e12) / -np.log(decay)))
+    powers = decay ** np.arange(block)
+    inverse = 1.0 / powers
+    prev = values[0]  # Seeding with the first value makes ema_0 == x_0
+    for start in range(0, n, block):
+        chunk = values[start:start + block]
+        m = len(chunk)
+        weighted = np.cumsum(chunk * inverse[:m]) * powers[:m]
+        out[start:start + m] = powers[:m] * decay * prev + alpha * weighted
+        prev = out[start + m - 1]
+    return out
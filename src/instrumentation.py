@@ -0,0 +1,220 @@
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+import itertools
+import json
+import logging
+import os
+import tempfile
+import time
+import types
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Broker-facing Strategy methods timed individually when a strategy is instrumented
+BROKER_CALLS = [
+    "get_last_price",
+    "get_last_prices",
+    "get_historical_prices",
+    "get_position",
+    "get_positions",
+    "get_portfolio_value",
+    "create_order",
+    "submit_order",
+    "submit_orders",
+    "sell_all",
+]
+
+_instances = itertools.count(1)  # Numbers recorders within a process so same-named strategies get their own files
+
+BUCKETS = 64  # Histogram bucket b holds durations in [2^(b-1), 2^b) nanoseconds
+SLEEPTIME_UNITS = {"S": 1, "M": 60, "H": 3600, "D": 86400}
+
+
+class LatencyHistogram:
+    """Log2-bucketed latency histogram with exact count, total and maximum."""
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, elapsed_ns):
+        """Add one duration in nanoseconds."""
+        self.buckets[min(elapsed_ns.bit_length(), BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile, in nanoseconds."""
+        if not self.count:
+            return 0
+        target = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return min(2 ** bucket, self.max_ns)
+        return self.max_ns
+
+    def summary(self):
+        """Return count, mean, p50/p95/p99 and max in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ns / self.count / 1e6 if self.count else 0.0,
+            "p50_ms": self.quantile(0.50) / 1e6,
+            "p95_ms": self.quantile(0.95) / 1e6,
+            "p99_ms": self.quantile(0.99) / 1e6,
+            "max_ms": self.max_ns / 1e6,
+            "buckets": {str(2 ** b): c for b, c in enumerate(self.buckets) if c},
+        }
+
+
+class LatencyRecorder:
+    """
+    Per-stage and per-broker-call latency histograms for one strategy.
+
+    When disabled, `stage()` hands back a shared no-op context and nothing is recorded.
+    """
+
+    def __init__(self, name, enabled=True, path=None):
+        """Initialize a recorder; `path` is where export() writes the metrics file (default: one file per run and instance)."""
+        self.name = name
+        self.enabled = enabled
+        # Start time, process and instance number keep concurrent runs of the same strategy from sharing a file
+        self.run_id = f"{datetime.now():%Y-%m-%d_%H-%M-%S}_{os.getpid()}_{next(_instances)}"
+        self.path = path or os.path.join("logs", f"{name}_{self.run_id}_metrics.json")
+        self.histograms = {}
+        self.iterations = 0
+        self.overruns = 0
+        self.worst_overrun_s = 0.0
+        self._noop = nullcontext()
+
+    def record(self, stage, elapsed_ns):
+        """Add one duration for a stage."""
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram()
+        histogram.record(elapsed_ns)
+
+    def stage(self, name):
+        """Context manager timing the enclosed block under `name`."""
+        if not self.enabled:
+            return self._noop
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter_ns() - start)
+
+    def check_budget(self, elapsed_s, budget_s):
+        """Count an iteration and flag it if it ran longer than its sleeptime budget."""
+        self.iterations += 1
+        if budget_s and elapsed_s > budget_s:
+            self.overruns += 1
+            self.worst_overrun_s = max(self.worst_overrun_s, elapsed_s - budget_s)
+            logger.warning(f"{self.name} iteration took {elapsed_s:.3f}s, over its {budget_s:.3f}s sleeptime budget")
+
+    def instrument(self, strategy, methods=BROKER_CALLS):
+        """Time each broker method of a strategy instance as its own `broker.<method>` stage."""
+        if not self.enabled:
+            return
+        for method in methods:
+            if hasattr(type(strategy), method):
+                setattr(strategy, method, self._wrap_call(strategy, method))
+
+    def _wrap_call(self, strategy, method):
+        """Wrap a method, resolving it on the class at call time so later patches still apply."""
+        stage = f"broker.{method}"
+
+        def call(*args, **kwargs):
+            start = time.perf_counter_ns()
+            target = getattr(type(strategy), method)
+            if isinstance(target, types.FunctionType):
+                target = target.__get__(strategy, type(strategy))  # Bind plain methods; mocks are called as is
+            try:
+                return target(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter_ns() - start)
+
+        return call
+
+    def snapshot(self):
+        """Return all metrics as a JSON-serializable dict."""
+        return {
+            "strategy": self.name,
+            "iterations": self.iterations,
+            "overruns": self.overruns,
+            "worst_overrun_s": self.worst_overrun_s,
+            "stages": {stage: histogram.summary() for stage, histogram in sorted(self.histograms.items())},
+        }
+
+    def export(self, path=None):
+        """Write the metrics file atomically; returns its path."""
+        path = path or self.path
+        if not self.enabled:
+            return path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file and swap it in, so readers never see a half-written file
+        fd, tmp = tempfile.mkstemp(dir=directory or ".", prefix=os.path.basename(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp, path)
+        except Exception:
+            os.remove(tmp)
+            raise
+        return path
+
+
+def parse_sleeptime(sleeptime):
+    """Convert a lumibot sleeptime ("10S", "1D", or minutes as a number) to seconds."""
+    if isinstance(sleeptime, (int, float)):
+        return float(sleeptime) * 60
+    unit = sleeptime[-1].upper()
+    if unit in SLEEPTIME_UNITS:
+        return float(sleeptime[:-1]) * SLEEPTIME_UNITS[unit]
+    return float(sleeptime) * 60
+
+
+def timed(stage):
+    """Decorator timing a strategy method under `stage` with the strategy's `metrics` recorder."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            metrics = getattr(self, "metrics", None)
+            if metrics is None or not metrics.enabled:
+                return fn(self, *args, **kwargs)
+            with metrics.stage(stage):
+                return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_iteration(fn):
+    """Decorator timing `on_trading_iteration` and checking it against the sleeptime budget."""
+    @wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        metrics = getattr(self, "metrics", None)
+        if metrics is None or not metrics.enabled:
+            return fn(self, *args, **kwargs)
+        start = time.perf_counter_ns()
+        try:
+            return fn(self, *args, **kwargs)
+        finally:
+            elapsed_ns = time.perf_counter_ns() - start
+            metrics.record("on_trading_iteration", elapsed_ns)
+            metrics.check_budget(elapsed_ns / 1e9, parse_sleeptime(self.sleeptime))
+    return wrapper
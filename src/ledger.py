@@ -0,0 +1,329 @@
+import logging
+import threading
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Per-symbol columns of the ledger, one float array each
+COLUMNS = (
+    "quantity",  # Filled shares held
+    "pending",  # Signed shares of submitted orders not filled yet
+    "entry",  # Reference price the stop loss and take profit are set from
+    "avg_price",  # Average fill price of the shares held
+    "last",  # Latest marked price
+    "stop",  # Stop loss level, NaN while flat
+    "target",  # Take profit level, NaN while flat
+    "realized",  # Realized P&L of closed shares
+    "adopted",  # Signed shares reconciliation took from the broker before their fill callbacks arrived
+)
+
+
+class Ledger:
+    """
+    Local positions and open-order quantities, one row per symbol in parallel NumPy arrays.
+
+    Orders are booked when submitted and confirmed by fills, so `position()` answers with
+    what the strategy has committed to without asking the broker. Watchlist symbols get the
+    first rows in their given order, so the arrays line up with a watchlist price vector and
+    stop loss / take profit checks run for every symbol in one vectorized step.
+    """
+
+    def __init__(self, symbols=(), stop_loss_percent=None, take_profit_percent=None, capacity=16):
+        """Initialize an empty ledger, with rows for `symbols` and optional stop loss / take profit levels."""
+        self.stop_loss_percent = stop_loss_percent
+        self.take_profit_percent = take_profit_percent
+        self.index = {}  # Symbol -> row
+        self.symbols = []  # Row -> symbol
+        self.size = max(capacity, len(symbols), 1)
+        for name in COLUMNS:
+            setattr(self, name, np.full(self.size, np.nan))
+        self.quantity[:] = 0.0
+        self.pending[:] = 0.0
+        self.realized[:] = 0.0
+        self.adopted[:] = 0.0
+        self.version = np.zeros(self.size, dtype=np.int64)  # Bumped on every local change to a row
+        self.lock = threading.RLock()  # Serializes fills, orders and reconciliation
+        for symbol in symbols:
+            self.row(symbol)
+
+    def row(self, symbol):
+        """Row of a symbol, added on first use."""
+        row = self.index.get(symbol)
+        if row is not None:
+            return row
+        with self.lock:
+            if symbol in self.index:
+                return self.index[symbol]
+            row = len(self.symbols)
+            if row == self.size:
+                self._grow()
+            self.index[symbol] = row
+            self.symbols.append(symbol)
+            return row
+
+    def _grow(self):
+        """Double every column's capacity."""
+        defaults = {"quantity": 0.0, "pending": 0.0, "realized": 0.0, "adopted": 0.0}
+        for name in COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate([column, np.full(self.size, defaults.get(name, np.nan))]))
+        self.version = np.concatenate([self.version, np.zeros(self.size, dtype=np.int64)])
+        self.size *= 2
+
+    def __len__(self):
+        """Number of symbols in the ledger."""
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        """Whether the ledger has a row for the symbol."""
+        return symbol in self.index
+
+    # Queries: constant time, no broker call
+
+    def position(self, symbol):
+        """Shares held plus shares of pending orders."""
+        row = self.index.get(symbol)
+        return 0.0 if row is None else float(self.quantity[row] + self.pending[row])
+
+    def entry_price(self, symbol):
+        """Reference price of the open position, or None while flat."""
+        row = self.index.get(symbol)
+        if row is None or np.isnan(self.entry[row]):
+            return None
+        return float(self.entry[row])
+
+    def unrealized(self, symbol=None):
+        """Unrealized P&L of one symbol at its last marked price, or of the whole ledger."""
+        if symbol is not None:
+            row = self.index.get(symbol)
+            if row is None or not self.quantity[row]:
+                return 0.0
+            return float((self.last[row] - self.avg_price[row]) * self.quantity[row])
+        n = len(self.symbols)
+        held = self.quantity[:n] != 0
+        return float(np.sum((self.last[:n][held] - self.avg_price[:n][held]) * self.quantity[:n][held]))
+
+    def exit_hit(self, symbol, price=None):
+        """Whether an open position has reached its stop loss or take profit at `price` (default: last mark)."""
+        row = self.index.get(symbol)
+        if row is None or self.quantity[row] + self.pending[row] <= 0:
+            return False
+        price = self.last[row] if price is None else price
+        return bool(price <= self.stop[row] or price >= self.target[row])
+
+    def held(self, n=None):
+        """Boolean array of the first `n` rows (default: all) with an open or pending long position."""
+        n = len(self.symbols) if n is None else n
+        return self.quantity[:n] + self.pending[:n] > 0
+
+    def positions(self, n=None):
+        """Shares held plus pending for the first `n` rows (default: all)."""
+        n = len(self.symbols) if n is None else n
+        return self.quantity[:n] + self.pending[:n]
+
+    def exits(self, prices):
+        """Boolean array of the rows whose open position reached its stop loss or take profit, for prices aligned with the rows."""
+        prices = np.asarray(prices, dtype=float)
+        n = len(prices)
+        with np.errstate(invalid="ignore"):
+            return self.held(n) & ((prices <= self.stop[:n]) | (prices >= self.target[:n]))
+
+    # Updates
+
+    def mark(self, symbol, price):
+        """Record the latest price of a symbol."""
+        if price is not None:
+            self.last[self.row(symbol)] = price
+
+    def mark_all(self, prices):
+        """Record the latest prices of the first len(prices) rows; NaN prices keep the previous mark."""
+        prices = np.asarray(prices, dtype=float)
+        n = len(prices)
+        self.last[:n] = np.where(np.isnan(prices), self.last[:n], prices)
+
+    def submitted(self, symbol, side, quantity, price=None):
+        """Book a submitted order; a buy from flat sets the entry price and exit levels from `price`."""
+        with self.lock:
+            row = self.row(symbol)
+            signed = _signed(side, quantity)
+            if signed > 0 and self.quantity[row] + self.pending[row] <= 0 and price is not None:
+                self._set_entry(row, price)
+            self.pending[row] += signed
+            self.version[row] += 1
+            return row
+
+    def set_entry(self, symbol, price):
+        """Set the entry price and exit levels of a symbol directly; None clears them."""
+        with self.lock:
+            row = self.row(symbol)
+            self._set_entry(row, np.nan if price is None else float(price))
+            self.version[row] += 1
+
+    def close(self, symbol):
+        """Book a sell of everything held for a symbol; pending buys are treated as canceled."""
+        with self.lock:
+            row = self.index.get(symbol)
+            if row is None:
+                return
+            self.pending[row] = -self.quantity[row]
+            self._set_entry(row, np.nan)
+            self.version[row] += 1
+
+    def close_all(self):
+        """Book a sell of everything held."""
+        with self.lock:
+            for symbol in self.symbols:
+                self.close(symbol)
+
+    def fill(self, symbol, side, quantity, price):
+        """Book a fill: update shares held, pending, average price and realized P&L."""
+        with self.lock:
+            row = self.row(symbol)
+            signed = _signed(side, quantity)
+            held = self.quantity[row]
+
+            # Shares a reconciliation already took from the broker are not counted a second time
+            adopted = self.adopted[row]
+            taken = 0.0
+            if adopted * signed > 0:
+                taken = signed if abs(signed) < abs(adopted) else adopted
+                self.adopted[row] = adopted - taken
+            change = signed - taken
+
+            if change > 0:
+                self.avg_price[row] = price if held <= 0 else (self.avg_price[row] * held + price * change) / (held + change)
+            if signed > 0 and np.isnan(self.entry[row]):
+                self._set_entry(row, price)  # A fill we did not book (e.g. a manual order) still gets exit levels
+            if signed < 0 and not np.isnan(self.avg_price[row]):
+                self.realized[row] += (price - self.avg_price[row]) * min(-signed, held - taken)
+            self.quantity[row] = max(held + change, 0.0)  # Long only: a sell never leaves a negative position
+
+            # The fill settles pending shares on the same side, never flipping their sign
+            pending = self.pending[row]
+            if pending * signed > 0:
+                self.pending[row] = pending - signed if abs(signed) < abs(pending) else 0.0
+            self.last[row] = price
+            if self.quantity[row] + self.pending[row] <= 0 and self.quantity[row] <= 0:
+                self._set_entry(row, np.nan)
+                if self.adopted[row] >= 0:
+                    self.avg_price[row] = np.nan
+            self.version[row] += 1
+
+    def reconcile(self, positions, open_orders=None, versions=None):
+        """
+        Align the ledger with a broker snapshot; returns the number of rows that had drifted.
+
+        `positions` are broker positions (asset, quantity, avg_fill_price). With `open_orders`,
+        pending quantities are rebuilt from them. Rows changed locally since `versions` (taken
+        before the snapshot was requested) are left alone, since the snapshot may predate them.
+        Drift in the direction of a pending order is a fill the snapshot saw before its callback
+        arrived; it is remembered in `adopted` so the callback does not count it again.
+        """
+        with self.lock:
+            broker = {}
+            for position in positions:
+                broker[symbol_of(position.asset)] = position
+                self.row(symbol_of(position.asset))
+            pending = {}
+            for order in open_orders or []:
+                symbol = symbol_of(order.asset)
+                pending[symbol] = pending.get(symbol, 0.0) + _signed(order.side, order.quantity)
+                self.row(symbol)
+
+            drifted = 0
+            for row, symbol in enumerate(self.symbols):
+                if versions is not None and (row >= len(versions) or versions[row] != self.version[row]):
+                    continue
+                position = broker.get(symbol)
+                quantity = float(position.quantity) if position is not None else 0.0
+                drift = quantity - self.quantity[row]
+                if drift:
+                    drifted += 1
+                    pending_before = self.pending[row]
+                    if drift * pending_before > 0:
+                        self.adopted[row] += drift if abs(drift) < abs(pending_before) else pending_before
+                    self.quantity[row] = quantity
+                if open_orders is not None:
+                    self.pending[row] = pending.get(symbol, 0.0)
+                if quantity > 0:
+                    avg_price = float(getattr(position, "avg_fill_price", None) or np.nan)
+                    if not np.isnan(avg_price):
+                        self.avg_price[row] = avg_price
+                    if np.isnan(self.entry[row]):
+                        self._set_entry(row, self.avg_price[row])  # Adopt positions opened before a restart
+                elif self.pending[row] <= 0:
+                    self._set_entry(row, np.nan)
+                    if self.adopted[row] >= 0:
+                        self.avg_price[row] = np.nan  # Kept while a sell fill is still to come, for its realized P&L
+            if drifted:
+                logger.warning(f"Ledger reconciled {drifted} drifted positions with the broker")
+            return drifted
+
+    def versions(self):
+        """Copy of the row versions, to pass to `reconcile` for a snapshot requested now."""
+        return self.version[:len(self.symbols)].copy()
+
+    def _set_entry(self, row, price):
+        """Set the entry price of a row and its stop loss / take profit levels."""
+        self.entry[row] = price
+        self.stop[row] = price * (1 - self.stop_loss_percent / 100) if self.stop_loss_percent is not None else np.nan
+        self.target[row] = price * (1 + self.take_profit_percent / 100) if self.take_profit_percent is not None else np.nan
+
+
+class Reconciler:
+    """
+    Keeps a ledger in line with the broker from a background thread.
+
+    `fetch` returns (positions, open_orders or None) and is called every `interval` seconds,
+    so broker calls stay at one snapshot per interval however often the ledger is queried.
+    """
+
+    def __init__(self, ledger, fetch, interval=60.0):
+        """Initialize the reconciler for one ledger and broker snapshot function."""
+        self.ledger = ledger
+        self.fetch = fetch
+        self.interval = interval
+        self.runs = 0
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def reconcile(self):
+        """Take one broker snapshot and reconcile the ledger with it; returns the number of drifted rows."""
+        try:
+            versions = self.ledger.versions()
+            positions, open_orders = self.fetch()
+            drifted = self.ledger.reconcile(positions, open_orders, versions)
+            self.runs += 1
+            return drifted
+        except Exception as e:
+            logger.error(f"Ledger reconciliation failed: {e}")
+            return None
+
+    def start(self):
+        """Reconcile every `interval` seconds in a daemon thread."""
+        def target():
+            while not self.stopped.wait(self.interval):
+                self.reconcile()
+
+        self.thread = threading.Thread(target=target, name="ledger-reconciler", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Stop the background thread and wait for it to finish."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+
+def _signed(side, quantity):
+    """Quantity signed by order side: positive for buys, negative for sells."""
+    side = str(getattr(side, "value", side)).lower()
+    return -float(quantity) if side.startswith("sell") else float(quantity)
+
+
+def symbol_of(asset):
+    """Return the ticker for an Asset or a plain symbol string."""
+    return getattr(asset, "symbol", asset)
@@ -1,10 +1,14 @@
+from concurrency import ConcurrentExecutor
 from config import ALPACA_CONFIG
+from instrumentation import LatencyRecorder, timed, timed_iteration
+from ledger import Ledger, symbol_of
+from rebalance import compute_rebalance
+from results_sink import ResultsSink, recorded_iteration
 from datetime import datetime
-from lumibot.backtesting import YahooDataBacktesting
-from lumibot.brokers import Alpaca
 from lumibot.strategies import Strategy
-from lumibot.traders import Trader
+from startup import Startup, reports_startup
 import logging
+import numpy as np
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,35 +20,128 @@ class BuyHold(Strategy):
     and holds them until the end of the backtest or live trading.
     """
 
+    # Default parameters; override by passing `parameters=` to the strategy or backtest
+    parameters = {
+        "symbols": ["GOOG", "AAPL", "MSFT"],  # List of symbols to invest in
+        "max_workers": 16,  # Maximum number of concurrent order submissions (live only)
+        "rate_limit": 200 / 60,  # Order submissions started per second (Alpaca allows 200 per minute)
+        "rebalance": False,  # Periodically trade holdings back to their target allocation
+        "rebalance_every": 21,  # Iterations between rebalances (about a month of daily iterations)
+        "drift_threshold": 0.05,  # Absolute weight drift that triggers a trade for a holding
+        "instrument": True,  # Record per-stage and per-broker-call latencies
+        "record_results": False,  # Stream portfolio value, cash and trades to the results sink
+    }
+    startup = None  # Startup tracker set by the entry point, if any
+
     def initialize(self):
         """Initialize the strategy with parameters."""
         self.sleeptime = "1D"  # Sleep for 1 day between iterations
-        self.symbols = ["GOOG", "AAPL", "MSFT"]  # List of symbols to invest in
+        # Latency histograms per lifecycle stage and broker call
+        self.metrics = LatencyRecorder(type(self).__name__, enabled=self.parameters.get("instrument", True))
+        self.metrics.instrument(self)
+        # Append-only results of this run, in place of lumibot's per-run report files
+        self.results = ResultsSink.for_strategy(self) if self.parameters.get("record_results", False) else None
+        self.symbols = list(self.parameters.get("symbols", ["GOOG", "AAPL", "MSFT"]))  # List of symbols to invest in
         self.portfolio_allocation = {symbol: 1 / len(self.symbols) for symbol in self.symbols}  # Equal allocation
+        self.ledger = Ledger(self.symbols)  # Local record of orders and fills, one row per symbol in `symbols` order
         self.first_iteration = True  # Flag to track the first iteration
+        self.rebalance_enabled = self.parameters.get("rebalance", False)  # Rebalancing mode switch
+        self.rebalance_every = self.parameters.get("rebalance_every", 21)  # Iterations between rebalances
+        self.drift_threshold = self.parameters.get("drift_threshold", 0.05)  # Drift that triggers a trade
+        self.iterations_since_rebalance = 0  # Iterations since the portfolio was last deployed or rebalanced
+        # Concurrent, rate-limited order submission for large universes; serial and unlimited in backtests,
+        # so fills happen in the same order on every run
+        self.executor = ConcurrentExecutor(
+            max_workers=1 if self.is_backtesting else self.parameters.get("max_workers", 16),
+            rate_limit=None if self.is_backtesting else self.parameters.get("rate_limit", 200 / 60),
+        )
         logger.info("Strategy initialized with symbols: %s", self.symbols)
 
+    def fetch_prices(self, symbols):
+        """Fetch last prices for all symbols in one batch call, NaN where a price is unavailable."""
+        try:
+            prices = {symbol_of(asset): price for asset, price in (self.get_last_prices(symbols) or {}).items()}
+        except Exception as e:
+            # Fall back to one call per symbol so a single bad symbol cannot block the whole universe
+            logger.error(f"Unable to get prices in one batch, fetching them one by one: {e}")
+            prices, errors = self.executor.map(self.get_last_price, symbols)
+            for symbol, error in errors.items():
+                logger.error(f"Unable to get price for {symbol}: {error}")
+        return np.array([np.nan if prices.get(symbol) is None else prices[symbol] for symbol in symbols], dtype=float)
+
+    def submit_orders_concurrently(self, orders):
+        """Create and submit (symbol, quantity, side) orders concurrently; returns the failed ones."""
+        def place(item):
+            symbol, quantity, side = item
+            return self.submit_order(self.create_order(symbol, quantity, side))
+
+        _, errors = self.executor.map(place, orders)
+        for (symbol, quantity, side), error in errors.items():
+            logger.error(f"Failed to place {side} order for {quantity} shares of {symbol}: {error}")
+        for symbol, quantity, side in orders:
+            if (symbol, quantity, side) not in errors:
+                self.ledger.submitted(symbol, side, quantity)
+        return errors
+
+    @timed("deploy")
+    def deploy(self):
+        """Invest the cash across all symbols according to the portfolio allocation."""
+        prices = self.fetch_prices(self.symbols)
+        self.ledger.mark_all(prices)
+        weights = np.array([self.portfolio_allocation[symbol] for symbol in self.symbols])
+
+        # Calculate every quantity based on portfolio allocation in one step
+        with np.errstate(invalid="ignore", divide="ignore"):
+            quantities = np.floor(self.cash * weights / prices)
+        quantities = np.nan_to_num(quantities, nan=0.0, posinf=0.0)
+
+        orders = []
+        for symbol, price, quantity in zip(self.symbols, prices, quantities):
+            if np.isnan(price):
+                logger.error(f"Unable to get price for {symbol}. Skipping.")
+            elif quantity > 0:
+                orders.append((symbol, int(quantity), "buy"))
+                logger.info(f"Placing buy order for {int(quantity)} shares of {symbol} at {price}.")
+            else:
+                logger.warning(f"Not enough cash to buy {symbol}.")
+        self.submit_orders_concurrently(orders)
+
+    def get_quantities(self, symbols):
+        """Return the held quantity of each symbol from a single positions snapshot, reconciling the ledger with it."""
+        self.ledger.reconcile(self.get_positions())
+        return np.array([self.ledger.quantity[self.ledger.row(symbol)] for symbol in symbols])
+
+    @timed("rebalance")
+    def rebalance(self):
+        """Trade only the holdings that drifted past the threshold back to their target weights."""
+        quantities = self.get_quantities(self.symbols)
+        prices = self.fetch_prices(self.symbols)
+        self.ledger.mark_all(prices)
+        targets = np.array([self.portfolio_allocation[symbol] for symbol in self.symbols])
+        deltas = compute_rebalance(quantities, prices, targets, self.cash, self.drift_threshold)
+
+        # Sells first so their proceeds fund the buys
+        sells = [(symbol, int(-delta), "sell") for symbol, delta in zip(self.symbols, deltas) if delta < 0]
+        buys = [(symbol, int(delta), "buy") for symbol, delta in zip(self.symbols, deltas) if delta > 0]
+        logger.info(f"Rebalancing with {len(sells)} sell and {len(buys)} buy orders.")
+        self.submit_orders_concurrently(sells)
+        self.submit_orders_concurrently(buys)
+
+    @timed_iteration
+    @recorded_iteration
+    @reports_startup
     def on_trading_iteration(self):
         """Main trading logic that runs on each iteration."""
         try:
             if self.first_iteration:
                 # Invest in each symbol at the first iteration
-                for symbol in self.symbols:
-                    price = self.get_last_price(symbol)
-                    if price is None:
-                        logger.error(f"Unable to get price for {symbol}. Skipping.")
-                        continue
-
-                    # Calculate the quantity based on portfolio allocation
-                    quantity = (self.cash * self.portfolio_allocation[symbol]) // price
-                    if quantity > 0:
-                        order = self.create_order(symbol, quantity, "buy")
-                        self.submit_order(order)
-                        logger.info(f"Placed buy order for {quantity} shares of {symbol} at {price}.")
-                    else:
-                        logger.warning(f"Not enough cash to buy {symbol}.")
-
+                self.deploy()
                 self.first_iteration = False  # Ensure this block runs only once
+            elif self.rebalance_enabled:
+                self.iterations_since_rebalance += 1
+                if self.iterations_since_rebalance >= self.rebalance_every:
+                    self.rebalance()
+                    self.iterations_since_rebalance = 0
 
             # Log portfolio value at each iteration
             portfolio_value = self.get_portfolio_value()
@@ -53,12 +150,30 @@ class BuyHold(Strategy):
         except Exception as e:
             logger.error(f"An error occurred during trading iteration: {e}")
 
+    @timed("before_market_closes")
     def before_market_closes(self):
         """Actions to perform before the market closes."""
         try:
             logger.info("Market is about to close. No action taken.")
         except Exception as e:
             logger.error(f"An error occurred before market close: {e}")
+        finally:
+            if not self.is_backtesting:
+                self.metrics.export()  # Write the day's latency metrics; a backtest writes them once at the end
+
+    def on_strategy_end(self):
+        """Close the results sink and write the final latency metrics."""
+        if self.results is not None:
+            logger.info(f"Run summary: {self.results.close()}")
+        path = self.metrics.export()
+        logger.info(f"Latency metrics written to {path}")
+
+    def on_filled_order(self, position, order, price, quantity, multiplier):
+        """Book each fill in the ledger and record it to the results sink."""
+        symbol = symbol_of(order.asset)
+        self.ledger.fill(symbol, order.side, quantity, price)
+        if self.results is not None:
+            self.results.record_trade(self.get_datetime(), symbol, order.side, quantity, price)
 
     def on_error(self, error):
         """Handle any errors that occur during trading."""
@@ -67,12 +182,19 @@ class BuyHold(Strategy):
 
 if __name__ == "__main__":
     trade = False  # Set to True for live trading, False for backtesting
+    use_bar_store = True  # Serve backtest data from the local bar cache instead of downloading it every run
+    full_report = False  # Also write lumibot's tearsheet, stats, trades and plot files for this run
 
     if trade:
-        # Live trading with Alpaca
+        # Live trading with Alpaca; the backtesting machinery is never imported on this path
         try:
+            startup = Startup()
+            from lumibot.brokers import Alpaca
+            from lumibot.traders import Trader
+
             broker = Alpaca(ALPACA_CONFIG)
             strategy = BuyHold(broker=broker)
+            strategy.startup = startup
             trader = Trader()
             trader.add_strategy(strategy)
             logger.info("Starting live trading...")
@@ -82,18 +204,35 @@ if __name__ == "__main__":
     else:
         # Backtesting with Yahoo Finance data
         try:
+            from bar_store import build_pandas_data
+            from lumibot.backtesting import PandasDataBacktesting, YahooDataBacktesting
+
             start = datetime(2022, 1, 1)
             end = datetime(2022, 12, 31)
             logger.info(f"Starting backtest from {start} to {end}...")
+            if use_bar_store:
+                # Only the date ranges missing from the cache hit the network
+                datasource = PandasDataBacktesting
+                datasource_kwargs = {"pandas_data": build_pandas_data(BuyHold.parameters["symbols"], start, end)}
+            else:
+                datasource = YahooDataBacktesting
+                datasource_kwargs = {}
             BuyHold.backtest(
-                YahooDataBacktesting,
+                datasource,
                 start,
                 end,
-                benchmark_asset="SPY",  # Compare performance to SPY (S&P 500 ETF)
+                # Compare performance to SPY (S&P 500 ETF) in the report files; lumibot downloads the
+                # benchmark itself, outside the bar store, so it is only requested when they are written
+                benchmark_asset="SPY" if full_report else None,
                 stats=True,  # Generate performance statistics
-                show_plot=True,  # Show a plot of the portfolio value
+                show_plot=full_report,  # Show a plot of the portfolio value
+                save_tearsheet=full_report,  # The results sink keeps the series; reports are built on demand
+                show_tearsheet=False,
+                save_stats_file=full_report,
                 buy_trend=True,  # Plot buy signals on the chart
                 sell_trend=False,  # No sell signals in Buy-and-Hold
+                parameters={**BuyHold.parameters, "record_results": True},
+                **datasource_kwargs,
             )
         except Exception as e:
             logger.error(f"An error occurred during backtesting: {e}")
\ No newline at end of file
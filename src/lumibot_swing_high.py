@@ -1,38 +1,109 @@
+from bar_store import BarStore, alpaca_fetcher
+from concurrent.futures import ThreadPoolExecutor
 from config import ALPACA_CONFIG
-from lumibot.brokers import Alpaca
+from datetime import date, timedelta
+from indicators import IndicatorState
+from instrumentation import LatencyRecorder, timed, timed_iteration
+from ledger import Ledger, Reconciler, symbol_of
 from lumibot.strategies import Strategy
-from lumibot.traders import Trader
+from model_store import ModelStore, OnlineClassifier
+from results_sink import ResultsSink, recorded_iteration
+from ring_buffer import RingBuffer
 import logging
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
+from startup import Startup, reports_startup
+from streaming import AlpacaStream, StreamRunner
+import threading
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MARKET_TIMEZONE = "America/New_York"  # Streamed trades are dated by their session in market time
+
 class SwingHigh(Strategy):
-    data = []  # List to store historical prices
+    # Default parameters; override by passing `parameters=` to the strategy or backtest
+    parameters = {
+        "symbol": "GOOG",  # Trading symbol
+        "quantity": 10,  # Quantity of shares to trade
+        "stop_loss_percent": 0.5,  # Stop loss percentage (0.5%)
+        "take_profit_percent": 1.5,  # Take profit percentage (1.5%)
+        "window_size": 10,  # Window size for moving averages
+        "sleeptime": "10S",  # Sleep time between trading iterations
+        "symbols": None,  # Watchlist for multi-symbol mode; None trades only `symbol`
+        "use_model_filter": False,  # Only buy when the model predicts a rise
+        "instrument": True,  # Record per-stage and per-broker-call latencies
+        "stream": False,  # React to pushed trades instead of polling every sleeptime (single-symbol mode)
+        "record_results": False,  # Stream portfolio value, cash and trades to the results sink
+        "reconcile_every": 60,  # Seconds between background reconciliations of the ledger with the broker (live only; None to disable)
+    }
+    pattern_lookback = 3  # Number of recent prices the swing high pattern compares
+    features = ['SMA', 'EMA', 'Price_Change']  # Model features, in column order
     order_number = 0  # Counter to keep track of the number of orders placed
-    entry_price = None  # Variable to store the entry price of the position
+    startup = None  # Startup steps run concurrently by the entry point, if any
 
     def initialize(self):
         """Initialize the strategy with any required parameters."""
-        self.sleeptime = "10S"  # Set the sleep time between trading iterations
-        self.symbol = "GOOG"  # Define the trading symbol
-        self.quantity = 10  # Define the quantity of shares to trade
-        self.stop_loss_percent = 0.5  # Stop loss percentage (0.5%)
-        self.take_profit_percent = 1.5  # Take profit percentage (1.5%)
-        self.window_size = 10  # Window size for moving averages
+        self.sleeptime = self.parameters.get("sleeptime", "10S")  # Set the sleep time between trading iterations
+        # Latency histograms per lifecycle stage and broker call
+        self.metrics = LatencyRecorder(type(self).__name__, enabled=self.parameters.get("instrument", True))
+        self.metrics.instrument(self)
+        # Append-only results of this run, in place of lumibot's per-run report files
+        self.results = ResultsSink.for_strategy(self) if self.parameters.get("record_results", False) else None
+        self.symbol = self.parameters.get("symbol", "GOOG")  # Define the trading symbol
+        self.quantity = self.parameters.get("quantity", 10)  # Define the quantity of shares to trade
+        self.stop_loss_percent = self.parameters.get("stop_loss_percent", 0.5)  # Stop loss percentage (0.5%)
+        self.take_profit_percent = self.parameters.get("take_profit_percent", 1.5)  # Take profit percentage (1.5%)
+        self.window_size = self.parameters.get("window_size", 10)  # Window size for moving averages
         self.model = None  # Machine learning model
+        self.model_store = ModelStore()  # Cache of trained models keyed by symbol, features and data
+        self.model_params = {"window_size": self.window_size}  # Feature parameters, part of the cache key
+        self.model_executor = ThreadPoolExecutor(max_workers=1)  # Trains the model off the iteration thread
+        self.model_future = None  # Pending background training, if any
+        self.prediction = None  # Latest model probability that the price rises
+        self.use_model_filter = self.parameters.get("use_model_filter", False)  # Gate buys on the prediction
+        # Recent prices; sized for the longest rule lookback (the pattern waits for one extra price)
+        self.data = RingBuffer(self.pattern_lookback + 1)
+        self.indicators = None  # Streaming indicator state, warmed up from the first history download
+        self.last_bar_time = None  # Timestamp of the last bar folded into the indicator state
+        # Features and close of the bar before the last one: its label is the last bar's direction,
+        # learned once a newer bar arrives and the last bar's close is final
+        self.label_features = None
+        self.label_close = None
+        self.bar_store = BarStore()  # Local daily bar cache; set to None to always query the broker
+        self.bar_fetcher = None  # Source filling the bar cache; the broker's historical prices when None
+        self.stream_runner = None  # Pushes trades into on_stream_event when streaming
+        self.stream_lock = threading.RLock()  # Serializes stream events with the lumibot lifecycle hooks
+        self.stream_day = None  # Date of the session the streamed prices belong to
+        self.stream_close = None  # Latest streamed price, folded in as that session's close on rollover
+        self.closed_out = False  # Set by before_market_closes; streamed trades are ignored until the next session
+        self.symbols = self.parameters.get("symbols")  # Watchlist for multi-symbol mode
+        # Local positions, entry prices and exit levels, answered without a broker call
+        self.ledger = Ledger(self.symbols or [self.symbol], self.stop_loss_percent, self.take_profit_percent)
+        self.reconciler = None  # Keeps the ledger in line with the broker, started on the first iteration
+        if self.symbols:
+            # One row of prices per iteration, one column per symbol
+            self.prices = RingBuffer(self.pattern_lookback + 1, width=len(self.symbols))
+            logger.info("Strategy initialized with watchlist %s and quantity %d", self.symbols, self.quantity)
+            return
         logger.info("Strategy initialized with symbol %s and quantity %d", self.symbol, self.quantity)
 
+    @timed("fetch_historical_data")
     def fetch_historical_data(self, symbol, days=30):
-        """Fetch historical price data using Alpaca's API."""
+        """Fetch historical price data, from the local bar cache when possible, else Alpaca's API."""
         try:
-            historical_data = self.get_historical_prices(symbol, days=days)
+            if self.bar_store is not None and not self.is_backtesting:
+                if self.startup is not None:
+                    self.startup.result("history")  # The history download started at launch fills the cache
+                start, end = history_span(days)
+                df = self.bar_store.get_bars(symbol, start, end, self.bar_fetcher or self._fetch_bars)
+                if df.empty:
+                    logger.error(f"No historical data found for {symbol}")
+                    return None
+                return df.tail(days).copy()
+
+            historical_data = self.get_historical_prices(symbol, days, timestep="day")
             if historical_data:
                 df = historical_data.df  # Convert to Pandas DataFrame
                 return df
@@ -43,117 +114,393 @@ class SwingHigh(Strategy):
             logger.error(f"Error fetching historical data: {e}")
             return None
 
+    def _fetch_bars(self, symbol, start, end):
+        """Fetch daily bars between start and end from the broker for the bar cache."""
+        length = (date.today() - start).days + 1
+        historical_data = self.get_historical_prices(symbol, length, timestep="day")
+        if not historical_data:
+            return None
+        df = historical_data.df
+        return df[(df.index.date >= start) & (df.index.date <= end)]
+
+    @timed("calculate_indicators")
     def calculate_indicators(self, df):
-        """Calculate technical indicators using Pandas and NumPy."""
+        """Calculate technical indicators, warming up the streaming indicator state once."""
         if df is not None:
-            # Calculate moving averages
-            df['SMA'] = df['close'].rolling(window=self.window_size).mean()
-            df['EMA'] = df['close'].ewm(span=self.window_size, adjust=False).mean()
+            # Vectorized warm-up; later bars are folded in by update_indicators()
+            self.indicators = IndicatorState(self.window_size)
+            closes = df['close'].to_numpy(dtype=float)
+            sma, ema, price_change = self.indicators.warm_up(closes)
+            self.last_bar_time = df.index[-1] if len(df) else None
+            self.label_features = None
+            self.label_close = None
+            if len(df) > 1 and not np.isnan([sma[-2], ema[-2], price_change[-2]]).any():
+                self.label_features = [sma[-2], ema[-2], price_change[-2]]
+                self.label_close = closes[-2]
 
-            # Calculate price change percentage
-            df['Price_Change'] = df['close'].pct_change()
+            # Moving averages and price change percentage
+            df['SMA'] = sma
+            df['EMA'] = ema
+            df['Price_Change'] = price_change
 
             # Drop NaN values
             df.dropna(inplace=True)
             return df
         return None
 
+    @timed("update_indicators")
+    def update_indicators(self, df):
+        """Fold only the bars newer than the last one seen into the indicator state."""
+        if df is None or len(df) == 0:
+            return self.indicators.values()
+        if self.last_bar_time is not None:
+            revised = df[df.index == self.last_bar_time]
+            if len(revised):
+                # The last bar may still be forming (today's daily bar): replace its close instead of skipping it
+                self.indicators.revise(float(revised['close'].iloc[-1]))
+            df = df[df.index > self.last_bar_time]
+        for bar_time, close in zip(df.index, df['close'].to_numpy(dtype=float)):
+            if self.model is not None and self.label_features is not None and self.last_bar_time is not None:
+                # The previous last bar is final now: learn its direction from the features of the bar before it
+                if self.model.trained_until is None or self.last_bar_time > self.model.trained_until:
+                    label = int(self.indicators.prev_close > self.label_close)
+                    self.model.partial_fit([self.label_features], [label], trained_until=self.last_bar_time)
+            self.label_features = list(self.indicators.values()) if self.indicators.ready else None
+            self.label_close = self.indicators.prev_close
+            self.indicators.update(close)  # O(1) per new bar
+            self.last_bar_time = bar_time
+        if len(df) and self.model is not None and not self.is_backtesting:
+            # Persist the updated model so a restart resumes from here
+            self.model_store.checkpoint(self.symbol, self.features, self.model, self.model_params)
+        return self.indicators.values()
+
+    @timed("train_model")
     def train_model(self, df):
-        """Train a simple machine learning model using Scikit-learn."""
+        """Load, warm-start or train the classifier, caching it in the model store."""
         if df is not None:
-            # Define features and target
-            df['Target'] = np.where(df['Price_Change'] > 0, 1, 0)  # 1 if price increases, 0 otherwise
-            features = ['SMA', 'EMA', 'Price_Change']
-            X = df[features]
-            y = df['Target']
+            # Label each bar with whether the next bar closes higher. The last bar may still be forming,
+            # so only bars whose next bar is final are labelled; each label is read at that next bar.
+            df['Target'] = (df['close'].shift(-1) > df['close']).astype(int)
+            labelled = df.iloc[:-2]
+            label_times = df.index[1:-1]
+            X = labelled[self.features]
+            y = labelled['Target']
+            key = self.model_store.key(self.features, df, self.model_params)
 
-            # Split data into training and testing sets
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+            # Same symbol, features and training rows as a cached model: reuse it as is
+            model = self.model_store.load(self.symbol, key)
+            if model is not None:
+                logger.info(f"Loaded cached model for {self.symbol}")
+                return model
 
-            # Train a logistic regression model
-            model = LogisticRegression()
-            model.fit(X_train, y_train)
+            # Otherwise warm-start the latest model (loaded at launch when possible) with only the bars it has not seen.
+            # Backtests always fit from their own rows: the store may hold models fitted live or on later data.
+            model = None
+            if not self.is_backtesting:
+                model = self.startup.result("model") if self.startup is not None else None
+                if model is None:
+                    model = self.model_store.latest(self.symbol, self.features, self.model_params)
+            if model is not None and model.trained_until is not None:
+                new = label_times > model.trained_until
+                if new.any():
+                    model.partial_fit(X[new], y[new], trained_until=label_times[-1])
+                logger.info(f"Warm-started model for {self.symbol} with {int(new.sum())} new bars")
+            else:
+                if len(y) < 10 or y.nunique() < 2:
+                    logger.warning(f"Not enough history to train a model for {self.symbol} ({len(y)} rows)")
+                    return None
+                from sklearn.metrics import accuracy_score
+                from sklearn.model_selection import train_test_split
 
-            # Evaluate the model
-            y_pred = model.predict(X_test)
-            accuracy = accuracy_score(y_test, y_pred)
-            logger.info(f"Model trained with accuracy: {accuracy:.2f}")
+                # Hold out the most recent bars so the accuracy is measured on data after the training rows
+                # (see walk_forward.py for a full out-of-sample evaluation)
+                X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
 
+                # Train an online logistic regression model
+                model = OnlineClassifier()
+                model.fit(X_train, y_train, trained_until=label_times[-1])
+
+                # Evaluate the model
+                y_pred = model.predict(X_test)
+                accuracy = accuracy_score(y_test, y_pred)
+                logger.info(f"Model trained with accuracy: {accuracy:.2f}")
+
+            if not self.is_backtesting:
+                self.model_store.save(self.symbol, key, model)  # Backtests leave the shared store untouched
             return model
         return None
 
+    def start_model(self, df):
+        """Get the model ready: inline while backtesting, otherwise in the background."""
+        if self.is_backtesting:
+            self.model = self.train_model(df)
+        elif self.model_future is None:
+            self.model_future = self.model_executor.submit(self.train_model, df.copy())
+
+    def poll_model(self):
+        """Pick up a finished background training and refresh the prediction."""
+        if self.model is None and self.model_future is not None and self.model_future.done():
+            try:
+                self.model = self.model_future.result()
+            except Exception as e:
+                logger.error(f"Model training failed: {e}")
+            self.model_future = None
+        if self.model is not None and self.indicators is not None and self.indicators.ready:
+            self.prediction = self.model.predict_proba_one(self.indicators.values())
+        return self.prediction
+
+    def evaluate_price(self, last_price):
+        """Apply the swing high entry and the stop loss / take profit exits to a new price."""
+        self.data.append(last_price)  # Append the last price to the price buffer
+
+        # Check if we have enough data points to make a decision
+        if len(self.data) > self.pattern_lookback:
+            temp = self.data.last(self.pattern_lookback)  # View of the last three data points
+
+            # Check for a swing high pattern
+            if temp[-1] > temp[1] > temp[0]:
+                logger.info(f"Swing High pattern detected for {self.symbol}. Last 3 prices: {temp}")
+                model_allows = not self.use_model_filter or (self.prediction is not None and self.prediction >= 0.5)
+                if self.ledger.position(self.symbol) <= 0 and model_allows:  # Check if we don't already have a position
+                    # Place a buy order
+                    order = self.create_order(self.symbol, quantity=self.quantity, side="buy")
+                    self.submit_order(order)
+                    self.order_number += 1
+                    self.ledger.submitted(self.symbol, "buy", self.quantity, temp[-1])  # Entry price and exit levels
+                    logger.info(f"Buy order placed for {self.symbol} at {self.entry_price}. Order number: {self.order_number}")
+
+        # Check if an open position has hit its stop loss or take profit level
+        self.ledger.mark(self.symbol, last_price)
+        if self.ledger.exit_hit(self.symbol, self.data[-1]):
+            self.sell_all()  # Sell all positions
+            self.order_number = 0  # Reset the order number
+            self.ledger.close(self.symbol)  # Reset the entry price
+            logger.info(f"Position closed for {self.symbol} at {self.data[-1]}. Order number reset.")
+
+    @property
+    def entry_price(self):
+        """Entry price of the open position in `symbol`, or None while flat."""
+        return self.ledger.entry_price(self.symbol)
+
+    @entry_price.setter
+    def entry_price(self, price):
+        """Book an entry price (and its exit levels) for `symbol` in the ledger; None clears it."""
+        self.ledger.set_entry(self.symbol, price)
+
+    def sync_ledger(self):
+        """Seed the ledger from the broker once, then reconcile it in the background when trading live."""
+        if self.reconciler is not None:
+            return
+        interval = self.parameters.get("reconcile_every", 60)
+        self.reconciler = Reconciler(self.ledger, self.broker_snapshot, interval or 60)
+        self.reconciler.reconcile()  # Adopts positions opened before a restart
+        if not self.is_backtesting and interval:
+            self.reconciler.start()  # Fills keep the ledger current; this only catches what they miss
+
+    def broker_snapshot(self):
+        """Broker positions and, when live, open orders for the ledger reconciler."""
+        if self.is_backtesting:
+            return self.get_positions(), None  # Backtest fills are always reported, so pending orders are exact
+        return self.get_positions(), [order for order in self.get_orders() if order.is_active()]
+
+    def stream_symbols(self):
+        """Symbols to subscribe to in streaming mode."""
+        return [self.symbol]
+
+    def start_stream(self):
+        """Pull history once and get the indicators and model ready before the first streamed trade."""
+        with self.stream_lock:
+            self.sync_ledger()
+            if self.indicators is None:
+                df = self.calculate_indicators(self.fetch_historical_data(self.symbol, days=30))
+                if df is not None and self.model is None:
+                    self.start_model(df)
+
+    @timed("on_stream_event")
+    def on_stream_event(self, event):
+        """Update the indicators and make the order decision for one pushed trade."""
+        with self.stream_lock:
+            timestamp = event.timestamp
+            if timestamp.tz is not None:
+                timestamp = timestamp.tz_convert(MARKET_TIMEZONE)  # Alpaca prints are in UTC, which rolls over in the evening
+            day = timestamp.date()
+            if self.stream_day is not None and day > self.stream_day:
+                self.closed_out = False  # A new session started, so trading resumes
+                # The previous session's last trade is its daily close
+                if self.indicators is not None and (self.last_bar_time is None or self.stream_day > self.last_bar_time.date()):
+                    bar_time = pd.Timestamp(self.stream_day, tz=timestamp.tz)
+                    self.update_indicators(pd.DataFrame({"close": [self.stream_close]}, index=[bar_time]))
+            self.stream_day = day
+            self.stream_close = event.price
+            if self.closed_out:
+                return  # Positions were closed for the day; a late print must not reopen one overnight
+
+            self.poll_model()
+            self.evaluate_price(event.price)
+
+    def watchlist_prices(self):
+        """Fetch last prices for the whole watchlist in one broker call."""
+        last_prices = {symbol_of(asset): price for asset, price in (self.get_last_prices(self.symbols) or {}).items()}
+        return np.array([last_prices.get(symbol, np.nan) for symbol in self.symbols], dtype=float)
+
+    @timed("trade_watchlist")
+    def trade_watchlist(self):
+        """Evaluate the swing high and exit rules for every watchlist symbol at once."""
+        try:
+            # Positions come from the ledger, whose rows line up with the watchlist
+            self.sync_ledger()
+            prices = self.watchlist_prices()
+            self.prices.append(prices)
+            self.ledger.mark_all(prices)
+            held = self.ledger.held(len(self.symbols))
+            quantities = self.ledger.positions(len(self.symbols))
+
+            buys = np.zeros(len(self.symbols), dtype=bool)
+            if len(self.prices) > self.pattern_lookback:
+                temp = self.prices.last(self.pattern_lookback)  # View of the last three rows
+                buys = (temp[-1] > temp[1]) & (temp[1] > temp[0]) & ~held
+
+            # Stop loss and take profit levels, evaluated only for open positions
+            sells = self.ledger.exits(prices)
+
+            orders = []
+            for i in np.flatnonzero(buys):
+                orders.append(self.create_order(self.symbols[i], quantity=self.quantity, side="buy"))
+                self.ledger.submitted(self.symbols[i], "buy", self.quantity, prices[i])
+                logger.info(f"Swing High pattern detected for {self.symbols[i]}. Buy order placed at {prices[i]}.")
+            for i in np.flatnonzero(sells):
+                orders.append(self.create_order(self.symbols[i], quantity=quantities[i], side="sell"))
+                self.ledger.close(self.symbols[i])
+                logger.info(f"Position closed for {self.symbols[i]} at {prices[i]}.")
+
+            # One submission for every order of this iteration
+            if orders:
+                self.submit_orders(orders)
+                self.order_number += int(buys.sum())
+
+        except Exception as e:
+            logger.error(f"An error occurred during trading iteration: {e}")
+
+    @timed_iteration
+    @recorded_iteration
+    @reports_startup
     def on_trading_iteration(self):
         """Main trading logic that runs on each iteration."""
+        if self.symbols:
+            self.trade_watchlist()
+            return
+        self.sync_ledger()
+        if self.parameters.get("stream"):
+            # Decisions happen in on_stream_event as trades arrive; the iteration only keeps the stream alive
+            if self.stream_runner is None or not self.stream_runner.thread.is_alive():
+                self.stream_runner = StreamRunner(self, AlpacaStream(ALPACA_CONFIG)).start()
+            self.poll_model()
+            return
         try:
             # Fetch historical data
             df = self.fetch_historical_data(self.symbol, days=30)
             if df is not None:
-                # Calculate technical indicators
-                df = self.calculate_indicators(df)
+                if self.indicators is None:
+                    # Calculate technical indicators over the full history once
+                    df = self.calculate_indicators(df)
+
+                    # Train the model if not already trained
+                    if self.model is None:
+                        self.start_model(df)
+                else:
+                    # Only new bars are folded into the streaming state
+                    self.update_indicators(df)
 
-                # Train the model if not already trained
-                if self.model is None:
-                    self.model = self.train_model(df)
+                # Constant-time prediction from the streaming indicators, once the model is ready
+                self.poll_model()
 
                 # Get the last price for the symbol
                 last_price = self.get_last_price(self.symbol)
-                self.data.append(last_price)  # Append the last price to the data list
-
-                # Log the current position
-                position = self.get_position(self.symbol)
-                logger.info(f"Current Position for {self.symbol}: {position}")
-
-                # Check if we have enough data points to make a decision
-                if len(self.data) > 3:
-                    temp = self.data[-3:]  # Get the last three data points
-
-                    # Check for a swing high pattern
-                    if temp[-1] > temp[1] > temp[0]:
-                        logger.info(f"Swing High pattern detected for {self.symbol}. Last 3 prices: {temp}")
-                        if not self.get_position(self.symbol):  # Check if we don't already have a position
-                            # Place a buy order
-                            order = self.create_order(self.symbol, quantity=self.quantity, side="buy")
-                            self.submit_order(order)
-                            self.order_number += 1
-                            self.entry_price = temp[-1]  # Set the entry price
-                            logger.info(f"Buy order placed for {self.symbol} at {self.entry_price}. Order number: {self.order_number}")
-
-                # Check if we have an open position
-                if self.get_position(self.symbol):
-                    # Calculate stop loss and take profit levels
-                    stop_loss_price = self.entry_price * (1 - self.stop_loss_percent / 100)
-                    take_profit_price = self.entry_price * (1 + self.take_profit_percent / 100)
-
-                    # Check if the current price has hit the stop loss or take profit levels
-                    if self.data[-1] <= stop_loss_price or self.data[-1] >= take_profit_price:
-                        self.sell_all()  # Sell all positions
-                        self.order_number = 0  # Reset the order number
-                        self.entry_price = None  # Reset the entry price
-                        logger.info(f"Position closed for {self.symbol} at {self.data[-1]}. Order number reset.")
+
+                # Log the current position, from the ledger rather than the broker
+                logger.info(f"Current Position for {self.symbol}: {self.ledger.position(self.symbol)}")
+
+                self.evaluate_price(last_price)
 
         except Exception as e:
             logger.error(f"An error occurred during trading iteration: {e}")
 
+    @timed("before_market_closes")
     def before_market_closes(self):
         """Ensure all positions are closed before the market closes."""
+        self.stream_lock.acquire()  # No streamed trade is handled while positions are being closed
         try:
+            self.closed_out = True  # Later streamed trades today are ignored
+            if self.symbols:
+                if self.get_positions():
+                    self.sell_all()  # Sell all positions across the watchlist
+                    self.order_number = 0  # Reset the order number
+                    self.ledger.close_all()  # Reset the entry prices
+                    logger.info(f"Market closing soon. Positions closed for {self.symbols}.")
+                return
             if self.get_position(self.symbol):
                 self.sell_all()  # Sell all positions
                 self.order_number = 0  # Reset the order number
-                self.entry_price = None  # Reset the entry price
+                self.ledger.close(self.symbol)  # Reset the entry price
                 logger.info(f"Market closing soon. Position closed for {self.symbol}.")
         except Exception as e:
             logger.error(f"An error occurred before market close: {e}")
+        finally:
+            self.stream_lock.release()
+            if not self.is_backtesting:
+                self.metrics.export()  # Write the day's latency metrics; a backtest writes them once at the end
+
+    def on_strategy_end(self):
+        """Stop the stream and the ledger reconciler, and write the final latency metrics."""
+        if self.stream_runner is not None:
+            self.stream_runner.stop()
+        if self.reconciler is not None:
+            self.reconciler.stop()
+        if self.results is not None:
+            logger.info(f"Run summary: {self.results.close()}")
+        path = self.metrics.export()
+        logger.info(f"Latency metrics written to {path}")
+
+    def on_filled_order(self, position, order, price, quantity, multiplier):
+        """Book each fill in the ledger and record it to the results sink."""
+        self.ledger.fill(symbol_of(order.asset), order.side, quantity, price)
+        if self.results is not None:
+            self.results.record_trade(self.get_datetime(), symbol_of(order.asset), order.side, quantity, price)
 
     def on_error(self, error):
         """Handle any errors that occur during trading."""
         logger.error(f"Error occurred: {error}")
 
+def history_span(days):
+    """Calendar date range wide enough to hold `days` trading bars, ending today."""
+    end = date.today()
+    return end - timedelta(days=int(days * 1.5) + 7), end
+
+def start_up(fetch, parameters=None, bar_store=None, model_store=None):
+    """Download history into the bar cache and load the latest model in the background while the broker connects."""
+    parameters = {**SwingHigh.parameters, **(parameters or {})}
+    symbol = parameters["symbol"]
+    startup = Startup()
+    startup.submit("history", (bar_store or BarStore()).get_bars, symbol, *history_span(30), fetch)
+    startup.submit("model", (model_store or ModelStore()).latest, symbol, SwingHigh.features,
+                   {"window_size": parameters["window_size"]})
+    return startup
+
 if __name__ == "__main__":
     try:
+        # One bar source for the launch download and the strategy's later cache fills
+        fetch = alpaca_fetcher(ALPACA_CONFIG)
+        startup = start_up(fetch)
+
+        # Live-only imports, loaded while the startup steps run
+        from lumibot.brokers import Alpaca
+        from lumibot.traders import Trader
+
         # Initialize the broker and strategy
         broker = Alpaca(ALPACA_CONFIG)
         strategy = SwingHigh(broker=broker)
+        strategy.startup = startup
+        strategy.bar_fetcher = fetch
         trader = Trader()
         trader.add_strategy(strategy)
         logger.info("Starting trader...")
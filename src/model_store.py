@@ -0,0 +1,144 @@
+import glob
+import hashlib
+import logging
+import os
+import tempfile
+import joblib
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Default location of the cache, next to the bar store
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "models")
+
+
+class OnlineClassifier:
+    """
+    Logistic regression trained by SGD so it can be updated one bar at a time.
+
+    Features are standardized with statistics frozen at the initial fit, so later
+    partial_fit calls keep the coefficients on the same scale.
+    """
+
+    def __init__(self, random_state=42):
+        """Initialize an untrained classifier."""
+        # Imported here so scikit-learn is only loaded once a model is actually built or unpickled
+        from sklearn.linear_model import SGDClassifier
+        from sklearn.preprocessing import StandardScaler
+
+        self.scaler = StandardScaler()
+        self.classifier = SGDClassifier(loss="log_loss", random_state=random_state)
+        self.trained_until = None  # Timestamp of the last bar the model has learned from
+
+    def fit(self, X, y, trained_until=None):
+        """Fit the scaler and the classifier from scratch."""
+        X = np.asarray(X, dtype=float)
+        self.classifier.fit(self.scaler.fit_transform(X), np.asarray(y))
+        self.trained_until = trained_until
+        return self
+
+    def partial_fit(self, X, y, trained_until=None):
+        """Update the classifier with new rows without refitting."""
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        self.classifier.partial_fit(self.scaler.transform(X), np.atleast_1d(y), classes=np.array([0, 1]))
+        if trained_until is not None:
+            self.trained_until = trained_until
+        return self
+
+    def predict(self, X):
+        """Predict class labels for a batch of rows."""
+        return self.classifier.predict(self.scaler.transform(np.asarray(X, dtype=float)))
+
+    def predict_proba(self, X):
+        """Probability of the positive class for a batch of rows."""
+        return self.classifier.predict_proba(self.scaler.transform(np.asarray(X, dtype=float)))[:, 1]
+
+    def predict_proba_one(self, x):
+        """Probability of the positive class for one row, computed directly with NumPy."""
+        z = (np.asarray(x, dtype=float) - self.scaler.mean_) / self.scaler.scale_
+        score = z @ self.classifier.coef_[0] + self.classifier.intercept_[0]
+        return 1.0 / (1.0 + np.exp(-score))
+
+
+class ModelStore:
+    """
+    On-disk cache of trained models keyed by symbol, feature set and training data hash.
+
+    Layout: `<root>/<SYMBOL>/<feature_hash>_<data_hash>.joblib`, plus the last few incremental
+    checkpoints as `<feature_hash>_t<timestamp>.joblib`. The feature hash also covers the
+    parameters the features are computed with (e.g. the window size), so models built from
+    differently parameterized features never stand in for each other.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT):
+        """Initialize the store rooted at the given directory."""
+        self.root = root
+
+    @staticmethod
+    def feature_hash(features, params=None):
+        """Short hash identifying a feature set and the parameters it is computed with."""
+        text = ",".join(features) + "".join(f";{name}={value}" for name, value in sorted((params or {}).items()))
+        return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+    @staticmethod
+    def data_hash(df, features):
+        """Short hash identifying the training rows (index range and values)."""
+        digest = hashlib.sha1()
+        digest.update(pd.util.hash_pandas_object(df[features], index=True).to_numpy().tobytes())
+        return digest.hexdigest()[:12]
+
+    def key(self, features, df, params=None):
+        """Cache key for a model trained on `df[features]` computed with `params`."""
+        return f"{self.feature_hash(features, params)}_{self.data_hash(df, features)}"
+
+    def _path(self, symbol, key):
+        """Return the file path of one cached model."""
+        return os.path.join(self.root, symbol.upper(), f"{key}.joblib")
+
+    def load(self, symbol, key):
+        """Load the model cached under exactly this key, or None."""
+        path = self._path(symbol, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            return joblib.load(path)
+        except Exception as e:
+            logger.error(f"Unable to load cached model {path}: {e}")
+            return None
+
+    def latest(self, symbol, features, params=None):
+        """Load the most recently saved model for this symbol, feature set and parameters, or None."""
+        pattern = os.path.join(self.root, symbol.upper(), f"{self.feature_hash(features, params)}_*.joblib")
+        paths = sorted(glob.glob(pattern), key=os.path.getmtime)
+        return self.load(symbol, os.path.basename(paths[-1])[:-len(".joblib")]) if paths else None
+
+    def checkpoint(self, symbol, features, model, params=None, keep=3):
+        """Persist an incrementally updated model under a key derived from its last bar, keeping the last `keep` checkpoints."""
+        prefix = f"{self.feature_hash(features, params)}_t"
+        self.save(symbol, f"{prefix}{pd.Timestamp(model.trained_until).value}", model)
+
+        # One checkpoint per bar would grow without bound; drop all but the newest few
+        paths = glob.glob(os.path.join(self.root, symbol.upper(), f"{prefix}*.joblib"))
+        paths.sort(key=lambda path: int(os.path.basename(path)[len(prefix):-len(".joblib")]))
+        for path in paths[:-keep]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Already pruned by another process
+
+    def save(self, symbol, key, model):
+        """Persist a model under the given key."""
+        path = self._path(symbol, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A temporary file unique to this writer, so concurrent saves never write into the same file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                joblib.dump(model, f)
+            os.replace(tmp_path, path)  # Atomic, so a crash never leaves a truncated model
+        except Exception:
+            os.remove(tmp_path)
+            raise
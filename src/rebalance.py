@@ -0,0 +1,39 @@
+import numpy as np
+
+
+def compute_rebalance(quantities, prices, target_weights, cash, drift_threshold=0.05):
+    """
+    Compute the net share changes that bring drifted holdings back to their targets.
+
+    Only names whose absolute weight drift exceeds `drift_threshold` are traded, each gets a
+    single net order (never both a buy and a sell), and buys are scaled down if the cash
+    plus sell proceeds cannot cover them. Names without a valid price are left untouched.
+    Returns an integer array of share deltas: positive to buy, negative to sell.
+    """
+    quantities = np.asarray(quantities, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    target_weights = np.asarray(target_weights, dtype=float)
+
+    priced = np.isfinite(prices) & (prices > 0)
+    safe_prices = np.where(priced, prices, 1.0)
+    values = np.where(priced, quantities * safe_prices, 0.0)
+    total = values.sum() + cash
+    if total <= 0:
+        return np.zeros(len(quantities), dtype=int)
+
+    drift = values / total - target_weights
+    trade = priced & (np.abs(drift) > drift_threshold)
+
+    # Whole-share targets for the names that drifted too far
+    target_quantities = np.floor(total * target_weights / safe_prices)
+    deltas = np.where(trade, target_quantities - quantities, 0.0)
+
+    # Make sure the buys are funded by the cash plus what the sells release
+    sells = np.minimum(deltas, 0.0)
+    buys = np.maximum(deltas, 0.0)
+    available = cash - (sells * safe_prices).sum()
+    cost = (buys * safe_prices).sum()
+    if cost > available:
+        scale = max(available, 0.0) / cost
+        buys = np.floor(buys * scale)
+    return (sells + buys).astype(int)
@@ -0,0 +1,382 @@
+from bar_store import BarStore, bars_to_frame
+from datetime import datetime
+from instrumentation import parse_sleeptime
+from ledger import symbol_of
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# How intraday bars are rolled up when a strategy asks for daily history
+DAILY_AGGREGATION = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+
+
+class ReplayAsset:
+    """Minimal asset carrying a ticker symbol."""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def __repr__(self):
+        return self.symbol
+
+
+class ReplayPosition:
+    """Open position held by the replay broker."""
+
+    def __init__(self, symbol, quantity=0.0, avg_fill_price=0.0):
+        self.asset = ReplayAsset(symbol)
+        self.quantity = quantity
+        self.avg_fill_price = avg_fill_price
+
+    def __repr__(self):
+        return f"{self.quantity} {self.asset.symbol} @ {self.avg_fill_price:.4f}"
+
+
+class ReplayOrder:
+    """Market order submitted to the replay broker."""
+
+    def __init__(self, symbol, quantity, side):
+        self.asset = ReplayAsset(symbol)
+        self.quantity = float(quantity)
+        self.side = side
+        self.status = "new"
+        self.submitted_at = None
+        self.filled_at = None
+        self.fill_price = None
+
+    def __repr__(self):
+        return f"{self.side} {self.quantity} {self.asset.symbol} ({self.status})"
+
+    def is_active(self):
+        """Whether the order can still be filled, like lumibot's Order.is_active()."""
+        return self.status in ("new", "submitted")
+
+
+class ReplayBars:
+    """Historical bars in the shape strategies expect from `get_historical_prices`."""
+
+    def __init__(self, df):
+        self.df = df
+
+    def __bool__(self):
+        return len(self.df) > 0
+
+
+class ReplayBroker:
+    """
+    Deterministic broker replaying recorded bars on a virtual clock.
+
+    Market orders fill at the latest close, adjusted by `slippage_bps` against the order,
+    once `fill_latency` seconds of virtual time have passed since submission.
+    `commission_per_share` is charged on every fill.
+    """
+
+    def __init__(self, bars, cash=100000.0, slippage_bps=0.0, fill_latency=0.0, commission_per_share=0.0):
+        """Initialize the broker from a {symbol: OHLCV DataFrame} mapping."""
+        self.bars = {symbol: df.sort_index() for symbol, df in bars.items()}
+        self._times = {symbol: df.index.asi8 for symbol, df in self.bars.items()}
+        self._closes = {symbol: df["close"].to_numpy(dtype=float) for symbol, df in self.bars.items()}
+        self.cash = float(cash)
+        self.slippage_bps = slippage_bps
+        self.fill_latency = fill_latency
+        self.commission_per_share = commission_per_share
+        self.positions = {}
+        self.pending = []
+        self.fills = []
+        self.on_fill = None  # Called with each filled order and its position, like lumibot's on_filled_order
+        self.now = None
+
+    def timeline(self):
+        """Sorted union of every bar timestamp."""
+        return pd.DatetimeIndex(sorted(set().union(*(df.index for df in self.bars.values()))))
+
+    def _bar_index(self, symbol):
+        """Index of the latest bar at or before the current time, or -1."""
+        return int(np.searchsorted(self._times[symbol], self.now.value, side="right")) - 1
+
+    def advance(self, now):
+        """Move the virtual clock and fill every order whose latency has elapsed."""
+        self.now = pd.Timestamp(now)
+        ready = [order for order in self.pending if (self.now - order.submitted_at).total_seconds() >= self.fill_latency]
+        for order in ready:
+            self.pending.remove(order)
+            self._fill(order)
+
+    def get_last_price(self, symbol):
+        """Latest close at or before the current time, or None."""
+        symbol = symbol_of(symbol)
+        if symbol not in self._times:
+            return None
+        i = self._bar_index(symbol)
+        return float(self._closes[symbol][i]) if i >= 0 else None
+
+    def get_last_prices(self, symbols):
+        """Latest closes for several symbols."""
+        return {symbol_of(symbol): self.get_last_price(symbol) for symbol in symbols}
+
+    def get_historical_prices(self, symbol, length, timestep="day", **kwargs):
+        """The last `length` bars at or before the current time."""
+        symbol = symbol_of(symbol)
+        if symbol not in self.bars:
+            return None
+        df = self.bars[symbol].iloc[:self._bar_index(symbol) + 1]
+        if timestep.startswith("day") and len(df) and df.index.normalize().has_duplicates:
+            # Intraday recording: roll up to daily bars, the current day ending at the current bar
+            df = df.groupby(df.index.normalize()).agg({k: v for k, v in DAILY_AGGREGATION.items() if k in df.columns})
+        return ReplayBars(df.tail(length).copy())
+
+    def get_position(self, symbol):
+        """Open position for a symbol, or None when flat."""
+        return self.positions.get(symbol_of(symbol))
+
+    def get_positions(self):
+        """Every open position."""
+        return list(self.positions.values())
+
+    def create_order(self, symbol, quantity, side, **kwargs):
+        """Build a market order."""
+        return ReplayOrder(symbol_of(symbol), quantity, side)
+
+    def submit_order(self, order):
+        """Queue an order; it fills immediately when there is no latency."""
+        order.submitted_at = self.now
+        order.status = "submitted"
+        if self.fill_latency <= 0:
+            self._fill(order)
+        else:
+            self.pending.append(order)
+        return order
+
+    def submit_orders(self, orders, **kwargs):
+        """Submit several orders."""
+        return [self.submit_order(order) for order in orders]
+
+    def sell_all(self, **kwargs):
+        """Cancel pending orders and sell every open position."""
+        self.pending = []
+        for position in list(self.positions.values()):
+            self.submit_order(ReplayOrder(position.asset.symbol, position.quantity, "sell"))
+
+    def get_portfolio_value(self):
+        """Cash plus every position marked at its latest close."""
+        value = self.cash
+        for symbol, position in self.positions.items():
+            price = self.get_last_price(symbol)
+            value += position.quantity * (price if price is not None else position.avg_fill_price)
+        return value
+
+    def _fill(self, order):
+        """Fill an order at the latest close plus slippage and update cash and positions."""
+        symbol = order.asset.symbol
+        price = self.get_last_price(symbol)
+        if price is None:
+            order.status = "canceled"
+            return
+        direction = 1 if order.side == "buy" else -1
+        price *= 1 + direction * self.slippage_bps / 10000
+
+        position = self.positions.get(symbol) or ReplayPosition(symbol)
+        if order.side == "sell":
+            order.quantity = min(order.quantity, position.quantity)  # No short selling
+        if order.quantity <= 0:
+            order.status = "canceled"
+            return
+
+        self.cash -= direction * order.quantity * price + order.quantity * self.commission_per_share
+        if direction > 0:
+            cost = position.avg_fill_price * position.quantity + price * order.quantity
+            position.quantity += order.quantity
+            position.avg_fill_price = cost / position.quantity
+        else:
+            position.quantity -= order.quantity
+        if position.quantity > 0:
+            self.positions[symbol] = position
+        else:
+            self.positions.pop(symbol, None)
+
+        order.status = "filled"
+        order.filled_at = self.now
+        order.fill_price = price
+        self.fills.append({"time": self.now, "symbol": symbol, "side": order.side, "quantity": order.quantity, "price": price})
+        if self.on_fill is not None:
+            self.on_fill(order, position)
+
+
+def replay_strategy_class(strategy_class):
+    """Subclass a strategy so every broker-facing call goes to its replay broker."""
+
+    class Replay(strategy_class):
+        first_iteration = None  # Plain attribute in place of lumibot's read-only property
+        sleeptime = None  # Plain attribute in place of lumibot's broker-bound property
+
+        @property
+        def is_backtesting(self):
+            return True  # Deterministic code paths: no wall-clock caches, inline model training
+
+        @property
+        def cash(self):
+            return self.replay_broker.cash
+
+        @property
+        def portfolio_value(self):
+            return self.replay_broker.get_portfolio_value()
+
+        def get_datetime(self, *args, **kwargs):
+            return self.replay_broker.now
+
+        def get_last_price(self, asset, *args, **kwargs):
+            return self.replay_broker.get_last_price(asset)
+
+        def get_last_prices(self, assets, *args, **kwargs):
+            return self.replay_broker.get_last_prices(assets)
+
+        def get_historical_prices(self, asset, length, timestep="day", *args, **kwargs):
+            return self.replay_broker.get_historical_prices(asset, length, timestep)
+
+        def get_position(self, asset, *args, **kwargs):
+            return self.replay_broker.get_position(asset)
+
+        def get_positions(self, *args, **kwargs):
+            return self.replay_broker.get_positions()
+
+        def get_portfolio_value(self):
+            return self.replay_broker.get_portfolio_value()
+
+        def create_order(self, asset, quantity, side, *args, **kwargs):
+            return self.replay_broker.create_order(asset, quantity, side)
+
+        def submit_order(self, order, *args, **kwargs):
+            return self.replay_broker.submit_order(order)
+
+        def submit_orders(self, orders, *args, **kwargs):
+            return self.replay_broker.submit_orders(orders)
+
+        def sell_all(self, *args, **kwargs):
+            return self.replay_broker.sell_all()
+
+    Replay.__name__ = strategy_class.__name__
+    Replay.__qualname__ = strategy_class.__qualname__
+    return Replay
+
+
+class ReplayResult:
+    """Outcome of a replay run."""
+
+    def __init__(self, strategy, fills, equity, iterations, wall_seconds, virtual_seconds):
+        self.strategy = strategy  # The strategy instance, for inspecting its state
+        self.fills = fills  # DataFrame with one row per fill
+        self.equity = equity  # Portfolio value after each iteration, indexed by virtual time
+        self.iterations = iterations
+        self.wall_seconds = wall_seconds
+        self.virtual_seconds = virtual_seconds
+
+    @property
+    def speedup(self):
+        """Virtual time replayed per second of wall time."""
+        return self.virtual_seconds / self.wall_seconds if self.wall_seconds else float("inf")
+
+
+class ReplayHarness:
+    """
+    Runs a strategy against a ReplayBroker in accelerated virtual time.
+
+    Iterations happen on bar timestamps at least `sleeptime` apart, with no real sleeping,
+    and `before_market_closes` runs after the last iteration of each calendar day.
+    Bars before `start` are available as history but are not iterated over.
+    """
+
+    def __init__(self, strategy_class, broker, parameters=None, start=None, end=None):
+        """Initialize the harness for one strategy class and broker."""
+        self.strategy_class = replay_strategy_class(strategy_class)
+        self.broker = broker
+        self.parameters = {**(getattr(strategy_class, "parameters", None) or {}), **(parameters or {})}
+        self.start = pd.Timestamp(start) if start is not None else None
+        self.end = pd.Timestamp(end) if end is not None else None
+
+    def create_strategy(self):
+        """Build and initialize a strategy instance wired to the replay broker."""
+        strategy = self.strategy_class.__new__(self.strategy_class)  # Skip the live broker wiring
+        strategy.replay_broker = self.broker
+        strategy.parameters = dict(self.parameters)
+        strategy.initialize()
+        self.broker.on_fill = lambda order, position: strategy.on_filled_order(
+            position, order, order.fill_price, order.quantity, 1)
+        return strategy
+
+    def ticks(self, sleeptime_s):
+        """Iteration times: bar timestamps inside the range, thinned to the sleeptime."""
+        timeline = self.broker.timeline()
+        if self.start is not None:
+            timeline = timeline[timeline >= self.start]
+        if self.end is not None:
+            timeline = timeline[timeline <= self.end]
+        ticks = []
+        for now in timeline:
+            if not ticks or (now - ticks[-1]).total_seconds() >= sleeptime_s:
+                ticks.append(now)
+        return ticks
+
+    def run(self, on_initialize=None):
+        """Replay every tick and return a ReplayResult."""
+        wall_start = time.perf_counter()
+        strategy = self.create_strategy()
+        if on_initialize is not None:
+            on_initialize(strategy)
+
+        ticks = self.ticks(parse_sleeptime(strategy.sleeptime))
+        equity = []
+        for i, now in enumerate(ticks):
+            self.broker.advance(now)
+            strategy.on_trading_iteration()
+            last_of_day = i == len(ticks) - 1 or ticks[i + 1].date() != now.date()
+            if last_of_day:
+                strategy.before_market_closes()
+                self.broker.advance(now)
+            equity.append(self.broker.get_portfolio_value())
+
+        if hasattr(strategy, "on_strategy_end"):
+            strategy.on_strategy_end()
+        wall_seconds = time.perf_counter() - wall_start
+        virtual_seconds = (ticks[-1] - ticks[0]).total_seconds() if len(ticks) > 1 else 0.0
+        fills = pd.DataFrame(self.broker.fills, columns=["time", "symbol", "side", "quantity", "price"])
+        logger.info(f"Replayed {len(ticks)} iterations ({virtual_seconds:.0f}s virtual) in {wall_seconds:.2f}s")
+        return ReplayResult(strategy, fills, pd.Series(equity, index=pd.DatetimeIndex(ticks), dtype=float),
+                            len(ticks), wall_seconds, virtual_seconds)
+
+
+def load_bar_files(paths):
+    """Load recorded bars from CSV or Parquet files named `<SYMBOL>.<ext>`, indexed by timestamp."""
+    bars = {}
+    for path in paths:
+        symbol, ext = os.path.splitext(os.path.basename(path))
+        df = pd.read_parquet(path) if ext == ".parquet" else pd.read_csv(path, index_col=0, parse_dates=True)
+        df.index = pd.DatetimeIndex(df.index)
+        bars[symbol.upper()] = df.rename(columns=str.lower)
+    return bars
+
+
+def load_bar_store(symbols, start, end, store=None, timestep="day"):
+    """Load recorded bars for several symbols from the local bar store."""
+    store = store or BarStore()
+    return {symbol: bars_to_frame(store.read(symbol, start, end, timestep)) for symbol in symbols}
+
+
+if __name__ == "__main__":
+    from lumibot_swing_high import SwingHigh
+
+    try:
+        # Replay 2022 from the local bar cache, using the first month as history only
+        bars = load_bar_store(["GOOG"], datetime(2022, 1, 1), datetime(2022, 12, 31))
+        broker = ReplayBroker(bars, slippage_bps=1.0, fill_latency=0.0)
+        harness = ReplayHarness(SwingHigh, broker, start=datetime(2022, 2, 1, tzinfo=bars["GOOG"].index.tz))
+        result = harness.run()
+        logger.info(f"{len(result.fills)} fills, final portfolio value {result.equity.iloc[-1]:.2f}, "
+                    f"{result.speedup:,.0f}x real time")
+    except Exception as e:
+        logger.error(f"An error occurred during replay: {e}")
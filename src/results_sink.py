@@ -0,0 +1,263 @@
+from datetime import datetime
+from functools import wraps
+from instrumentation import parse_sleeptime
+import json
+import logging
+import math
+import os
+import pandas as pd
+import pyarrow as pa
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Default location of the results, next to the bar and model caches
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "results")
+RUNS_FILE = "runs.jsonl"  # One summary line per finished run
+TRADING_DAYS = 252
+SESSION_SECONDS = 6.5 * 3600
+
+SERIES_SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("ns", tz="UTC")),
+    ("portfolio_value", pa.float64()),
+    ("cash", pa.float64()),
+    ("return", pa.float64()),
+])
+TRADES_SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("ns", tz="UTC")),
+    ("symbol", pa.string()),
+    ("side", pa.string()),
+    ("quantity", pa.float64()),
+    ("price", pa.float64()),
+])
+
+
+class RunMetrics:
+    """Summary metrics updated in O(1) per iteration and per trade."""
+
+    def __init__(self, periods_per_year=TRADING_DAYS):
+        """Initialize empty metrics; `periods_per_year` annualizes the Sharpe ratio."""
+        self.periods_per_year = periods_per_year
+        self.periods = 0
+        self.first_value = None
+        self.last_value = None
+        self.peak = None
+        self.max_drawdown = 0.0
+        self.return_count = 0
+        self.return_mean = 0.0
+        self.return_m2 = 0.0  # Welford sum of squared deviations
+        self.exposure_sum = 0.0
+        self.value_sum = 0.0
+        self.traded_notional = 0.0
+        self.trades = 0
+
+    def update(self, portfolio_value, cash):
+        """Fold in one iteration's portfolio value and cash; returns the period return or NaN."""
+        period_return = math.nan
+        if self.last_value:
+            period_return = portfolio_value / self.last_value - 1
+            self.return_count += 1
+            delta = period_return - self.return_mean
+            self.return_mean += delta / self.return_count
+            self.return_m2 += delta * (period_return - self.return_mean)
+        if self.first_value is None:
+            self.first_value = portfolio_value
+        self.last_value = portfolio_value
+
+        self.peak = portfolio_value if self.peak is None else max(self.peak, portfolio_value)
+        if self.peak > 0:
+            self.max_drawdown = min(self.max_drawdown, portfolio_value / self.peak - 1)
+        if portfolio_value > 0:
+            self.exposure_sum += (portfolio_value - cash) / portfolio_value  # Fraction of the portfolio invested
+        self.value_sum += portfolio_value
+        self.periods += 1
+        return period_return
+
+    def record_trade(self, quantity, price):
+        """Fold in one fill."""
+        self.traded_notional += abs(quantity * price)
+        self.trades += 1
+
+    def summary(self):
+        """Return total return, Sharpe, max drawdown, exposure, turnover and trade count."""
+        volatility = math.sqrt(self.return_m2 / (self.return_count - 1)) if self.return_count > 1 else 0.0
+        average_value = self.value_sum / self.periods if self.periods else 0.0
+        return {
+            "periods": self.periods,
+            "total_return": self.last_value / self.first_value - 1 if self.first_value else None,
+            "sharpe": self.return_mean / volatility * math.sqrt(self.periods_per_year) if volatility else None,
+            "max_drawdown": self.max_drawdown,
+            "exposure": self.exposure_sum / self.periods if self.periods else None,
+            "turnover": self.traded_notional / average_value if average_value else None,
+            "trades": self.trades,
+        }
+
+
+class ResultsSink:
+    """
+    Streams a run's portfolio series and trades to append-only Arrow files as it runs.
+
+    Layout: `<root>/<run_id>.arrow` (portfolio value, cash, returns), `<root>/<run_id>_trades.arrow`
+    and one summary line per run in `<root>/runs.jsonl`. Rows are buffered and written in
+    record batches of `batch_size`, so memory stays flat however long the run is.
+    """
+
+    def __init__(self, run_id, root=DEFAULT_ROOT, parameters=None, periods_per_year=TRADING_DAYS, batch_size=1024):
+        """Initialize a sink for one run."""
+        self.run_id = run_id
+        self.root = root
+        self.parameters = parameters or {}
+        self.batch_size = batch_size
+        self.metrics = RunMetrics(periods_per_year)
+        self.series = {name: [] for name in SERIES_SCHEMA.names}
+        self.trades = {name: [] for name in TRADES_SCHEMA.names}
+        self.writers = {}
+        self.closed = False
+
+    @classmethod
+    def for_strategy(cls, strategy, root=None):
+        """Sink named after the strategy, the current time and the process, annualized by its sleeptime."""
+        run_id = strategy.parameters.get("run_id") or f"{type(strategy).__name__}_{datetime.now():%Y-%m-%d_%H-%M-%S_%f}_{os.getpid()}"
+        root = root or strategy.parameters.get("results_root") or DEFAULT_ROOT
+        return cls(run_id, root, parameters=strategy.parameters, periods_per_year=periods_per_year(strategy.sleeptime))
+
+    def path(self, kind=""):
+        """File path of the series (or `_trades`) file."""
+        return os.path.join(self.root, f"{self.run_id}{kind}.arrow")
+
+    def record(self, timestamp, portfolio_value, cash):
+        """Append one iteration's portfolio value and cash."""
+        portfolio_value = float(portfolio_value)
+        cash = float(cash)
+        period_return = self.metrics.update(portfolio_value, cash)
+        self._append(self.series, (timestamp, portfolio_value, cash, period_return), "", SERIES_SCHEMA)
+
+    def record_trade(self, timestamp, symbol, side, quantity, price):
+        """Append one fill."""
+        self.metrics.record_trade(float(quantity), float(price))
+        self._append(self.trades, (timestamp, symbol, str(side), float(quantity), float(price)), "_trades", TRADES_SCHEMA)
+
+    def _append(self, columns, row, kind, schema):
+        for name, value in zip(schema.names, row):
+            columns[name].append(value)
+        if len(columns[schema.names[0]]) >= self.batch_size:
+            self._flush(columns, kind, schema)
+
+    def _flush(self, columns, kind, schema):
+        """Write buffered rows as one record batch and clear the buffer."""
+        if not columns[schema.names[0]]:
+            return
+        writer = self.writers.get(kind)
+        if writer is None:
+            os.makedirs(self.root, exist_ok=True)
+            writer = self.writers[kind] = pa.ipc.new_stream(self.path(kind), schema)
+        timestamps = pd.to_datetime(pd.Series(columns["timestamp"]), utc=True)
+        arrays = [pa.array(timestamps, type=schema.field("timestamp").type)]
+        arrays += [pa.array(columns[name], type=schema.field(name).type) for name in schema.names[1:]]
+        writer.write_batch(pa.record_batch(arrays, schema=schema))
+        for values in columns.values():
+            values.clear()
+
+    def flush(self):
+        """Write every buffered row."""
+        self._flush(self.series, "", SERIES_SCHEMA)
+        self._flush(self.trades, "_trades", TRADES_SCHEMA)
+
+    def close(self):
+        """Flush, close the files and append the run's summary to runs.jsonl; returns the summary."""
+        if self.closed:
+            return None
+        self.flush()
+        for writer in self.writers.values():
+            writer.close()
+        self.closed = True
+        summary = {"run_id": self.run_id, "finished": datetime.now().isoformat(), **self.metrics.summary(),
+                   "parameters": {key: value for key, value in self.parameters.items() if _is_plain(value)}}
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, RUNS_FILE), "a") as f:
+            f.write(json.dumps(summary) + "\n")  # A single append per run, safe from parallel sweep workers
+        return summary
+
+
+def _is_plain(value):
+    """Whether a parameter value can be stored in the JSON summary."""
+    return value is None or isinstance(value, (str, int, float, bool)) or (
+        isinstance(value, (list, tuple)) and all(isinstance(item, (str, int, float, bool)) for item in value))
+
+
+def periods_per_year(sleeptime):
+    """Number of trading iterations in a year for a lumibot sleeptime."""
+    seconds = parse_sleeptime(sleeptime)
+    return TRADING_DAYS if seconds >= SESSION_SECONDS else TRADING_DAYS * SESSION_SECONDS / seconds
+
+
+def load_runs(root=DEFAULT_ROOT):
+    """Every run's summary as one DataFrame, with parameters flattened into `parameters.<name>` columns."""
+    path = os.path.join(root, RUNS_FILE)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    with open(path) as f:
+        return pd.json_normalize([json.loads(line) for line in f if line.strip()])
+
+
+def read_series(run_id, root=DEFAULT_ROOT, trades=False):
+    """Read back a run's portfolio series (or trades) as a DataFrame."""
+    path = os.path.join(root, f"{run_id}{'_trades' if trades else ''}.arrow")
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=(TRADES_SCHEMA if trades else SERIES_SCHEMA).names)
+    with pa.ipc.open_stream(path) as reader:
+        return reader.read_all().to_pandas()
+
+
+def write_report(run_id, root=DEFAULT_ROOT, path=None, tearsheet=True):
+    """
+    Build the HTML report of one run on demand.
+
+    With `tearsheet`, the full quantstats tearsheet lumibot produces is written when quantstats
+    is installed; otherwise a light report with the summary, series and trades tables.
+    """
+    path = path or os.path.join(root, f"{run_id}_tearsheet.html")
+    series = read_series(run_id, root).set_index("timestamp")
+    qs = _quantstats() if tearsheet else None
+    if qs is not None:
+        returns = series["return"].dropna()
+        returns.index = returns.index.tz_localize(None)
+        qs.reports.html(returns, output=path, title=run_id)
+        return path
+
+    summary = load_runs(root)
+    summary = summary[summary["run_id"] == run_id].T if len(summary) else pd.DataFrame()
+    with open(path, "w") as f:
+        f.write(f"<html><head><title>{run_id}</title></head><body><h1>{run_id}</h1>")
+        f.write(summary.to_html(header=False))
+        f.write(series.to_html())
+        f.write(read_series(run_id, root, trades=True).to_html(index=False))
+        f.write("</body></html>")
+    return path
+
+
+def _quantstats():
+    """The quantstats module lumibot uses for tearsheets, or None when it is not installed."""
+    for name in ("quantstats_lumi", "quantstats"):
+        try:
+            return __import__(name)
+        except ImportError:
+            continue
+    return None
+
+
+def recorded_iteration(fn):
+    """Decorator recording portfolio value and cash to the strategy's `results` sink after each iteration."""
+    @wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return fn(self, *args, **kwargs)
+        finally:
+            sink = getattr(self, "results", None)
+            if sink is not None:
+                try:
+                    sink.record(self.get_datetime(), self.portfolio_value, self.cash)
+                except Exception as e:
+                    logger.error(f"Unable to record results: {e}")
+    return wrapper
@@ -0,0 +1,64 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity, array-backed buffer holding the most recent values of a series.
+
+    Every value is written twice, `capacity` slots apart, so the retained window is always
+    one contiguous slice of the backing array and can be returned as a view without copying.
+    With `width` set, each value is a row of `width` entries (one per symbol).
+    """
+
+    def __init__(self, capacity, width=None, dtype=float):
+        """Allocate a buffer that keeps the last `capacity` values (or rows)."""
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.width = width
+        shape = (2 * capacity,) if width is None else (2 * capacity, width)
+        self._buffer = np.full(shape, np.nan, dtype=dtype)
+        self._pos = 0  # Slot the next value is written to, in [0, capacity)
+        self.count = 0  # Total number of values appended since creation
+
+    def append(self, value):
+        """Add a value (or row), overwriting the oldest one once the buffer is full."""
+        if self.width is None:
+            value = np.nan if value is None else value
+        else:
+            value = np.array([np.nan if v is None else v for v in value], dtype=float)
+        self._buffer[self._pos] = value
+        self._buffer[self._pos + self.capacity] = value
+        self._pos = (self._pos + 1) % self.capacity
+        self.count += 1
+
+    def view(self):
+        """Return a read-only view of the retained values, oldest first."""
+        size = len(self)
+        end = self._pos + self.capacity
+        window = self._buffer[end - size:end]
+        window.flags.writeable = False
+        return window
+
+    def last(self, n):
+        """Return a view of the last `n` retained values."""
+        if n > len(self):
+            raise ValueError(f"only {len(self)} values are available")
+        return self.view()[len(self) - n:]
+
+    def clear(self):
+        """Drop every retained value."""
+        self._pos = 0
+        self.count = 0
+
+    def __len__(self):
+        """Number of values currently retained."""
+        return min(self.count, self.capacity)
+
+    def __getitem__(self, key):
+        """Index or slice the retained values like a list, returning views for slices."""
+        return self.view()[key]
+
+    def __iter__(self):
+        """Iterate over the retained values, oldest first."""
+        return iter(self.view())
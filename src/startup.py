@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+import logging
+import os
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def process_start_time():
+    """Wall-clock time the current process was started, or now if it cannot be determined."""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).create_time()
+    except Exception:
+        return time.time()
+
+
+class Startup:
+    """
+    Runs independent startup steps (broker connection, history download, model loading)
+    concurrently and reports the time from process start to the end of the first iteration.
+    """
+
+    def __init__(self, max_workers=4):
+        """Initialize the tracker; the clock starts when the process did, so imports are included."""
+        self.started_at = process_start_time()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+        self.futures = {}
+        self.durations = {}  # Seconds each step took, by name
+        self.time_to_first_iteration = None
+
+    def elapsed(self):
+        """Seconds since the process started."""
+        return time.time() - self.started_at
+
+    def submit(self, name, fn, *args, **kwargs):
+        """Start a step in the background."""
+        def step():
+            begin = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.durations[name] = time.perf_counter() - begin
+
+        self.futures[name] = self.executor.submit(step)
+        return self.futures[name]
+
+    def result(self, name, default=None, timeout=None):
+        """Wait for a step and return its result, or `default` if it was not started or failed."""
+        future = self.futures.get(name)
+        if future is None:
+            return default
+        try:
+            return future.result(timeout)
+        except Exception as e:
+            logger.error(f"Startup step {name} failed: {e}")
+            return default
+
+    def first_iteration_done(self, metrics=None):
+        """Report time-to-first-iteration once, to the log and to the strategy's latency metrics."""
+        if self.time_to_first_iteration is not None:
+            return
+        self.time_to_first_iteration = self.elapsed()
+        steps = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.durations.items())
+        logger.info(f"Time to first iteration: {self.time_to_first_iteration:.2f}s (overlapped steps: {steps or 'none'})")
+        if metrics is not None and metrics.enabled:
+            metrics.record("startup.time_to_first_iteration", int(self.time_to_first_iteration * 1e9))
+            for name, seconds in self.durations.items():
+                metrics.record(f"startup.{name}", int(seconds * 1e9))
+        self.executor.shutdown(wait=False)
+
+
+def reports_startup(fn):
+    """Decorator reporting time-to-first-iteration after the strategy's first `on_trading_iteration`."""
+    @wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return fn(self, *args, **kwargs)
+        finally:
+            startup = getattr(self, "startup", None)
+            if startup is not None and startup.time_to_first_iteration is None:
+                startup.first_iteration_done(getattr(self, "metrics", None))
+    return wrapper
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import threading
+import time
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class StreamEvent:
+    """One trade print or closed bar pushed by a stream."""
+
+    __slots__ = ("symbol", "price", "timestamp", "received_ns")
+
+    def __init__(self, symbol, price, timestamp, received_ns=None):
+        self.symbol = symbol
+        self.price = float(price)
+        self.timestamp = pd.Timestamp(timestamp)  # Exchange time of the print
+        self.received_ns = received_ns if received_ns is not None else time.perf_counter_ns()  # Local arrival time
+
+    def __repr__(self):
+        return f"{self.symbol} {self.price} @ {self.timestamp}"
+
+
+class FakeStream:
+    """
+    Local stream replaying a fixed list of events, for tests and offline runs.
+
+    `delay` seconds are awaited between events to mimic prints arriving over time.
+    """
+
+    def __init__(self, events, delay=0.0):
+        """Initialize the stream from StreamEvents or (symbol, price, timestamp) tuples."""
+        self.events = [event if isinstance(event, StreamEvent) else StreamEvent(*event) for event in events]
+        self.delay = delay
+
+    @classmethod
+    def from_bars(cls, symbol, df, delay=0.0):
+        """Build a stream pushing one event per bar close of a DataFrame."""
+        return cls([StreamEvent(symbol, close, timestamp) for timestamp, close in df["close"].items()], delay)
+
+    async def subscribe(self, symbols):
+        """Yield the events for the subscribed symbols, stamped with their arrival time."""
+        symbols = set(symbols)
+        for event in self.events:
+            if event.symbol not in symbols:
+                continue
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            event.received_ns = time.perf_counter_ns()
+            yield event
+
+
+class AlpacaStream:
+    """Alpaca market data websocket pushing every trade print for the subscribed symbols."""
+
+    def __init__(self, config, feed="iex"):
+        """Initialize the stream with the same config dict as the Alpaca broker."""
+        self.config = config
+        self.feed = feed
+
+    async def subscribe(self, symbols):
+        """Yield a StreamEvent for every trade as it is printed, until the connection ends."""
+        from alpaca.data.enums import DataFeed
+        from alpaca.data.live import StockDataStream
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stream = StockDataStream(self.config["API_KEY"], self.config["API_SECRET"], feed=DataFeed(self.feed))
+
+        async def on_trade(trade):
+            # Called on the stream's own event loop; hand the event over to this loop
+            loop.call_soon_threadsafe(queue.put_nowait, StreamEvent(trade.symbol, trade.price, trade.timestamp))
+
+        def connect():
+            try:
+                stream.run()  # Public entry point; blocks on its own event loop until stopped
+            except Exception as e:
+                logger.error(f"Alpaca stream connection failed: {e}")
+            finally:
+                try:
+                    loop.call_soon_threadsafe(queue.put_nowait, None)  # Tell the consumer the connection ended
+                except RuntimeError:
+                    pass  # The consumer's loop is already closed
+
+        stream.subscribe_trades(on_trade, *symbols)
+        threading.Thread(target=connect, name="alpaca-stream", daemon=True).start()
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            try:
+                stream.stop()  # Waits for the websocket to close on the stream's loop
+            except Exception as e:
+                logger.error(f"Error stopping the Alpaca stream: {e}")
+
+
+class StreamRunner:
+    """
+    Feeds a stream into a strategy's `on_stream_event` handler on an asyncio event loop.
+
+    History is pulled once through `strategy.start_stream()` before subscribing; every event
+    after that is handled as it arrives, and the time from arrival to decision is recorded
+    under the `stream_event` stage of the strategy's latency metrics.
+    """
+
+    def __init__(self, strategy, stream, symbols=None):
+        """Initialize the runner for one strategy and stream."""
+        self.strategy = strategy
+        self.stream = stream
+        self.symbols = symbols
+        self.events = 0
+        self.thread = None
+        self.loop = None
+        self.task = None
+
+    async def run(self):
+        """Warm up the strategy, then handle every event until the stream ends or is stopped."""
+        self.strategy.start_stream()
+        metrics = getattr(self.strategy, "metrics", None)
+        symbols = self.symbols or self.strategy.stream_symbols()
+        async for event in self.stream.subscribe(symbols):
+            try:
+                self.strategy.on_stream_event(event)
+            except Exception as e:
+                logger.error(f"Error handling stream event {event}: {e}")
+            if metrics is not None and metrics.enabled:
+                metrics.record("stream_event", time.perf_counter_ns() - event.received_ns)
+            self.events += 1
+        logger.info(f"Stream ended after {self.events} events")
+
+    def start(self):
+        """Run the stream on its own event loop in a daemon thread."""
+        def target():
+            self.loop = asyncio.new_event_loop()
+            try:
+                self.task = self.loop.create_task(self.run())
+                self.loop.run_until_complete(self.task)
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"Stream stopped with an error: {e}")
+            finally:
+                self.loop.close()
+
+        self.thread = threading.Thread(target=target, name="stream", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Cancel the stream and wait for its thread to finish."""
+        if self.loop is not None and self.task is not None:
+            try:
+                self.loop.call_soon_threadsafe(self.task.cancel)
+            except RuntimeError:
+                pass  # The loop already finished
+        if self.thread is not None:
+            self.thread.join(timeout)
@@ -0,0 +1,150 @@
+from bar_store import BarStore, DEFAULT_ROOT, bars_to_frame, yahoo_fetcher
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import product
+from lumibot.backtesting import PandasDataBacktesting
+from lumibot.entities import Asset, Data
+from lumibot_swing_high import SwingHigh
+from vector_backtest import evaluate_swing_high
+import logging
+import os
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Per-worker state, filled once by _init_worker so tasks only carry (symbol, params)
+_FRAMES = {}
+_RANGE = None
+_EVALUATE = None
+
+
+def expand_grid(param_grid):
+    """Expand a {name: [values]} grid into a list of parameter dicts."""
+    names = list(param_grid)
+    return [dict(zip(names, values)) for values in product(*(param_grid[name] for name in names))]
+
+
+def backtest_swing_high(symbol, df, params, start, end):
+    """Run an event-driven SwingHigh backtest on one symbol and return its summary metrics."""
+    asset = Asset(symbol=symbol, asset_type="stock")
+    # No latency instrumentation: a sweep runs many backtests and would leave a metrics file for each
+    parameters = {**SwingHigh.parameters, "sleeptime": "1D", "instrument": False, **params, "symbol": symbol}
+    result = SwingHigh.backtest(
+        PandasDataBacktesting,
+        start,
+        end,
+        pandas_data={asset: Data(asset, df, timestep="day")},
+        parameters=parameters,
+        benchmark_asset=None,  # Avoid a benchmark download per run
+        risk_free_rate=0.0,  # Avoid a risk-free rate download per run
+        show_plot=False,
+        show_tearsheet=False,
+        save_tearsheet=False,
+        show_indicators=False,
+        show_progress_bar=False,
+        save_stats_file=False,
+    )
+    if isinstance(result, tuple):
+        result = result[0]  # Newer lumibot versions also return the strategy
+    result = result or {}
+    max_drawdown = result.get("max_drawdown") or {}
+    return {
+        "total_return": result.get("total_return"),
+        "cagr": result.get("cagr"),
+        "volatility": result.get("volatility"),
+        "sharpe": result.get("sharpe"),
+        "max_drawdown": max_drawdown.get("drawdown") if isinstance(max_drawdown, dict) else max_drawdown,
+    }
+
+
+def _init_worker(store_root, symbols, start, end, evaluate):
+    """Load every symbol's bars once per worker from the memory-mapped store."""
+    global _RANGE, _EVALUATE
+    store = BarStore(store_root)
+    for symbol in symbols:
+        # Pages come from the shared OS page cache; nothing is pickled to the worker
+        _FRAMES[symbol] = bars_to_frame(store.read(symbol, start, end))
+    _RANGE = (start, end)
+    _EVALUATE = evaluate
+
+
+def _run_task(task):
+    """Evaluate one (symbol, params) combination inside a worker."""
+    symbol, params = task
+    start, end = _RANGE
+    row = {"symbol": symbol, **params}
+    try:
+        row.update(_EVALUATE(symbol, _FRAMES[symbol], params, start, end))
+        row["error"] = None
+    except Exception as e:
+        row["error"] = str(e)
+    return row
+
+
+def rank_results(rows, rank_by="sharpe", ascending=False):
+    """Collect result rows into one table sorted by the ranking metric."""
+    df = pd.DataFrame(rows)
+    if rank_by in df:
+        df = df.sort_values(rank_by, ascending=ascending, na_position="last")
+    df = df.reset_index(drop=True)
+    df.insert(0, "rank", df.index + 1)
+    return df
+
+
+def run_sweep(param_grid, symbols, start, end, evaluate=backtest_swing_high, processes=None,
+              store_root=DEFAULT_ROOT, fetch=None, rank_by="sharpe"):
+    """
+    Evaluate every parameter combination on every symbol across a process pool.
+
+    Price data is warmed into the bar store once in the parent; workers then read it from
+    the memory-mapped files instead of receiving a pickled copy per task.
+    """
+    store = BarStore(store_root)
+    fetch = fetch or yahoo_fetcher()
+    for symbol in symbols:
+        store.get_bars(symbol, start, end, fetch)
+
+    combos = expand_grid(param_grid)
+    tasks = [(symbol, params) for symbol in symbols for params in combos]
+    processes = processes or os.cpu_count()
+    chunksize = max(1, len(tasks) // (processes * 4))
+    logger.info(f"Running {len(tasks)} backtests on {processes} processes")
+
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(store_root, symbols, start, end, evaluate),
+    ) as pool:
+        rows = list(pool.map(_run_task, tasks, chunksize=chunksize))
+
+    failed = sum(1 for row in rows if row["error"])
+    if failed:
+        logger.warning(f"{failed} of {len(rows)} backtests failed")
+    return rank_results(rows, rank_by=rank_by)
+
+
+if __name__ == "__main__":
+    fast = True  # Screen with the vectorized simulator; set to False for full event-driven backtests
+
+    try:
+        param_grid = {
+            "stop_loss_percent": [0.25, 0.5, 1.0, 2.0],
+            "take_profit_percent": [0.5, 1.0, 1.5, 3.0],
+            "window_size": [5, 10, 20],
+        }
+        symbols = ["GOOG", "AAPL", "MSFT"]
+        start = datetime(2022, 1, 1)
+        end = datetime(2022, 12, 31)
+        evaluate = evaluate_swing_high if fast else backtest_swing_high
+        results = run_sweep(param_grid, symbols, start, end, evaluate=evaluate)
+
+        # Save the ranked table next to the backtest logs
+        os.makedirs("logs", exist_ok=True)
+        path = os.path.join("logs", f"SwingHigh_sweep_{datetime.now():%Y-%m-%d_%H-%M-%S}.csv")
+        results.to_csv(path, index=False)
+        logger.info(f"Sweep results saved to {path}")
+        logger.info(f"Top results:\n{results.head(10)}")
+    except Exception as e:
+        logger.error(f"An error occurred during the parameter sweep: {e}")
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+
+class SimulationResult:
+    """Output of a vectorized SwingHigh simulation on one price series."""
+
+    def __init__(self, signals, trades, position, equity):
+        """Store the entry signals, trade table, share position and equity curve."""
+        self.signals = signals  # Bool array: swing high pattern seen on this bar
+        self.trades = trades  # DataFrame with one row per trade; exit_index is -1 while open
+        self.position = position  # Shares held after each bar
+        self.equity = equity  # Cash plus marked-to-market position after each bar
+
+    def summary(self):
+        """Return headline metrics for ranking and screening."""
+        closed = self.trades[self.trades["exit_index"] >= 0]
+        peak = np.maximum.accumulate(self.equity) if len(self.equity) else self.equity
+        drawdown = (peak - self.equity) / peak if len(self.equity) else np.empty(0)
+        returns = np.diff(self.equity) / self.equity[:-1] if len(self.equity) > 1 else np.empty(0)
+        sharpe = returns.mean() / returns.std() * np.sqrt(252) if returns.size and returns.std() > 0 else 0.0
+        return {
+            "trades": len(closed),
+            "win_rate": float((closed["pnl"] > 0).mean()) if len(closed) else 0.0,
+            "total_pnl": float(closed["pnl"].sum()),
+            "total_return": float(self.equity[-1] / self.equity[0] - 1) if len(self.equity) else 0.0,
+            "max_drawdown": float(drawdown.max()) if drawdown.size else 0.0,
+            "sharpe": float(sharpe),
+        }
+
+
+def swing_high_signals(prices):
+    """Mark the bars where the last three prices are strictly rising, as SwingHigh checks them."""
+    prices = np.asarray(prices, dtype=float)
+    signals = np.zeros(len(prices), dtype=bool)
+    if len(prices) > 3:
+        # SwingHigh needs more than three prices before it looks at the last three
+        signals[3:] = (prices[3:] > prices[2:-1]) & (prices[2:-1] > prices[1:-2])
+    return signals
+
+
+def _first_exit(prices, start, stop_price, take_profit_price, session_ends):
+    """Find the first bar at or after `start` that hits the stop, the target or a session end."""
+    width = 64
+    lo = start
+    while lo < len(prices):
+        # Scan in doubling windows so the total work stays proportional to the holding period
+        hi = min(len(prices), lo + width)
+        window = prices[lo:hi]
+        hit = (window <= stop_price) | (window >= take_profit_price)
+        if session_ends is not None:
+            hit |= session_ends[lo:hi]
+        found = np.flatnonzero(hit)
+        if found.size:
+            return lo + found[0]
+        lo = hi
+        width *= 2
+    return -1
+
+
+def simulate(prices, stop_loss_percent=0.5, take_profit_percent=1.5, quantity=10, cash=100000.0, session_ends=None):
+    """
+    Simulate the SwingHigh entry/exit rules over a price array.
+
+    Signals are computed for every bar at once; the trade loop then jumps from one entry to
+    its exit, so the cost grows with the number of trades rather than the number of bars.
+    If `session_ends` is given, open positions are closed on those bars and no position is
+    opened on them, mirroring `before_market_closes`.
+    """
+    prices = np.asarray(prices, dtype=float)
+    n = len(prices)
+    if session_ends is not None:
+        session_ends = np.asarray(session_ends, dtype=bool)
+    signals = swing_high_signals(prices)
+    candidates = np.flatnonzero(signals if session_ends is None else signals & ~session_ends)
+
+    rows = []
+    next_bar = 0
+    while True:
+        k = np.searchsorted(candidates, next_bar)
+        if k == len(candidates):
+            break
+        entry_index = candidates[k]
+        entry_price = prices[entry_index]
+        stop_price = entry_price * (1 - stop_loss_percent / 100)
+        take_profit_price = entry_price * (1 + take_profit_percent / 100)
+        exit_index = _first_exit(prices, entry_index, stop_price, take_profit_price, session_ends)
+        if exit_index < 0:
+            rows.append((entry_index, -1, entry_price, np.nan))
+            break
+        rows.append((entry_index, exit_index, entry_price, prices[exit_index]))
+        next_bar = exit_index + 1  # A bar that closes a position cannot open a new one
+
+    trades = pd.DataFrame(rows, columns=["entry_index", "exit_index", "entry_price", "exit_price"])
+    trades["pnl"] = (trades["exit_price"] - trades["entry_price"]) * quantity
+    trades["return"] = trades["exit_price"] / trades["entry_price"] - 1
+
+    # Position and cash as cumulative sums of the per-trade deltas
+    position_delta = np.zeros(n)
+    cash_delta = np.zeros(n)
+    entries = trades["entry_index"].to_numpy(dtype=int)
+    closed = trades[trades["exit_index"] >= 0]
+    exits = closed["exit_index"].to_numpy(dtype=int)
+    np.add.at(position_delta, entries, quantity)
+    np.add.at(position_delta, exits, -quantity)
+    np.add.at(cash_delta, entries, -quantity * prices[entries])
+    np.add.at(cash_delta, exits, quantity * prices[exits])
+    position = np.cumsum(position_delta)
+    equity = cash + np.cumsum(cash_delta) + position * prices
+    return SimulationResult(signals, trades, position, equity)
+
+
+def screen(price_map, **kwargs):
+    """Simulate every symbol in a {symbol: prices} mapping and return a table of summaries."""
+    rows = []
+    for symbol, prices in price_map.items():
+        rows.append({"symbol": symbol, **simulate(prices, **kwargs).summary()})
+    return pd.DataFrame(rows)
+
+
+def evaluate_swing_high(symbol, df, params, start, end):
+    """Vectorized drop-in for `sweep.backtest_swing_high`, using the close prices in range."""
+    closes = df["close"]
+    if len(closes):
+        closes = closes[(closes.index.date >= _to_date(start)) & (closes.index.date <= _to_date(end))]
+    result = simulate(
+        closes.to_numpy(dtype=float),
+        stop_loss_percent=params.get("stop_loss_percent", 0.5),
+        take_profit_percent=params.get("take_profit_percent", 1.5),
+        quantity=params.get("quantity", 10),
+    )
+    return result.summary()
+
+
+def _to_date(value):
+    """Normalize a datetime or date to a date."""
+    return value.date() if hasattr(value, "date") else value
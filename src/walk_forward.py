@@ -0,0 +1,202 @@
+from bar_store import BarStore, DEFAULT_ROOT, yahoo_fetcher
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from indicators import IndicatorState
+from lumibot_swing_high import SwingHigh
+from model_store import OnlineClassifier
+import logging
+import os
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FEATURES = SwingHigh.features  # Same columns, in the same order, as the live model
+
+# Per-worker state, filled once by _init_worker so tasks only carry (symbol, fold)
+_DATA = {}
+_THRESHOLD = 0.5
+
+
+def build_features(df, window_size=10):
+    """
+    Compute the SwingHigh model features for a whole price history in one vectorized pass.
+
+    `Target` is whether the next bar closes higher, and `Forward_Return` is that next-bar
+    return, so every label lies strictly after the features it is predicted from.
+    """
+    closes = df["close"].to_numpy(dtype=float)
+    sma, ema, price_change = IndicatorState(window_size).warm_up(closes)  # Same warm-up as calculate_indicators
+    features = pd.DataFrame({"SMA": sma, "EMA": ema, "Price_Change": price_change}, index=df.index)
+    forward_return = np.full(len(closes), np.nan)
+    forward_return[:-1] = closes[1:] / closes[:-1] - 1
+    features["Forward_Return"] = forward_return
+    features["Target"] = (forward_return > 0).astype(int)
+    return features.dropna()
+
+
+def walk_forward_folds(n, initial_train=252, test_size=21, train_size=None, gap=0):
+    """
+    Split n time-ordered rows into (train, test) index ranges.
+
+    Folds are expanding (training on everything before the test window) unless `train_size`
+    is given, in which case the training window rolls forward at that fixed length. `gap`
+    rows are left out between training and test.
+    """
+    folds = []
+    test_start = initial_train + gap
+    while test_start < n:
+        test_end = min(test_start + test_size, n)
+        train_end = test_start - gap
+        train_start = 0 if train_size is None else max(0, train_end - train_size)
+        folds.append((range(train_start, train_end), range(test_start, test_end)))
+        test_start = test_end
+    return folds
+
+
+def evaluate_fold(features, train, test, threshold=0.5):
+    """Train on one fold's training rows and score its test rows; returns (metrics, probabilities)."""
+    X = features[FEATURES].to_numpy()
+    y = features["Target"].to_numpy()
+    X_train, y_train = X[train.start:train.stop], y[train.start:train.stop]
+    X_test, y_test = X[test.start:test.stop], y[test.start:test.stop]
+    forward_return = features["Forward_Return"].to_numpy()[test.start:test.stop]
+    if len(np.unique(y_train)) < 2:
+        raise ValueError("training window holds a single class")
+
+    model = OnlineClassifier().fit(X_train, y_train)
+    probability = model.predict_proba(X_test)
+    signal = probability >= threshold
+    eps = 1e-12
+    metrics = {
+        "train_start": features.index[train.start],
+        "train_end": features.index[train.stop - 1],
+        "test_start": features.index[test.start],
+        "test_end": features.index[test.stop - 1],
+        "train_rows": len(train),
+        "test_rows": len(test),
+        "accuracy": float(np.mean(signal == y_test)),
+        "base_rate": float(np.mean(y_test)),  # Accuracy of always predicting a rise
+        "log_loss": float(-np.mean(y_test * np.log(probability + eps) + (1 - y_test) * np.log(1 - probability + eps))),
+        "signal_rate": float(np.mean(signal)),
+        "signal_return": float(np.mean(forward_return[signal])) if signal.any() else np.nan,
+        "market_return": float(np.mean(forward_return)),
+    }
+    return metrics, probability
+
+
+def _init_worker(data, threshold):
+    """Receive every symbol's features and folds once per worker."""
+    global _THRESHOLD
+    _DATA.update(data)
+    _THRESHOLD = threshold
+
+
+def _run_fold(task):
+    """Evaluate one (symbol, fold number) inside a worker."""
+    symbol, number = task
+    features, folds = _DATA[symbol]
+    train, test = folds[number]
+    row = {"symbol": symbol, "fold": number}
+    try:
+        metrics, probability = evaluate_fold(features, train, test, _THRESHOLD)
+        row.update(metrics)
+        row["error"] = None
+    except Exception as e:
+        row["error"] = str(e)
+        probability = None
+    return row, probability
+
+
+class WalkForwardResult:
+    """Per-fold metrics and the combined out-of-sample signal series."""
+
+    def __init__(self, folds, signals):
+        """Store the fold table and the out-of-sample predictions."""
+        self.folds = folds  # DataFrame with one row per (symbol, fold)
+        self.signals = signals  # DataFrame indexed by (symbol, timestamp): probability, signal, target, forward return
+
+    def summary(self, threshold=0.5):
+        """Out-of-sample metrics per symbol over every test row."""
+        if self.signals.empty:
+            return pd.DataFrame()
+        grouped = self.signals.groupby(level="symbol")
+        return pd.DataFrame({
+            "rows": grouped.size(),
+            "accuracy": grouped.apply(lambda s: np.mean(s["signal"] == s["Target"])),
+            "base_rate": grouped["Target"].mean(),
+            "signal_rate": grouped["signal"].mean(),
+            "signal_return": grouped.apply(lambda s: s.loc[s["signal"], "Forward_Return"].mean()),
+            "market_return": grouped["Forward_Return"].mean(),
+            "folds": self.folds.groupby("symbol").size(),
+        })
+
+
+def walk_forward(frames, window_size=10, initial_train=252, test_size=21, train_size=None, gap=0,
+                 threshold=0.5, processes=None):
+    """
+    Walk-forward evaluation of the SwingHigh model over {symbol: OHLCV DataFrame}.
+
+    Features are computed once per symbol and shipped once per worker; folds then run in
+    parallel across a process pool (inline when `processes` is 1).
+    """
+    data = {}
+    for symbol, df in frames.items():
+        features = build_features(df, window_size)
+        data[symbol] = (features, walk_forward_folds(len(features), initial_train, test_size, train_size, gap))
+    tasks = [(symbol, number) for symbol, (_, folds) in data.items() for number in range(len(folds))]
+    logger.info(f"Running {len(tasks)} walk-forward folds over {len(data)} symbols")
+
+    if processes == 1:
+        _init_worker(data, threshold)
+        outputs = [_run_fold(task) for task in tasks]
+    else:
+        processes = processes or os.cpu_count()
+        chunksize = max(1, len(tasks) // (processes * 4))
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(data, threshold)) as pool:
+            outputs = list(pool.map(_run_fold, tasks, chunksize=chunksize))
+
+    # Test windows never overlap, so the out-of-sample predictions form one series per symbol
+    signals = []
+    for row, probability in outputs:
+        if probability is None:
+            continue
+        features, folds = data[row["symbol"]]
+        _, test = folds[row["fold"]]
+        segment = features.iloc[test.start:test.stop][["Target", "Forward_Return"]].copy()
+        segment["probability"] = probability
+        segment["signal"] = probability >= threshold
+        segment["symbol"] = row["symbol"]
+        signals.append(segment)
+    signals = pd.concat(signals).set_index("symbol", append=True).swaplevel().sort_index() if signals else pd.DataFrame()
+
+    rows = [row for row, _ in outputs]
+    failed = sum(1 for row in rows if row["error"])
+    if failed:
+        logger.warning(f"{failed} of {len(rows)} folds failed")
+    return WalkForwardResult(pd.DataFrame(rows), signals)
+
+
+def run_walk_forward(symbols, start, end, store_root=DEFAULT_ROOT, fetch=None, **kwargs):
+    """Walk-forward evaluation over daily bars served from the local bar store."""
+    store = BarStore(store_root)
+    fetch = fetch or yahoo_fetcher()
+    frames = {symbol: store.get_bars(symbol, start, end, fetch) for symbol in symbols}
+    return walk_forward(frames, **kwargs)
+
+
+if __name__ == "__main__":
+    try:
+        # Five years of daily bars: one year of initial training, then monthly test windows
+        result = run_walk_forward(["GOOG", "AAPL", "MSFT"], datetime(2018, 1, 1), datetime(2022, 12, 31),
+                                  initial_train=252, test_size=21)
+        logger.info(f"Out-of-sample summary:\n{result.summary()}")
+
+        os.makedirs("logs", exist_ok=True)
+        path = os.path.join("logs", f"SwingHigh_walk_forward_{datetime.now():%Y-%m-%d_%H-%M-%S}.csv")
+        result.folds.to_csv(path, index=False)
+        logger.info(f"Fold metrics saved to {path}")
+    except Exception as e:
+        logger.error(f"An error occurred during walk-forward evaluation: {e}")
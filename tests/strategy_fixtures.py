@@ -0,0 +1,15 @@
+from unittest.mock import patch
+
+def patch_properties(test, strategy_class, **values):
+    """Replace read-only lumibot properties of a strategy class with plain values until the test ends."""
+    for name, value in values.items():
+        patcher = patch.object(strategy_class, name, value, create=True)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+
+def bare_strategy(strategy_class, **parameters):
+    """Build and initialize a strategy without the lumibot broker wiring, with `parameters` over the class defaults."""
+    strategy = strategy_class.__new__(strategy_class)  # Skip the lumibot broker wiring
+    strategy.parameters = {**strategy_class.parameters, **parameters}
+    strategy.initialize()
+    return strategy
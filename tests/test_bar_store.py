@@ -0,0 +1,112 @@
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+
+# Import the bar store
+from src.bar_store import BarStore, alpaca_fetcher, frame_to_bars, bars_to_frame
+
+def make_bars(start, end):
+    """Build daily OHLCV bars on business days between start and end."""
+    index = pd.bdate_range(start, end, tz="America/New_York") + pd.Timedelta(hours=16)
+    close = np.linspace(100, 100 + len(index) - 1, len(index))
+    return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1000.0}, index=index)
+
+class TestBarStore(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a temporary store and a fetcher that records its calls."""
+        self.root = tempfile.mkdtemp()
+        self.store = BarStore(self.root)
+        self.calls = []
+
+    def tearDown(self):
+        """Remove the temporary store."""
+        shutil.rmtree(self.root)
+
+    def fetch(self, symbol, start, end):
+        """Fake data source that records every requested range."""
+        self.calls.append((symbol, start, end))
+        return make_bars(start, end)
+
+    def test_repeat_read_needs_no_fetch(self):
+        """Test that a second read of the same range is served from disk."""
+        first = self.store.get_bars("GOOG", date(2022, 1, 1), date(2022, 1, 31), self.fetch)
+        self.assertEqual(len(self.calls), 1)
+
+        second = self.store.get_bars("GOOG", date(2022, 1, 1), date(2022, 1, 31), self.fetch)
+        self.assertEqual(len(self.calls), 1)
+        pd.testing.assert_frame_equal(first, second)
+        self.assertEqual(len(second), 21)  # Business days in January 2022
+
+    def test_only_missing_range_is_fetched(self):
+        """Test that extending a cached range fetches only the new days."""
+        self.store.get_bars("GOOG", date(2022, 1, 1), date(2022, 1, 31), self.fetch)
+        self.store.get_bars("GOOG", date(2022, 1, 1), date(2022, 2, 15), self.fetch)
+
+        self.assertEqual(self.calls[-1], ("GOOG", date(2022, 2, 1), date(2022, 2, 15)))
+
+    def test_empty_fetch_is_not_cached(self):
+        """Test that a fetch returning no bars leaves the range missing instead of caching it as empty."""
+        empty = self.store.get_bars("GOOG", date(2022, 1, 3), date(2022, 1, 7), lambda *args: make_bars("2022-01-03", "2022-01-07")[:0])
+        self.assertEqual(len(empty), 0)
+        df = self.store.get_bars("GOOG", date(2022, 1, 3), date(2022, 1, 7), self.fetch)
+        self.assertEqual(len(df), 5)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_cut_short_fetch_is_fetched_again(self):
+        """Test that days after the last bar a fetch returned are fetched again on the next read."""
+        self.store.get_bars("GOOG", date(2022, 1, 3), date(2022, 1, 14), lambda symbol, start, end: self.fetch(symbol, start, date(2022, 1, 7)))
+        self.assertFalse(self.store.has_day("GOOG", date(2022, 1, 10)))
+
+        df = self.store.get_bars("GOOG", date(2022, 1, 3), date(2022, 1, 14), self.fetch)
+        self.assertEqual(len(df), 10)
+        self.assertEqual(self.calls[-1], ("GOOG", date(2022, 1, 8), date(2022, 1, 14)))
+
+    def test_range_ending_on_a_weekend_is_cached(self):
+        """Test that a range ending on a weekend or holiday is not fetched again on the next read."""
+        self.store.get_bars("GOOG", date(2022, 12, 1), date(2022, 12, 31), self.fetch)  # Ends on a Saturday
+        self.store.get_bars("GOOG", date(2022, 12, 1), date(2022, 12, 31), self.fetch)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_weekend_after_cached_bars_needs_no_fetch(self):
+        """Test that a read on a Monday does not ask the source for the weekend it just had."""
+        self.store.get_bars("GOOG", date(2022, 1, 3), date(2022, 1, 7), self.fetch)
+        df = self.store.get_bars("GOOG", date(2022, 1, 3), date(2022, 1, 9), self.fetch)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len(df), 5)
+
+    def test_read_single_day_is_memory_mapped(self):
+        """Test that a single cached day is returned without copying."""
+        self.store.get_bars("AAPL", date(2022, 1, 3), date(2022, 1, 3), self.fetch)
+
+        bars = self.store.read("AAPL", date(2022, 1, 3), date(2022, 1, 3))
+        self.assertIsInstance(bars, np.memmap)
+        self.assertEqual(len(bars), 1)
+
+    def test_round_trip(self):
+        """Test that converting a frame to bars and back preserves it."""
+        df = make_bars("2022-01-03", "2022-01-07")
+        out = bars_to_frame(frame_to_bars(df))
+        np.testing.assert_allclose(out["close"].to_numpy(), df["close"].to_numpy())
+        self.assertTrue((out.index == df.index).all())
+
+class TestAlpacaFetcher(unittest.TestCase):
+
+    def test_returns_one_symbols_bars(self):
+        """Test that Alpaca's multi-indexed bar frame is reduced to the symbol's OHLCV columns."""
+        bars = make_bars("2022-01-03", "2022-01-07").assign(trade_count=1, vwap=100.0)
+        bars.index = pd.MultiIndex.from_product([["GOOG"], bars.index], names=["symbol", "timestamp"])
+        with patch("alpaca.data.historical.StockHistoricalDataClient") as client:
+            client.return_value.get_stock_bars.return_value.df = bars
+            df = alpaca_fetcher({"API_KEY": "key", "API_SECRET": "secret"})("GOOG", date(2022, 1, 3), date(2022, 1, 7))
+        self.assertEqual(list(df.columns), ["open", "high", "low", "close", "volume"])
+        self.assertEqual(len(df), 5)
+        request = client.return_value.get_stock_bars.call_args.args[0]
+        self.assertEqual(request.end.date(), date(2022, 1, 8))  # The end day is included
+
+if __name__ == "__main__":
+    unittest.main()
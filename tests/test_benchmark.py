@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+# Import the benchmark suite
+from src.benchmark import HOT_PATH, SMALL_SIZES, find_regressions, load_baseline, metric, run_benchmarks, save_results
+
+class TestRegressionThreshold(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a baseline with one latency and one throughput metric."""
+        self.baseline = {
+            "swing_high_iteration[sessions=1]": metric(100.0, "us", "lower"),
+            "replay_throughput[sessions=1]": metric(1000.0, "bars/s", "higher"),
+            "model_training[rows=1000]": metric(5.0, "ms", "lower"),
+        }
+
+    def test_slower_hot_path_is_a_regression(self):
+        """Test that a hot-path slowdown past the threshold is reported in either direction."""
+        results = {
+            "swing_high_iteration[sessions=1]": metric(150.0, "us", "lower"),
+            "replay_throughput[sessions=1]": metric(500.0, "bars/s", "higher"),
+            "model_training[rows=1000]": metric(5.0, "ms", "lower"),
+        }
+        regressions = find_regressions(results, self.baseline, threshold=0.25)
+        self.assertAlmostEqual(regressions["swing_high_iteration[sessions=1]"], 0.5)
+        self.assertAlmostEqual(regressions["replay_throughput[sessions=1]"], 1.0)
+
+    def test_noise_and_cold_path_are_not_regressions(self):
+        """Test that small changes, improvements and metrics off the hot path pass."""
+        results = {
+            "swing_high_iteration[sessions=1]": metric(110.0, "us", "lower"),
+            "replay_throughput[sessions=1]": metric(2000.0, "bars/s", "higher"),
+            "model_training[rows=1000]": metric(50.0, "ms", "lower"),
+            "indicator_update[lookback=10]": metric(1e6, "ns", "lower"),  # Not in the baseline
+        }
+        self.assertEqual(find_regressions(results, self.baseline, threshold=0.25), {})
+
+    def test_calibrated_metrics_compare_relative_values(self):
+        """Test that a machine twice as slow is not a regression, but a slowdown beyond the calibration loop's is."""
+        baseline = {
+            "swing_high_iteration[sessions=1]": metric(100.0, "us", "lower", relative=10.0),
+            "replay_throughput[sessions=1]": metric(1000.0, "bars/s", "higher", relative=10.0),
+        }
+        results = {
+            "swing_high_iteration[sessions=1]": metric(210.0, "us", "lower", relative=10.5),
+            "replay_throughput[sessions=1]": metric(300.0, "bars/s", "higher", relative=6.0),
+        }
+        regressions = find_regressions(results, baseline, threshold=0.25)
+        self.assertEqual(list(regressions), ["replay_throughput[sessions=1]"])
+        self.assertAlmostEqual(regressions["replay_throughput[sessions=1]"], 2 / 3)
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a temporary results directory."""
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary results directory."""
+        shutil.rmtree(self.root)
+
+    def test_quick_run_and_baseline_round_trip(self):
+        """Test that the smallest suite reports every measurement and compares clean to itself."""
+        results = run_benchmarks(SMALL_SIZES)
+        for prefix in ["calibration", "swing_high_iteration", "buy_hold_iteration", "replay_throughput", "vector_throughput",
+                       "indicator_warm_up", "indicator_update", "model_training", "memory_peak"]:
+            self.assertTrue(any(name.startswith(prefix) for name in results), prefix)
+        self.assertTrue(all(result["value"] > 0 for result in results.values()))
+        self.assertTrue(all("relative" in result for name, result in results.items() if name.split("[")[0] in HOT_PATH))
+
+        path = os.path.join(self.root, "baseline.json")
+        save_results(results, path)
+        with open(path) as f:
+            self.assertIn("commit", json.load(f))
+        self.assertEqual(find_regressions(results, load_baseline(path)), {})
+
+    def test_missing_baseline_is_reported(self):
+        """Test that a missing baseline is reported as None rather than an empty baseline that passes everything."""
+        with self.assertLogs("src.benchmark", level="ERROR"):
+            self.assertIsNone(load_baseline(os.path.join(self.root, "missing.json")))
+
+    def test_committed_baseline_covers_the_hot_path(self):
+        """Test that the committed baseline has every hot-path metric of the quick and full suites."""
+        from src.benchmark import BASELINE_PATH
+        baseline = load_baseline(BASELINE_PATH)
+        self.assertIsNotNone(baseline)
+        for prefix in HOT_PATH:
+            self.assertTrue(any(name.startswith(prefix) for name in baseline), prefix)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import threading
+import time
+import unittest
+
+# Import the concurrent execution layer
+from src.concurrency import ConcurrentExecutor, RateLimiter
+
+class TestConcurrentExecutor(unittest.TestCase):
+
+    def test_map_returns_results_by_item(self):
+        """Test that every item's result is returned under its own key."""
+        executor = ConcurrentExecutor(max_workers=4)
+        results, errors = executor.map(lambda x: x * 2, [1, 2, 3])
+        self.assertEqual(results, {1: 2, 2: 4, 3: 6})
+        self.assertEqual(errors, {})
+
+    def test_failures_are_isolated(self):
+        """Test that a failing item does not prevent the others from completing."""
+        def fn(symbol):
+            if symbol == "BAD":
+                raise ValueError("no price")
+            return 100
+
+        results, errors = ConcurrentExecutor(max_workers=4).map(fn, ["GOOG", "BAD", "MSFT"])
+        self.assertEqual(set(results), {"GOOG", "MSFT"})
+        self.assertIsInstance(errors["BAD"], ValueError)
+
+    def test_single_worker_runs_in_order_inline(self):
+        """Test that one worker calls every item in order on the calling thread."""
+        calls = []
+        results, errors = ConcurrentExecutor(max_workers=1).map(lambda x: calls.append((x, threading.current_thread())), [3, 1, 2])
+        self.assertEqual([x for x, _ in calls], [3, 1, 2])
+        self.assertTrue(all(thread is threading.current_thread() for _, thread in calls))
+
+    def test_concurrency_limit(self):
+        """Test that no more than max_workers calls run at the same time."""
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def fn(item):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.01)
+            with lock:
+                state["running"] -= 1
+
+        ConcurrentExecutor(max_workers=3).map(fn, range(20))
+        self.assertLessEqual(state["peak"], 3)
+        self.assertGreater(state["peak"], 1)
+
+    def test_empty_items(self):
+        """Test that mapping over nothing returns empty results."""
+        self.assertEqual(ConcurrentExecutor().map(str, []), ({}, {}))
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_rate_limit_paces_calls(self):
+        """Test that calls beyond the burst wait for new tokens."""
+        limiter = RateLimiter(rate=100, burst=1)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    def test_no_rate_limit(self):
+        """Test that a limiter without a rate never blocks."""
+        limiter = RateLimiter()
+        start = time.monotonic()
+        for _ in range(1000):
+            limiter.acquire()
+        self.assertLess(time.monotonic() - start, 0.5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+
+# Import the coordinator and the replay harness used to drive it
+from src.coordinator import NettingOrderQueue, PortfolioCoordinator, SharedMarketData, StrategyBook
+from src.replay import ReplayBroker, ReplayHarness, ReplayOrder
+from src.lumibot_buy_hold import BuyHold
+from src.lumibot_swing_high import SwingHigh
+from src.model_store import ModelStore
+
+TIMEZONE = "America/New_York"
+SESSION = pd.Timestamp("2022-03-01 09:30", tz=TIMEZONE)
+
+class CountingBroker(ReplayBroker):
+    """Replay broker counting the market data calls that reach it."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.data_calls = 0
+
+    def get_last_price(self, symbol):
+        self.data_calls += 1
+        return super().get_last_price(symbol)
+
+    def get_last_prices(self, symbols):
+        self.data_calls += 1
+        return {symbol: super(CountingBroker, self).get_last_price(symbol) for symbol in symbols}
+
+    def get_historical_prices(self, symbol, length, timestep="day", **kwargs):
+        self.data_calls += 1
+        return super().get_historical_prices(symbol, length, timestep)
+
+def make_bars(seed=0):
+    """Forty days of daily history followed by one session of minute bars."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2022-01-03", periods=40, freq="B", tz=TIMEZONE).append(
+        pd.date_range(SESSION, periods=390, freq="min"))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, len(index))))
+    return pd.DataFrame({"open": close, "high": close, "low": close, "close": close, "volume": 1000}, index=index)
+
+class FakeChild:
+    """Coordinated strategy stand-in holding only a book."""
+
+    def __init__(self, cash, positions=None):
+        self.book = StrategyBook(cash)
+        for symbol, quantity in (positions or {}).items():
+            self.book.fill(symbol, "buy", quantity, 100.0)
+        self.fills = []
+
+    def on_filled_order(self, position, order, price, quantity, multiplier):
+        self.fills.append((order.side, quantity, price))
+
+class TestSharedMarketData(unittest.TestCase):
+
+    def test_single_flight(self):
+        """Test that concurrent requests for one key share a single broker call."""
+        data = SharedMarketData()
+        data.advance(SESSION)
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return 100.0
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(data.get(("price", "GOOG"), fetch))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [100.0] * 8)
+        self.assertEqual((len(calls), data.requests, data.broker_calls), (1, 8, 1))
+
+        data.advance(SESSION + pd.Timedelta(minutes=1))
+        data.get(("price", "GOOG"), fetch)
+        self.assertEqual(len(calls), 2)  # A new timestamp is fetched again
+
+class TestNettingOrderQueue(unittest.TestCase):
+
+    def test_opposing_orders_are_netted(self):
+        """Test that a buy and a sell of one symbol send only the net, with crossed shares filled right away."""
+        buyer, seller = FakeChild(10000), FakeChild(0, {"GOOG": 4})
+        queue = NettingOrderQueue()
+        queue.put(buyer, ReplayOrder("GOOG", 10, "buy"))
+        queue.put(seller, ReplayOrder("GOOG", 4, "sell"))
+        sent = []
+        orders = queue.flush(lambda symbol: 101.0, lambda symbol, quantity, side: (symbol, quantity, side), sent.extend)
+
+        self.assertEqual(orders, [("GOOG", 6, "buy")])
+        self.assertEqual(sent, orders)
+        self.assertEqual(queue.netted_shares, 8)
+        self.assertNotIn("GOOG", seller.book.positions)
+        self.assertAlmostEqual(seller.book.cash, 4.0)  # Bought 4 at 100, sold at 101
+        self.assertEqual(buyer.book.positions["GOOG"].quantity, 4)  # The net 6 waits for the broker
+
+        self.assertEqual(queue.allocate(orders[0], 101.5, 6), 6)
+        self.assertEqual(buyer.book.positions["GOOG"].quantity, 10)
+        self.assertEqual(buyer.fills, [("buy", 4, 101.0), ("buy", 6, 101.5)])
+        self.assertEqual(queue.working, {})
+
+    def test_broker_fills_are_split_pro_rata(self):
+        """Test that partial fills of a net order are split by each child's share of it, at the broker's price."""
+        small, large = FakeChild(10000), FakeChild(10000)
+        queue = NettingOrderQueue()
+        queue.put(small, ReplayOrder("GOOG", 10, "buy"))
+        queue.put(large, ReplayOrder("GOOG", 30, "buy"))
+        orders = queue.flush(lambda symbol: 100.0, ReplayOrder, lambda orders: None)
+        self.assertEqual(orders[0].quantity, 40)
+        self.assertEqual((small.fills, large.fills), ([], []))  # Nothing booked before the broker fills
+
+        queue.allocate(orders[0], 102.0, 20)
+        self.assertEqual((small.fills, large.fills), ([("buy", 5, 102.0)], [("buy", 15, 102.0)]))
+        queue.allocate(orders[0], 103.0, 20)
+        self.assertEqual(small.book.positions["GOOG"].quantity, 10)
+        self.assertEqual(large.book.positions["GOOG"].quantity, 30)
+        self.assertAlmostEqual(large.book.cash, 10000 - 15 * 102.0 - 15 * 103.0)
+        self.assertEqual(queue.allocate(orders[0], 103.0, 5), 0)  # Nothing left to allocate
+
+    def test_fills_reach_children_after_the_broker_renames_the_order(self):
+        """Test that fills are allocated when the broker replaces the order identifier on submission, as lumibot's Alpaca broker does."""
+        from lumibot.entities import Asset, Order
+        buyer = FakeChild(10000)
+        queue = NettingOrderQueue()
+        queue.put(buyer, ReplayOrder("GOOG", 10, "buy"))
+
+        def submit_orders(orders):
+            for order in orders:
+                order.set_identifier("alpaca-order-id")
+        orders = queue.flush(lambda symbol: 100.0, lambda symbol, quantity, side: Order("coordinator", Asset(symbol), quantity, side),
+                             submit_orders)
+
+        self.assertEqual(queue.allocate(orders[0], 100.5, 4), 4)  # The tracked order object
+        update = Order("coordinator", Asset("GOOG"), 10, "buy")
+        update.set_identifier("alpaca-order-id")
+        self.assertEqual(queue.allocate(update, 100.5, 6), 6)  # A copy carrying the broker's identifier
+        self.assertEqual(buyer.book.positions["GOOG"].quantity, 10)
+        self.assertEqual(queue.working, {})
+
+class TestPortfolioCoordinator(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a temporary model store and one session of bars."""
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.bars = {"GOOG": make_bars()}
+        self.child = {"sleeptime": "1M", "instrument": False, "budget": 100000}
+
+    def use_temp_models(self, strategy):
+        """Keep test models out of the real model cache."""
+        for child in getattr(strategy, "children", [strategy]):
+            child.model_store = ModelStore(self.root)
+
+    def test_shared_feed_matches_standalone_runs(self):
+        """Test that coordinated children trade like standalone runs with far fewer data calls."""
+        variants = [{"window_size": 5}, {"window_size": 10}, {"window_size": 20}]
+        standalone_calls = 0
+        standalone_cash = []
+        for variant in variants:
+            broker = CountingBroker(self.bars)
+            ReplayHarness(SwingHigh, broker, parameters={**self.child, **variant}, start=SESSION).run(
+                on_initialize=self.use_temp_models)
+            standalone_calls += broker.data_calls
+            standalone_cash.append(broker.cash)
+
+        broker = CountingBroker(self.bars)
+        parameters = {"strategies": [(SwingHigh, {**self.child, **variant}) for variant in variants], "stagger": False}
+        result = ReplayHarness(PortfolioCoordinator, broker, parameters=parameters, start=SESSION).run(
+            on_initialize=self.use_temp_models)
+
+        coordinator = result.strategy
+        self.assertEqual([child.book.cash for child in coordinator.children], standalone_cash)
+        self.assertLess(broker.data_calls, standalone_calls / 2)
+        self.assertEqual(broker.get_positions(), [])  # Every child closed out before the close
+
+    def test_live_child_reconciles_against_its_book(self):
+        """Test that a live child's ledger sync reads positions and open orders from its coordinator, with no thread."""
+        parameters = {"strategies": [(SwingHigh, self.child)]}
+        coordinator = ReplayHarness(PortfolioCoordinator, ReplayBroker(self.bars), parameters=parameters).create_strategy()
+        child = coordinator.children[0]
+        child.book.fill("GOOG", "buy", 5, 100.0)
+        child.submit_order(ReplayOrder("GOOG", 3, "buy"))
+        with patch.object(type(coordinator), "is_backtesting", False):
+            child.sync_ledger()
+        self.assertEqual(child.reconciler.runs, 1)
+        self.assertIsNone(child.reconciler.thread)
+        self.assertEqual(child.ledger.position("GOOG"), 8)
+
+    def test_staggered_schedule(self):
+        """Test that children sharing a sleeptime start one tick apart."""
+        broker = ReplayBroker(self.bars)
+        parameters = {"strategies": [(SwingHigh, self.child), (SwingHigh, self.child), (BuyHold, {"symbols": ["GOOG"], "instrument": False})]}
+        harness = ReplayHarness(PortfolioCoordinator, broker, parameters=parameters, start=SESSION)
+        coordinator = harness.create_strategy()
+        self.assertEqual(coordinator.sleeptime, "20S")
+        self.assertEqual(coordinator.offsets, [0, 20, 40])
+        self.assertEqual(len(coordinator.due_children(SESSION)), 1)
+        self.assertEqual(len(coordinator.due_children(SESSION + pd.Timedelta(seconds=20))), 1)
+        self.assertEqual(len(coordinator.due_children(SESSION + pd.Timedelta(seconds=60))), 2)  # Both SwingHigh children
+
+if __name__ == "__main__":
+    unittest.main()
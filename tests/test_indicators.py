@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+# Import the streaming indicator state
+from src.indicators import IndicatorState
+
+class TestIndicatorState(unittest.TestCase):
+
+    def setUp(self):
+        """Build a synthetic random-walk close series."""
+        rng = np.random.default_rng(42)
+        self.closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 2000)))
+        self.window_size = 10
+        series = pd.Series(self.closes)
+        self.expected_sma = series.rolling(window=self.window_size).mean().to_numpy()
+        self.expected_ema = series.ewm(span=self.window_size, adjust=False).mean().to_numpy()
+        self.expected_change = series.pct_change().to_numpy()
+
+    def test_warm_up_matches_pandas(self):
+        """Test that the vectorized warm-up reproduces the pandas indicators."""
+        state = IndicatorState(self.window_size)
+        sma, ema, change = state.warm_up(self.closes)
+
+        np.testing.assert_allclose(sma, self.expected_sma, rtol=1e-10, equal_nan=True)
+        np.testing.assert_allclose(ema, self.expected_ema, rtol=1e-10)
+        np.testing.assert_allclose(change, self.expected_change, rtol=1e-10, equal_nan=True)
+
+    def test_update_matches_pandas(self):
+        """Test that O(1) updates after a warm-up stay in line with the pandas indicators."""
+        state = IndicatorState(self.window_size)
+        state.warm_up(self.closes[:500])
+
+        for i in range(500, len(self.closes)):
+            sma, ema, change = state.update(self.closes[i])
+            self.assertAlmostEqual(sma, self.expected_sma[i], places=8)
+            self.assertAlmostEqual(ema, self.expected_ema[i], places=8)
+            self.assertAlmostEqual(change, self.expected_change[i], places=12)
+
+    def test_revised_last_close_matches_pandas(self):
+        """Test that revising the last close, after a warm-up or an update, gives the indicators of the final series."""
+        state = IndicatorState(self.window_size)
+        state.warm_up(np.append(self.closes[:500], self.closes[500] * 1.05))  # Provisional close, later revised
+        for i in range(500, 510):
+            state.revise(self.closes[i] * 0.97)
+            sma, ema, change = state.revise(self.closes[i])
+            self.assertAlmostEqual(sma, self.expected_sma[i], places=8)
+            self.assertAlmostEqual(ema, self.expected_ema[i], places=8)
+            self.assertAlmostEqual(change, self.expected_change[i], places=12)
+            state.update(self.closes[i + 1] * 1.02)  # Next bar opens with a provisional close
+
+    def test_update_from_empty_state(self):
+        """Test that indicators are NaN until enough bars have been seen."""
+        state = IndicatorState(3)
+        sma, ema, change = state.update(10)
+        self.assertTrue(np.isnan(sma))
+        self.assertEqual(ema, 10)
+        self.assertTrue(np.isnan(change))
+        self.assertFalse(state.ready)
+
+        state.update(11)
+        sma, ema, change = state.update(12)
+        self.assertAlmostEqual(sma, 11)
+        self.assertAlmostEqual(change, 12 / 11 - 1)
+        self.assertTrue(state.ready)
+
+    def test_invalid_window_size(self):
+        """Test that a non-positive window size is rejected."""
+        with self.assertRaises(ValueError):
+            IndicatorState(0)
+
+if __name__ == "__main__":
+    unittest.main()
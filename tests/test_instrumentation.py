@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# Import the instrumentation layer
+from src.instrumentation import LatencyRecorder, LatencyHistogram, parse_sleeptime, timed, timed_iteration
+
+class FakeStrategy:
+    """Minimal strategy exposing the hooks the instrumentation wraps."""
+
+    sleeptime = "10S"
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        metrics.instrument(self)
+
+    def get_last_price(self, symbol):
+        return 100.0
+
+    @timed("calculate_indicators")
+    def calculate_indicators(self, delay=0.0):
+        time.sleep(delay)
+        return "done"
+
+    @timed_iteration
+    def on_trading_iteration(self, delay=0.0):
+        self.get_last_price("GOOG")
+        return self.calculate_indicators(delay)
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_summary(self):
+        """Test that counts, mean and quantiles are reported in milliseconds."""
+        histogram = LatencyHistogram()
+        for elapsed_ns in [1_000_000] * 99 + [100_000_000]:
+            histogram.record(elapsed_ns)
+        summary = histogram.summary()
+        self.assertEqual(summary["count"], 100)
+        self.assertAlmostEqual(summary["mean_ms"], 1.99)
+        self.assertLess(summary["p50_ms"], 2.2)  # Bucket upper bound of 1ms
+        self.assertEqual(summary["max_ms"], 100.0)
+
+class TestLatencyRecorder(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a temporary metrics directory."""
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary metrics directory."""
+        shutil.rmtree(self.root)
+
+    def test_stages_and_broker_calls_are_recorded(self):
+        """Test that lifecycle stages, broker calls and iterations each get a histogram."""
+        metrics = LatencyRecorder("Fake")
+        strategy = FakeStrategy(metrics)
+        for _ in range(3):
+            self.assertEqual(strategy.on_trading_iteration(), "done")
+
+        stages = metrics.snapshot()["stages"]
+        self.assertEqual(stages["on_trading_iteration"]["count"], 3)
+        self.assertEqual(stages["calculate_indicators"]["count"], 3)
+        self.assertEqual(stages["broker.get_last_price"]["count"], 3)
+        self.assertEqual(metrics.iterations, 3)
+
+    def test_broker_patches_still_apply(self):
+        """Test that patching a broker method after instrumentation is still honoured."""
+        strategy = FakeStrategy(LatencyRecorder("Fake"))
+        with patch.object(FakeStrategy, "get_last_price", return_value=42) as mock_get_last_price:
+            self.assertEqual(strategy.get_last_price("GOOG"), 42)
+            mock_get_last_price.assert_called_once_with("GOOG")
+
+    def test_overrun_is_flagged(self):
+        """Test that an iteration longer than its sleeptime budget is counted as an overrun."""
+        metrics = LatencyRecorder("Fake")
+        strategy = FakeStrategy(metrics)
+        strategy.sleeptime = 0.0005 / 60  # Half a millisecond, in minutes
+        strategy.on_trading_iteration(delay=0.01)
+        self.assertEqual(metrics.overruns, 1)
+        self.assertGreater(metrics.worst_overrun_s, 0)
+
+    def test_disabled_records_nothing(self):
+        """Test that a disabled recorder leaves methods unwrapped and records nothing."""
+        metrics = LatencyRecorder("Fake", enabled=False)
+        strategy = FakeStrategy(metrics)
+        strategy.on_trading_iteration()
+        self.assertEqual(metrics.histograms, {})
+        self.assertNotIn("get_last_price", vars(strategy))
+
+    def test_export(self):
+        """Test that the metrics file is machine-readable JSON."""
+        path = os.path.join(self.root, "Fake_metrics.json")
+        metrics = LatencyRecorder("Fake", path=path)
+        FakeStrategy(metrics).on_trading_iteration()
+        metrics.export()
+        with open(path) as f:
+            data = json.load(f)
+        self.assertEqual(data["strategy"], "Fake")
+        self.assertIn("on_trading_iteration", data["stages"])
+        self.assertEqual(os.listdir(self.root), ["Fake_metrics.json"])  # No temporary file left behind
+
+    def test_default_paths_are_per_instance(self):
+        """Test that two recorders of the same strategy never write the same file."""
+        first, second = LatencyRecorder("Fake"), LatencyRecorder("Fake")
+        self.assertNotEqual(first.path, second.path)
+        self.assertIn(str(os.getpid()), first.path)
+
+    def test_parse_sleeptime(self):
+        """Test that lumibot sleeptimes are converted to seconds."""
+        self.assertEqual(parse_sleeptime("10S"), 10)
+        self.assertEqual(parse_sleeptime("1D"), 86400)
+        self.assertEqual(parse_sleeptime("5M"), 300)
+        self.assertEqual(parse_sleeptime(2), 120)
+
+if __name__ == "__main__":
+    unittest.main()
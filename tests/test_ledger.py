@@ -0,0 +1,144 @@
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+
+# Import the ledger
+from src.ledger import Ledger, Reconciler
+
+def position(symbol, quantity, avg_fill_price):
+    """Build a fake broker position."""
+    return MagicMock(asset=MagicMock(symbol=symbol), quantity=quantity, avg_fill_price=avg_fill_price)
+
+class TestLedger(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a ledger with a 1% stop loss and a 2% take profit."""
+        self.ledger = Ledger(["GOOG", "AAPL"], stop_loss_percent=1, take_profit_percent=2, capacity=2)
+
+    def test_order_lifecycle(self):
+        """Test that submitted orders count as positions until their fills settle them."""
+        self.ledger.submitted("GOOG", "buy", 10, 100)
+        self.assertEqual(self.ledger.position("GOOG"), 10)
+        self.assertEqual(self.ledger.entry_price("GOOG"), 100)
+
+        self.ledger.fill("GOOG", "buy", 10, 100.5)
+        self.assertEqual(self.ledger.position("GOOG"), 10)  # Not counted twice
+        self.assertEqual(self.ledger.entry_price("GOOG"), 100)  # Levels stay on the signal price
+        self.ledger.mark("GOOG", 101.5)
+        self.assertAlmostEqual(self.ledger.unrealized("GOOG"), 10.0)
+
+        self.ledger.close("GOOG")
+        self.assertEqual(self.ledger.position("GOOG"), 0)
+        self.ledger.fill("GOOG", "sell", 10, 102)
+        self.assertEqual(self.ledger.position("GOOG"), 0)
+        self.assertIsNone(self.ledger.entry_price("GOOG"))
+        self.assertAlmostEqual(self.ledger.realized[self.ledger.row("GOOG")], 15.0)
+
+    def test_exit_levels(self):
+        """Test the scalar and vectorized stop loss / take profit checks."""
+        self.ledger.submitted("GOOG", "buy", 10, 100)
+        self.ledger.submitted("AAPL", "buy", 5, 50)
+        self.assertTrue(self.ledger.exit_hit("GOOG", 99))
+        self.assertFalse(self.ledger.exit_hit("GOOG", 100.5))
+        self.assertTrue(self.ledger.exit_hit("GOOG", 102))
+        self.assertFalse(self.ledger.exit_hit("MSFT", 1))  # Unknown symbol
+        self.assertEqual(list(self.ledger.exits([100.5, 51.5])), [False, True])
+
+    def test_set_entry(self):
+        """Test that an entry price set directly moves the exit levels and None clears them."""
+        self.ledger.fill("GOOG", "buy", 10, 95)
+        self.ledger.set_entry("GOOG", 100)
+        self.assertEqual(self.ledger.entry_price("GOOG"), 100)
+        self.assertFalse(self.ledger.exit_hit("GOOG", 101))
+        self.assertTrue(self.ledger.exit_hit("GOOG", 102))
+        self.ledger.set_entry("GOOG", None)
+        self.assertIsNone(self.ledger.entry_price("GOOG"))
+        self.assertFalse(self.ledger.exit_hit("GOOG", 102))
+
+    def test_grows_past_capacity(self):
+        """Test that new symbols get rows beyond the initial capacity without losing existing rows."""
+        self.ledger.submitted("GOOG", "buy", 10, 100)
+        for i in range(10):
+            self.ledger.submitted(f"S{i}", "buy", i + 1, 10)
+        self.assertEqual(len(self.ledger), 12)
+        self.assertEqual(self.ledger.position("GOOG"), 10)
+        self.assertEqual(self.ledger.position("S9"), 10)
+        self.assertEqual(self.ledger.entry_price("S9"), 10)
+
+    def test_reconcile_adopts_and_corrects(self):
+        """Test that reconciliation adopts broker positions and fixes drifted quantities."""
+        self.ledger.submitted("AAPL", "buy", 5, 50)
+        self.ledger.fill("AAPL", "buy", 5, 50)
+        drifted = self.ledger.reconcile([position("GOOG", 10, 100), position("MSFT", 3, 20)], open_orders=[])
+        self.assertEqual(drifted, 3)  # GOOG and MSFT appeared, AAPL disappeared
+        self.assertEqual(self.ledger.position("GOOG"), 10)
+        self.assertEqual(self.ledger.entry_price("MSFT"), 20)
+        self.assertEqual(self.ledger.position("AAPL"), 0)
+        self.assertIsNone(self.ledger.entry_price("AAPL"))
+
+    def test_reconcile_skips_rows_changed_during_the_snapshot(self):
+        """Test that a fill booked while the broker snapshot was in flight is not overwritten."""
+        reconciler = Reconciler(self.ledger, lambda: ([], None))
+        versions = self.ledger.versions()
+        self.ledger.submitted("GOOG", "buy", 10, 100)  # Booked after the snapshot was requested
+        self.ledger.reconcile([], None, versions)
+        self.assertEqual(self.ledger.position("GOOG"), 10)
+
+        self.assertEqual(reconciler.reconcile(), 0)  # A fresh snapshot with the order still pending
+        self.assertEqual(self.ledger.position("GOOG"), 10)
+        self.assertEqual(reconciler.runs, 1)
+
+    def test_fill_after_snapshot_is_not_counted_twice(self):
+        """Test that a fill whose callback arrives after a snapshot that already showed it is not booked again."""
+        self.ledger.submitted("GOOG", "buy", 10, 100)
+        self.ledger.reconcile([position("GOOG", 10, 100.5)], open_orders=[])  # The broker filled the buy first
+        self.ledger.fill("GOOG", "buy", 10, 100.5)
+        self.assertEqual(self.ledger.position("GOOG"), 10)
+        self.assertEqual(self.ledger.entry_price("GOOG"), 100)
+
+        self.ledger.close("GOOG")
+        self.ledger.reconcile([], open_orders=[])  # And the sell
+        self.ledger.fill("GOOG", "sell", 10, 102)
+        self.assertEqual(self.ledger.position("GOOG"), 0)
+        self.assertAlmostEqual(self.ledger.realized[self.ledger.row("GOOG")], 15.0)
+
+        self.ledger.submitted("GOOG", "buy", 10, 103)  # Flat again, so new entries are allowed
+        self.assertEqual(self.ledger.position("GOOG"), 10)
+
+    def test_sells_never_go_short(self):
+        """Test that a sell larger than the position held leaves the ledger flat, not short."""
+        self.ledger.fill("GOOG", "buy", 5, 100)
+        self.ledger.fill("GOOG", "sell", 10, 101)
+        self.assertEqual(self.ledger.position("GOOG"), 0)
+        self.assertAlmostEqual(self.ledger.realized[self.ledger.row("GOOG")], 5.0)
+
+    def test_background_reconciler(self):
+        """Test that the reconciler thread keeps polling the broker until stopped."""
+        fetch = MagicMock(return_value=([position("GOOG", 10, 100)], None))
+        reconciler = Reconciler(self.ledger, fetch, interval=0.01).start()
+        try:
+            for _ in range(200):
+                if reconciler.runs >= 2:
+                    break
+                reconciler.stopped.wait(0.01)
+        finally:
+            reconciler.stop()
+        self.assertGreaterEqual(reconciler.runs, 2)
+        self.assertEqual(self.ledger.position("GOOG"), 10)
+        self.assertFalse(reconciler.thread.is_alive())
+
+    def test_queries_stay_fast(self):
+        """Test that position, entry and exit queries over hundreds of symbols need no broker and stay sub-millisecond."""
+        import time
+        ledger = Ledger([f"S{i}" for i in range(500)], stop_loss_percent=1, take_profit_percent=2)
+        for i in range(500):
+            ledger.submitted(f"S{i}", "buy", 1, 100)
+        prices = np.full(500, 100.0)
+        begin = time.perf_counter()
+        for _ in range(100):
+            ledger.exits(prices)
+            ledger.position("S250")
+        self.assertLess((time.perf_counter() - begin) / 100, 1e-3)
+
+if __name__ == "__main__":
+    unittest.main()
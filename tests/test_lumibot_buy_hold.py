@@ -6,6 +6,7 @@ from lumibot.traders import Trader
 
 # Import the BuyHold strategy class
 from src.lumibot_buy_hold import BuyHold  # Replace `your_module` with the actual module name
+from strategy_fixtures import bare_strategy, patch_properties
 
 class TestBuyHoldStrategy(unittest.TestCase):
 
@@ -83,5 +84,82 @@ class TestBuyHoldStrategy(unittest.TestCase):
         # Verify that the error was logged
         mock_logger.error.assert_called_with("An error occurred during trading iteration: Test error")
 
+class TestBuyHoldConcurrentDeploy(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a large-universe strategy without the lumibot broker wiring."""
+        patch_properties(self, BuyHold, first_iteration=True, cash=100000, is_backtesting=False)
+        self.symbols = [f"SYM{i}" for i in range(50)]
+        self.strategy = bare_strategy(BuyHold, symbols=self.symbols, rate_limit=None)
+
+    @patch('src.lumibot_buy_hold.BuyHold.get_portfolio_value')
+    @patch('src.lumibot_buy_hold.BuyHold.get_last_prices')
+    @patch('src.lumibot_buy_hold.BuyHold.create_order')
+    @patch('src.lumibot_buy_hold.BuyHold.submit_order')
+    def test_deploys_whole_universe(self, mock_submit_order, mock_create_order, mock_get_last_prices, mock_get_portfolio_value):
+        """Test that every symbol gets an order sized from its equal allocation, from one batch price call."""
+        mock_get_last_prices.return_value = {symbol: 100.0 for symbol in self.symbols}
+
+        self.strategy.on_trading_iteration()
+
+        mock_get_last_prices.assert_called_once_with(self.symbols)
+        self.assertEqual(mock_submit_order.call_count, 50)
+        mock_create_order.assert_any_call("SYM7", 20, "buy")  # 100000 / 50 / 100
+        self.assertFalse(self.strategy.first_iteration)
+
+    @patch('src.lumibot_buy_hold.BuyHold.get_last_prices')
+    @patch('src.lumibot_buy_hold.BuyHold.get_last_price')
+    @patch('src.lumibot_buy_hold.BuyHold.create_order')
+    @patch('src.lumibot_buy_hold.BuyHold.submit_order')
+    def test_per_symbol_failures_are_isolated(self, mock_submit_order, mock_create_order, mock_get_last_price, mock_get_last_prices):
+        """Test that a failed price fetch or order skips only the affected symbol, even when the batch call fails."""
+        def get_last_price(symbol):
+            if symbol == "SYM3":
+                raise Exception("Price unavailable")
+            return None if symbol == "SYM4" else 100.0
+
+        mock_get_last_prices.side_effect = Exception("Batch unavailable")  # Falls back to one call per symbol
+
+        def create_order(symbol, quantity, side):
+            if symbol == "SYM5":
+                raise Exception("Order rejected")
+            return MagicMock()
+
+        mock_get_last_price.side_effect = get_last_price
+        mock_create_order.side_effect = create_order
+
+        self.strategy.deploy()
+
+        self.assertEqual(mock_create_order.call_count, 48)
+        self.assertEqual(mock_submit_order.call_count, 47)
+
+    @patch('src.lumibot_buy_hold.BuyHold.get_portfolio_value')
+    @patch('src.lumibot_buy_hold.BuyHold.get_positions')
+    @patch('src.lumibot_buy_hold.BuyHold.get_last_prices')
+    @patch('src.lumibot_buy_hold.BuyHold.create_order')
+    @patch('src.lumibot_buy_hold.BuyHold.submit_order')
+    def test_scheduled_rebalance(self, mock_submit_order, mock_create_order, mock_get_last_prices, mock_get_positions, mock_get_portfolio_value):
+        """Test that rebalancing runs on schedule and trades only the drifted holdings."""
+        self.strategy.symbols = ["GOOG", "AAPL"]
+        self.strategy.portfolio_allocation = {"GOOG": 0.5, "AAPL": 0.5}
+        self.strategy.first_iteration = False
+        self.strategy.rebalance_enabled = True
+        self.strategy.rebalance_every = 2
+        mock_get_positions.return_value = [
+            MagicMock(asset=MagicMock(symbol="GOOG"), quantity=600),
+            MagicMock(asset=MagicMock(symbol="AAPL"), quantity=400),
+        ]
+        mock_get_last_prices.return_value = {"GOOG": 100.0, "AAPL": 100.0}
+        with patch.object(BuyHold, "cash", 0):
+            self.strategy.on_trading_iteration()
+            mock_get_positions.assert_not_called()
+
+            self.strategy.on_trading_iteration()
+
+        mock_get_positions.assert_called_once()
+        mock_create_order.assert_any_call("GOOG", 100, "sell")
+        mock_create_order.assert_any_call("AAPL", 100, "buy")
+        self.assertEqual(mock_submit_order.call_count, 2)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
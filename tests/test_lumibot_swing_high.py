@@ -1,11 +1,22 @@
+import asyncio
 import unittest
+from datetime import date
 from unittest.mock import MagicMock, patch
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
 from lumibot.brokers import Alpaca
 from lumibot.strategies import Strategy
 from lumibot.traders import Trader
 
 # Import the SwingHigh strategy class
-from src.lumibot_swing_high import SwingHigh  # Replace `your_module` with the actual module name
+from src import lumibot_swing_high as swing_high_module
+from src.lumibot_swing_high import SwingHigh, start_up  # Replace `your_module` with the actual module name
+from src.bar_store import BarStore
+from src.model_store import ModelStore
+from src.streaming import FakeStream, StreamEvent, StreamRunner
+from strategy_fixtures import bare_strategy, patch_properties
 
 class TestSwingHighStrategy(unittest.TestCase):
 
@@ -109,5 +120,285 @@ class TestSwingHighStrategy(unittest.TestCase):
         # Verify that the error was logged
         mock_logger.error.assert_called_with("An error occurred during trading iteration: Test error")
 
+class TestSwingHighWatchlist(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a multi-symbol strategy without the lumibot broker wiring."""
+        patch_properties(self, SwingHigh, is_backtesting=True)
+        self.strategy = bare_strategy(SwingHigh, symbols=["GOOG", "AAPL", "MSFT"])
+
+    def position(self, symbol, quantity, avg_fill_price):
+        """Build a fake broker position."""
+        return MagicMock(asset=MagicMock(symbol=symbol), quantity=quantity, avg_fill_price=avg_fill_price)
+
+    @patch('src.lumibot_swing_high.SwingHigh.get_last_prices')
+    @patch('src.lumibot_swing_high.SwingHigh.get_positions')
+    @patch('src.lumibot_swing_high.SwingHigh.create_order')
+    @patch('src.lumibot_swing_high.SwingHigh.submit_orders')
+    def test_batched_snapshot_and_orders(self, mock_submit_orders, mock_create_order, mock_get_positions, mock_get_last_prices):
+        """Test that each iteration makes one price call and one order submission, with positions from the ledger."""
+        mock_get_last_prices.side_effect = [
+            {"GOOG": 100, "AAPL": 50, "MSFT": 30},
+            {"GOOG": 101, "AAPL": 49, "MSFT": 31},
+            {"GOOG": 102, "AAPL": 48, "MSFT": 32},
+            {"GOOG": 103, "AAPL": 47, "MSFT": 31},
+        ]
+        mock_get_positions.return_value = []
+
+        for _ in range(4):
+            self.strategy.on_trading_iteration()
+
+        self.assertEqual(mock_get_last_prices.call_count, 4)
+        self.assertEqual(mock_get_positions.call_count, 1)  # Only the initial ledger sync asks the broker
+        mock_submit_orders.assert_called_once()
+        mock_create_order.assert_called_once_with("GOOG", quantity=self.strategy.quantity, side="buy")
+        self.assertEqual(self.strategy.ledger.entry_price("GOOG"), 103)
+
+    @patch('src.lumibot_swing_high.SwingHigh.get_last_prices')
+    @patch('src.lumibot_swing_high.SwingHigh.get_positions')
+    @patch('src.lumibot_swing_high.SwingHigh.create_order')
+    @patch('src.lumibot_swing_high.SwingHigh.submit_orders')
+    def test_stop_loss_and_take_profit(self, mock_submit_orders, mock_create_order, mock_get_positions, mock_get_last_prices):
+        """Test that positions adopted from the broker are sold only when they hit their levels, in one submission."""
+        mock_get_last_prices.return_value = {"GOOG": 99, "AAPL": 102, "MSFT": 100.2}
+        mock_get_positions.return_value = [
+            self.position("GOOG", 10, 100),  # Below the stop loss
+            self.position("AAPL", 5, 100),  # Above the take profit
+            self.position("MSFT", 10, 100),  # Still inside the band
+        ]
+
+        self.strategy.on_trading_iteration()
+
+        mock_create_order.assert_any_call("GOOG", quantity=10, side="sell")
+        mock_create_order.assert_any_call("AAPL", quantity=5, side="sell")
+        self.assertEqual(mock_create_order.call_count, 2)
+        mock_submit_orders.assert_called_once()
+        self.assertEqual(self.strategy.ledger.entry_price("MSFT"), 100)
+        self.assertIsNone(self.strategy.ledger.entry_price("GOOG"))
+
+    @patch('src.lumibot_swing_high.LatencyRecorder.export')
+    @patch('src.lumibot_swing_high.SwingHigh.get_positions')
+    def test_backtest_close_writes_no_metrics(self, mock_get_positions, mock_export):
+        """Test that the daily close only writes the latency metrics file when trading live."""
+        mock_get_positions.return_value = []
+        self.strategy.before_market_closes()
+        mock_export.assert_not_called()
+
+class TestSwingHighModelCache(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a strategy with a temporary model store and indicator history."""
+        patch_properties(self, SwingHigh, is_backtesting=True)
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+        self.strategy = bare_strategy(SwingHigh)
+        self.strategy.model_store = ModelStore(self.root)
+
+        rng = np.random.default_rng(0)
+        index = pd.date_range("2022-01-03", periods=120, freq="D", tz="America/New_York")
+        self.history = pd.DataFrame({"close": 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 120)))}, index=index)
+
+    def test_restart_loads_cached_model(self):
+        """Test that a live restart on the same data loads the model instead of refitting it."""
+        df = self.strategy.calculate_indicators(self.history.copy())
+        with patch.object(SwingHigh, "is_backtesting", False):
+            first = self.strategy.train_model(df)
+
+            with patch('src.lumibot_swing_high.OnlineClassifier') as mock_classifier:
+                second = self.strategy.train_model(df.copy())
+                mock_classifier.assert_not_called()
+        np.testing.assert_allclose(first.classifier.coef_, second.classifier.coef_)
+
+    def test_backtest_ignores_and_leaves_store(self):
+        """Test that a backtest neither warm-starts from stored models nor writes to the store."""
+        df = self.strategy.calculate_indicators(self.history.copy())
+        with patch.object(self.strategy.model_store, "latest") as mock_latest, \
+                patch.object(self.strategy.model_store, "save") as mock_save:
+            self.strategy.train_model(df)
+        mock_latest.assert_not_called()
+        mock_save.assert_not_called()
+
+    def test_window_size_is_part_of_the_key(self):
+        """Test that models built from different feature windows are cached under different keys."""
+        df = self.strategy.calculate_indicators(self.history.copy())
+        store = self.strategy.model_store
+        self.assertNotEqual(store.key(SwingHigh.features, df, {"window_size": 20}), store.key(SwingHigh.features, df, {"window_size": 50}))
+
+    def test_new_bars_update_model_and_prediction(self):
+        """Test that new bars are learned incrementally and feed a per-tick prediction."""
+        df = self.strategy.calculate_indicators(self.history[:100].copy())
+        self.strategy.start_model(df)
+        coef = self.strategy.model.classifier.coef_.copy()
+
+        self.strategy.update_indicators(self.history)
+        self.assertFalse(np.allclose(coef, self.strategy.model.classifier.coef_))
+        self.assertEqual(self.strategy.model.trained_until, self.history.index[-2])  # The last bar's direction is not known yet
+
+        prediction = self.strategy.poll_model()
+        self.assertTrue(0 <= prediction <= 1)
+
+    def test_training_labels_are_next_bar_directions(self):
+        """Test that each training row is labelled with the next bar's direction, leaving out the possibly forming last bar."""
+        df = self.strategy.calculate_indicators(self.history.copy())
+        classifier = swing_high_module.OnlineClassifier
+        with patch.object(classifier, "fit", autospec=True, side_effect=classifier.fit) as mock_fit:
+            model = self.strategy.train_model(df)
+        X, y = mock_fit.call_args.args[1:3]
+        closes = self.history["close"]
+        expected = (closes.shift(-1) > closes).astype(int)
+        self.assertEqual(list(y), list(expected[X.index]))
+        self.assertLess(X.index[-1], df.index[-2])  # The held-out tail follows the training rows
+        self.assertEqual(model.trained_until, df.index[-2])
+
+    def test_new_bar_labels_the_previous_features(self):
+        """Test that a new bar teaches the model the direction of the now final bar from the features of the bar before it."""
+        self.strategy.calculate_indicators(self.history[:100].copy())
+        features = list(self.strategy.indicators.values())  # Features of bar 99
+        self.strategy.update_indicators(self.history[:101])  # Bar 100 arrives; bar 99 is still the last known direction
+        self.strategy.model = MagicMock(trained_until=self.history.index[98])
+
+        self.strategy.update_indicators(self.history[:102])  # Bar 101 arrives, so bar 100's close is final
+        closes = self.history["close"]
+        self.strategy.model.partial_fit.assert_called_once()
+        args, kwargs = self.strategy.model.partial_fit.call_args
+        np.testing.assert_allclose(args[0], [features])
+        self.assertEqual(args[1], [int(closes.iloc[100] > closes.iloc[99])])
+        self.assertEqual(kwargs["trained_until"], self.history.index[100])
+
+    def test_revised_bar_updates_indicators(self):
+        """Test that a bar seen again with a new close (today's forming bar) is revised, not skipped."""
+        provisional = self.history[:100].copy()
+        provisional.iloc[-1, 0] *= 0.95  # The last bar was still forming when first fetched
+        self.strategy.calculate_indicators(provisional)
+
+        self.strategy.update_indicators(self.history[98:100])  # Same timestamp, final close
+        closes = self.history["close"][:100]
+        sma, ema, price_change = self.strategy.indicators.values()
+        self.assertAlmostEqual(sma, closes.rolling(10).mean().iloc[-1], places=8)
+        self.assertAlmostEqual(ema, closes.ewm(span=10, adjust=False).mean().iloc[-1], places=8)
+        self.assertAlmostEqual(price_change, closes.pct_change().iloc[-1], places=12)
+
+        self.strategy.update_indicators(self.history[:101])  # Then one new bar
+        closes = self.history["close"][:101]
+        self.assertAlmostEqual(self.strategy.indicators.ema, closes.ewm(span=10, adjust=False).mean().iloc[-1], places=8)
+        self.assertEqual(self.strategy.last_bar_time, self.history.index[100])
+
+class TestSwingHighStartup(unittest.TestCase):
+
+    def setUp(self):
+        """Set up temporary bar and model stores and a fake bar source that records its calls."""
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.calls = []
+
+    def fetch(self, symbol, start, end):
+        """Fake bar source returning one bar per business day."""
+        self.calls.append((symbol, start, end))
+        index = pd.bdate_range(start, end, tz="America/New_York")
+        close = np.linspace(100, 110, len(index))
+        return pd.DataFrame({"open": close, "high": close, "low": close, "close": close, "volume": 1000.0}, index=index)
+
+    def test_startup_fills_the_cache_the_strategy_reads(self):
+        """Test that the launch step downloads history with the same source the strategy then reads its cache through."""
+        bar_store = BarStore(self.root + "/bars")
+        startup = start_up(self.fetch, bar_store=bar_store, model_store=ModelStore(self.root + "/models"))
+        history = startup.result("history")
+        self.assertGreater(len(history), 0)
+        self.assertIsNone(startup.result("model"))  # Nothing stored yet
+        calls = len(self.calls)
+
+        patch_properties(self, SwingHigh, is_backtesting=False)
+        strategy = bare_strategy(SwingHigh)
+        strategy.startup, strategy.bar_store, strategy.bar_fetcher = startup, bar_store, self.fetch
+        df = strategy.fetch_historical_data("GOOG", days=30)
+        self.assertEqual(len(df), 30)
+        today = date.today()
+        self.assertEqual(self.calls[calls:], [("GOOG", today, today)])  # Only today's forming bar is fetched again
+
+class TestSwingHighStreaming(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a streaming strategy with a temporary model store and daily history."""
+        patch_properties(self, SwingHigh, is_backtesting=True)
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+        self.strategy = bare_strategy(SwingHigh, stream=True, instrument=False)
+        self.strategy.model_store = ModelStore(self.root)
+
+        rng = np.random.default_rng(0)
+        index = pd.date_range("2022-01-03", periods=60, freq="D", tz="America/New_York")
+        self.history = pd.DataFrame({"close": 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 60)))}, index=index)
+
+    @patch('src.lumibot_swing_high.SwingHigh.get_last_price')
+    @patch('src.lumibot_swing_high.SwingHigh.sell_all')
+    @patch('src.lumibot_swing_high.SwingHigh.submit_order')
+    @patch('src.lumibot_swing_high.SwingHigh.create_order')
+    @patch('src.lumibot_swing_high.SwingHigh.get_positions')
+    @patch('src.lumibot_swing_high.SwingHigh.fetch_historical_data')
+    def test_events_drive_decisions_without_polling(self, mock_fetch, mock_get_positions, mock_create_order,
+                                                    mock_submit_order, mock_sell_all, mock_get_last_price):
+        """Test that history is fetched once and each pushed trade updates state and places orders."""
+        mock_fetch.return_value = self.history.copy()
+        mock_get_positions.return_value = []
+
+        day = pd.Timestamp("2022-03-04 09:30", tz="America/New_York")
+        events = [("GOOG", price, day + pd.Timedelta(seconds=i)) for i, price in enumerate([100, 100, 101, 102])]
+        events.append(("AAPL", 50, day + pd.Timedelta(seconds=5)))  # Not subscribed
+        events.append(("GOOG", 104, day + pd.Timedelta(days=3)))  # Next session, past the take profit
+        runner = StreamRunner(self.strategy, FakeStream(events))
+        asyncio.run(runner.run())
+
+        mock_fetch.assert_called_once()
+        mock_get_last_price.assert_not_called()
+        mock_get_positions.assert_called_once()  # Positions come from the ledger after the initial sync
+        self.assertEqual(runner.events, 5)
+        mock_submit_order.assert_called_once()  # Swing high on the fourth trade
+        mock_create_order.assert_called_once_with("GOOG", quantity=10, side="buy")
+        mock_sell_all.assert_called_once()  # Take profit on the next session's first trade
+        self.assertIsNone(self.strategy.entry_price)
+        # The previous session's last trade was folded in as its daily close
+        self.assertEqual(self.strategy.last_bar_time, day.normalize())
+
+    @patch('src.lumibot_swing_high.SwingHigh.sell_all')
+    def test_entry_price_can_be_set(self, mock_sell_all):
+        """Test that assigning entry_price moves the position's exit levels in the ledger."""
+        self.strategy.ledger.fill("GOOG", "buy", 10, 95)  # Levels from the fill price
+        self.strategy.entry_price = 100
+        self.assertEqual(self.strategy.ledger.entry_price("GOOG"), 100)
+        self.strategy.evaluate_price(101)  # Past the fill's take profit, inside the new levels
+        mock_sell_all.assert_not_called()
+        self.strategy.evaluate_price(102)  # At the new take profit
+        mock_sell_all.assert_called_once()
+        self.assertIsNone(self.strategy.entry_price)
+
+    @patch('src.lumibot_swing_high.SwingHigh.sell_all')
+    @patch('src.lumibot_swing_high.SwingHigh.submit_order')
+    @patch('src.lumibot_swing_high.SwingHigh.create_order')
+    @patch('src.lumibot_swing_high.SwingHigh.get_positions')
+    @patch('src.lumibot_swing_high.SwingHigh.fetch_historical_data')
+    def test_trades_after_the_close_out_wait_for_the_next_session(self, mock_fetch, mock_get_positions,
+                                                                  mock_create_order, mock_submit_order, mock_sell_all):
+        """Test that a swing high printed after before_market_closes is ignored until the next session."""
+        mock_fetch.return_value = self.history.copy()
+        mock_get_positions.return_value = []
+        self.strategy.start_stream()
+
+        day = pd.Timestamp("2022-03-04 15:45", tz="America/New_York")
+        self.strategy.before_market_closes()
+        # A swing high after the close-out, the last print arriving after midnight UTC
+        for i, price in enumerate([100, 100, 101, 102]):
+            self.strategy.on_stream_event(StreamEvent("GOOG", price, day + pd.Timedelta(hours=2 * i)))
+        mock_submit_order.assert_not_called()
+        self.assertEqual(self.strategy.stream_close, 102)  # Still tracked as the session's close
+
+        # The next session trades again
+        next_day = day + pd.Timedelta(days=3)
+        for i, price in enumerate([100, 100, 101, 102]):
+            self.strategy.on_stream_event(StreamEvent("GOOG", price, next_day + pd.Timedelta(seconds=i)))
+        mock_submit_order.assert_called_once()
+        mock_create_order.assert_called_once_with("GOOG", quantity=10, side="buy")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
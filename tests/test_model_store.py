@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+# Import the model store
+from src.model_store import ModelStore, OnlineClassifier
+
+FEATURES = ['SMA', 'EMA', 'Price_Change']
+
+def make_features(rows, seed=0):
+    """Build a synthetic feature frame with a learnable target."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2022-01-03", periods=rows, freq="D", tz="America/New_York")
+    df = pd.DataFrame(rng.normal(size=(rows, 3)) * [5, 5, 0.01] + [100, 100, 0], columns=FEATURES, index=index)
+    df['Target'] = (df['Price_Change'] > 0).astype(int)
+    return df
+
+class TestOnlineClassifier(unittest.TestCase):
+
+    def test_fast_prediction_matches_sklearn(self):
+        """Test that the NumPy single-row prediction equals sklearn's predict_proba."""
+        df = make_features(200)
+        model = OnlineClassifier().fit(df[FEATURES], df['Target'])
+        row = df[FEATURES].iloc[-1].to_numpy()
+        expected = model.classifier.predict_proba(model.scaler.transform([row]))[0, 1]
+        self.assertAlmostEqual(model.predict_proba_one(row), expected, places=10)
+
+    def test_batch_prediction_matches_single_rows(self):
+        """Test that the batch prediction agrees with the single-row prediction."""
+        df = make_features(200)
+        model = OnlineClassifier().fit(df[FEATURES], df['Target'])
+        rows = df[FEATURES].iloc[-5:].to_numpy()
+        np.testing.assert_allclose(model.predict_proba(rows), [model.predict_proba_one(row) for row in rows])
+
+    def test_partial_fit_updates_model(self):
+        """Test that incremental updates change the coefficients and the watermark."""
+        df = make_features(200)
+        model = OnlineClassifier().fit(df[FEATURES][:150], df['Target'][:150], trained_until=df.index[149])
+        coef = model.classifier.coef_.copy()
+        model.partial_fit(df[FEATURES][150:], df['Target'][150:], trained_until=df.index[-1])
+        self.assertFalse(np.allclose(coef, model.classifier.coef_))
+        self.assertEqual(model.trained_until, df.index[-1])
+
+class TestModelStore(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a temporary model store."""
+        self.root = tempfile.mkdtemp()
+        self.store = ModelStore(self.root)
+
+    def tearDown(self):
+        """Remove the temporary model store."""
+        shutil.rmtree(self.root)
+
+    def test_key_depends_on_data(self):
+        """Test that different training rows produce different keys."""
+        self.assertEqual(self.store.key(FEATURES, make_features(50)), self.store.key(FEATURES, make_features(50)))
+        self.assertNotEqual(self.store.key(FEATURES, make_features(50)), self.store.key(FEATURES, make_features(51)))
+
+    def test_save_and_load(self):
+        """Test that a saved model is loaded back under its key only."""
+        df = make_features(100)
+        model = OnlineClassifier().fit(df[FEATURES], df['Target'], trained_until=df.index[-1])
+        key = self.store.key(FEATURES, df)
+        self.store.save("GOOG", key, model)
+
+        loaded = self.store.load("GOOG", key)
+        np.testing.assert_allclose(loaded.classifier.coef_, model.classifier.coef_)
+        self.assertIsNone(self.store.load("GOOG", "missing"))
+        self.assertIsNone(self.store.load("AAPL", key))
+
+    def test_latest_checkpoint(self):
+        """Test that the latest checkpoint for a feature set is found."""
+        df = make_features(100)
+        model = OnlineClassifier().fit(df[FEATURES], df['Target'], trained_until=df.index[-1])
+        self.assertIsNone(self.store.latest("GOOG", FEATURES))
+
+        self.store.checkpoint("GOOG", FEATURES, model)
+        self.assertEqual(self.store.latest("GOOG", FEATURES).trained_until, df.index[-1])
+        self.assertIsNone(self.store.latest("GOOG", ['SMA']))
+        self.assertIsNone(self.store.latest("GOOG", FEATURES, {"window_size": 20}))
+
+    def test_old_checkpoints_are_pruned(self):
+        """Test that only the newest checkpoints are kept, and no temporary files are left behind."""
+        df = make_features(100)
+        model = OnlineClassifier().fit(df[FEATURES], df['Target'])
+        for timestamp in df.index[-6:]:
+            model.trained_until = timestamp
+            self.store.checkpoint("GOOG", FEATURES, model, keep=3)
+        files = sorted(os.listdir(os.path.join(self.root, "GOOG")))
+        self.assertEqual(len(files), 3)
+        self.assertEqual(self.store.latest("GOOG", FEATURES).trained_until, df.index[-1])
+
+if __name__ == "__main__":
+    unittest.main()
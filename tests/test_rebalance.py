@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+
+# Import the rebalancing computation
+from src.rebalance import compute_rebalance
+
+class TestComputeRebalance(unittest.TestCase):
+
+    def test_no_orders_within_threshold(self):
+        """Test that holdings close to their targets are left alone."""
+        deltas = compute_rebalance([10, 10, 10], [100, 102, 98], [1 / 3] * 3, cash=0, drift_threshold=0.05)
+        self.assertEqual(list(deltas), [0, 0, 0])
+
+    def test_drifted_names_are_traded(self):
+        """Test that only drifted holdings are brought back to target, sell and buy netted per name."""
+        # GOOG doubled: weights are 0.5 / 0.25 / 0.25 against targets of 1/3
+        deltas = compute_rebalance([10, 10, 10], [200, 100, 100], [1 / 3] * 3, cash=0, drift_threshold=0.05)
+        self.assertLess(deltas[0], 0)
+        self.assertGreater(deltas[1], 0)
+        self.assertGreater(deltas[2], 0)
+        self.assertEqual(deltas[0], 6 - 10)  # floor(4000 / 3 / 200) shares kept
+
+    def test_buys_are_funded(self):
+        """Test that buys never spend more than the cash plus the sell proceeds."""
+        quantities = np.array([50, 0, 0])
+        prices = np.array([100.0, 30.0, 70.0])
+        deltas = compute_rebalance(quantities, prices, [1 / 3] * 3, cash=10, drift_threshold=0.01)
+        spent = (deltas * prices).sum()
+        self.assertLessEqual(spent, 10)
+
+    def test_missing_prices_are_skipped(self):
+        """Test that names without a price are never traded."""
+        deltas = compute_rebalance([10, 0], [np.nan, 100], [0.5, 0.5], cash=1000)
+        self.assertEqual(deltas[0], 0)
+        self.assertEqual(deltas[1], 5)
+
+    def test_many_holdings(self):
+        """Test that hundreds of holdings are handled in one call."""
+        rng = np.random.default_rng(3)
+        prices = rng.uniform(10, 500, 500)
+        quantities = np.floor(1000 / prices) * rng.uniform(0.5, 1.5, 500).round()
+        deltas = compute_rebalance(quantities, prices, np.full(500, 1 / 500), cash=5000, drift_threshold=0.001)
+        self.assertEqual(len(deltas), 500)
+        self.assertEqual(deltas.dtype.kind, "i")
+
+if __name__ == "__main__":
+    unittest.main()
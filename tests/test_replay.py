@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+# Import the replay broker, the harness and the strategy it drives
+from src.replay import ReplayBroker, ReplayHarness
+from src.vector_backtest import simulate
+from src.lumibot_swing_high import SwingHigh
+from src.model_store import ModelStore
+
+TIMEZONE = "America/New_York"
+REPLAY_DAY = pd.Timestamp("2022-03-01 09:30", tz=TIMEZONE)
+
+def make_bars(seed=0):
+    """Forty days of daily history followed by one session of minute bars."""
+    rng = np.random.default_rng(seed)
+    daily_index = pd.date_range("2022-01-03", periods=40, freq="B", tz=TIMEZONE)
+    minute_index = pd.date_range(REPLAY_DAY, periods=390, freq="min")
+    index = daily_index.append(minute_index)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, len(index))))
+    return pd.DataFrame({"open": close, "high": close, "low": close, "close": close, "volume": 1000}, index=index)
+
+class TestReplayBroker(unittest.TestCase):
+
+    def test_fill_with_slippage_latency_and_commission(self):
+        """Test that a market order fills after its latency at the slipped close, less commission."""
+        index = pd.date_range("2022-03-01 09:30", periods=4, freq="min", tz=TIMEZONE)
+        bars = {"GOOG": pd.DataFrame({"close": [100.0, 101.0, 102.0, 103.0]}, index=index)}
+        broker = ReplayBroker(bars, cash=10000, slippage_bps=10, fill_latency=60, commission_per_share=0.01)
+
+        broker.advance(index[0])
+        order = broker.submit_order(broker.create_order("GOOG", 10, "buy"))
+        self.assertEqual(order.status, "submitted")
+        broker.advance(index[1])
+        self.assertEqual(order.status, "filled")
+        self.assertAlmostEqual(order.fill_price, 101.0 * 1.001)
+        self.assertAlmostEqual(broker.cash, 10000 - 10 * 101.0 * 1.001 - 0.1)
+        self.assertEqual(broker.get_position("GOOG").quantity, 10)
+
+        broker.advance(index[2])
+        broker.sell_all()
+        self.assertIsNotNone(broker.get_position("GOOG"))  # Still in flight
+        broker.advance(index[3])
+        self.assertIsNone(broker.get_position("GOOG"))
+        self.assertAlmostEqual(broker.fills[-1]["price"], 103.0 * 0.999)
+
+    def test_daily_history_from_minute_bars(self):
+        """Test that daily history rolls intraday bars up, ending at the current bar."""
+        broker = ReplayBroker({"GOOG": make_bars()})
+        broker.advance(REPLAY_DAY + pd.Timedelta(minutes=5))
+        df = broker.get_historical_prices("GOOG", 30, timestep="day").df
+        self.assertEqual(len(df), 30)
+        self.assertEqual(df.index[-1], REPLAY_DAY.normalize())
+        self.assertEqual(df["close"].iloc[-1], broker.get_last_price("GOOG"))
+
+class TestReplayHarness(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a temporary model store."""
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary model store."""
+        shutil.rmtree(self.root)
+
+    def replay(self, bars):
+        """Replay one session of SwingHigh against the recorded bars."""
+        broker = ReplayBroker(bars)
+        harness = ReplayHarness(SwingHigh, broker, parameters={"sleeptime": "1M", "instrument": False}, start=REPLAY_DAY)
+        return harness.run(on_initialize=lambda strategy: setattr(strategy, "model_store", ModelStore(self.root)))
+
+    def test_replay_is_deterministic_and_fast(self):
+        """Test that two replays of the same bars produce identical fills, much faster than real time."""
+        bars = {"GOOG": make_bars()}
+        first = self.replay(bars)
+        second = self.replay(bars)
+        self.assertEqual(first.iterations, 390)
+        self.assertGreater(len(first.fills), 0)
+        pd.testing.assert_frame_equal(first.fills, second.fills)
+        self.assertGreater(first.speedup, 100)
+
+    def test_flat_at_close_and_matches_vector_signals(self):
+        """Test that the replayed entries match the vectorized simulation and the session ends flat."""
+        bars = make_bars()
+        result = self.replay({"GOOG": bars})
+        self.assertEqual(result.strategy.replay_broker.get_positions(), [])
+
+        closes = bars["close"][bars.index >= REPLAY_DAY]
+        session_ends = np.zeros(len(closes), dtype=bool)
+        session_ends[-1] = True
+        expected = simulate(closes.to_numpy(), session_ends=session_ends).trades
+        buys = result.fills[(result.fills["side"] == "buy") & (result.fills["time"] < closes.index[-1])]
+        self.assertEqual(list(buys["time"]), list(closes.index[expected["entry_index"]]))
+
+if __name__ == "__main__":
+    unittest.main()
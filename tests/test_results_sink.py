@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+# Import the results sink and the replay harness used to drive a strategy into it
+from src.results_sink import ResultsSink, RunMetrics, load_runs, read_series, write_report
+from src.replay import ReplayBroker, ReplayHarness
+from src.lumibot_buy_hold import BuyHold
+
+TIMEZONE = "America/New_York"
+
+class TestRunMetrics(unittest.TestCase):
+
+    def test_matches_batch_computation(self):
+        """Test that the incremental metrics equal the same metrics computed over the whole series."""
+        rng = np.random.default_rng(0)
+        values = 100000 * np.exp(np.cumsum(rng.normal(0, 0.01, 500)))
+        cash = values * 0.25
+        metrics = RunMetrics(periods_per_year=252)
+        for value, available in zip(values, cash):
+            metrics.update(value, available)
+        metrics.record_trade(100, 50.0)
+        metrics.record_trade(-100, 55.0)
+
+        returns = pd.Series(values).pct_change().dropna()
+        summary = metrics.summary()
+        self.assertAlmostEqual(summary["total_return"], values[-1] / values[0] - 1)
+        self.assertAlmostEqual(summary["sharpe"], returns.mean() / returns.std() * np.sqrt(252))
+        self.assertAlmostEqual(summary["max_drawdown"], (values / np.maximum.accumulate(values) - 1).min())
+        self.assertAlmostEqual(summary["exposure"], 0.75)
+        self.assertAlmostEqual(summary["turnover"], 10500 / values.mean())
+        self.assertEqual(summary["trades"], 2)
+
+class TestResultsSink(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a temporary results directory."""
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary results directory."""
+        shutil.rmtree(self.root)
+
+    def test_series_round_trip_in_batches(self):
+        """Test that rows written across several record batches read back in order."""
+        sink = ResultsSink("run", self.root, batch_size=7)
+        index = pd.date_range("2022-01-03", periods=20, freq="D", tz=TIMEZONE)
+        for i, timestamp in enumerate(index):
+            sink.record(timestamp, 100 + i, 50)
+        sink.record_trade(index[0], "GOOG", "buy", 10, 100)
+        sink.close()
+
+        series = read_series("run", self.root)
+        self.assertEqual(list(series["portfolio_value"]), [100 + i for i in range(20)])
+        self.assertTrue(np.isnan(series["return"].iloc[0]))
+        self.assertEqual(series["timestamp"].iloc[-1], index[-1])
+        self.assertEqual(read_series("run", self.root, trades=True)["symbol"].tolist(), ["GOOG"])
+
+    def test_one_query_across_runs(self):
+        """Test that every run's summary and parameters come back as one table."""
+        for i in range(3):
+            sink = ResultsSink(f"run{i}", self.root, parameters={"window_size": i, "symbols": ["GOOG"], "sink": object()})
+            sink.record(pd.Timestamp("2022-01-03", tz=TIMEZONE), 100, 100)
+            sink.record(pd.Timestamp("2022-01-04", tz=TIMEZONE), 100 + i, 100)
+            sink.close()
+
+        runs = load_runs(self.root)
+        self.assertEqual(list(runs["run_id"]), ["run0", "run1", "run2"])
+        self.assertEqual(list(runs["parameters.window_size"]), [0, 1, 2])
+        self.assertNotIn("parameters.sink", runs.columns)
+        self.assertAlmostEqual(runs["total_return"].iloc[2], 0.02)
+
+    def test_report_on_demand(self):
+        """Test that the light HTML report is built from the stored results."""
+        sink = ResultsSink("run", self.root)
+        sink.record(pd.Timestamp("2022-01-03", tz=TIMEZONE), 100, 100)
+        sink.close()
+        path = write_report("run", self.root, tearsheet=False)
+        with open(path) as f:
+            self.assertIn("total_return", f.read())
+
+    def test_replayed_strategy_records_results(self):
+        """Test that a strategy records every iteration and fill when record_results is set."""
+        index = pd.date_range("2022-01-03", periods=10, freq="B", tz=TIMEZONE)
+        bars = {symbol: pd.DataFrame({"close": np.linspace(100, 110, 10) * (i + 1)}, index=index)
+                for i, symbol in enumerate(["GOOG", "AAPL"])}
+        broker = ReplayBroker(bars)
+        parameters = {"symbols": ["GOOG", "AAPL"], "instrument": False, "record_results": True,
+                      "results_root": self.root, "run_id": "buy_hold"}
+        ReplayHarness(BuyHold, broker, parameters=parameters).run()
+
+        runs = load_runs(self.root)
+        self.assertEqual(runs["periods"].iloc[0], 10)
+        self.assertEqual(runs["trades"].iloc[0], len(broker.fills))
+        self.assertAlmostEqual(read_series("buy_hold", self.root)["portfolio_value"].iloc[-1], broker.get_portfolio_value())
+        self.assertTrue(os.path.exists(os.path.join(self.root, "buy_hold_trades.arrow")))
+
+if __name__ == "__main__":
+    unittest.main()
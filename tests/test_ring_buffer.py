@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+
+# Import the ring buffer
+from src.ring_buffer import RingBuffer
+
+class TestRingBuffer(unittest.TestCase):
+
+    def test_keeps_last_values(self):
+        """Test that only the last `capacity` values are retained, oldest first."""
+        buffer = RingBuffer(4)
+        for value in range(10):
+            buffer.append(value)
+
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(buffer.count, 10)
+        self.assertEqual(list(buffer), [6, 7, 8, 9])
+        self.assertEqual(buffer[-1], 9)
+        self.assertEqual(list(buffer[-3:]), [7, 8, 9])
+
+    def test_partial_fill(self):
+        """Test that a partially filled buffer exposes only the appended values."""
+        buffer = RingBuffer(5)
+        buffer.append(1.5)
+        buffer.append(2.5)
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(list(buffer.last(2)), [1.5, 2.5])
+        with self.assertRaises(ValueError):
+            buffer.last(3)
+
+    def test_last_is_a_view(self):
+        """Test that the last-N window shares memory with the buffer instead of copying."""
+        buffer = RingBuffer(3)
+        for value in range(7):
+            buffer.append(value)
+        window = buffer.last(3)
+        self.assertTrue(np.shares_memory(window, buffer._buffer))
+        self.assertFalse(window.flags.writeable)
+
+    def test_memory_is_bounded(self):
+        """Test that the backing array never grows."""
+        buffer = RingBuffer(4)
+        size = buffer._buffer.nbytes
+        for value in range(10000):
+            buffer.append(value)
+        self.assertEqual(buffer._buffer.nbytes, size)
+
+    def test_none_is_stored_as_nan(self):
+        """Test that a missing price is stored as NaN."""
+        buffer = RingBuffer(2)
+        buffer.append(None)
+        self.assertTrue(np.isnan(buffer[-1]))
+
+    def test_clear(self):
+        """Test that clearing empties the buffer."""
+        buffer = RingBuffer(2)
+        buffer.append(1)
+        buffer.clear()
+        self.assertEqual(len(buffer), 0)
+
+if __name__ == "__main__":
+    unittest.main()
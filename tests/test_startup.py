@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+# Import the startup helpers
+from src.startup import Startup, reports_startup
+from src.instrumentation import LatencyRecorder
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+class FakeStrategy:
+    """Minimal strategy reporting its first iteration."""
+
+    def __init__(self, startup):
+        self.startup = startup
+        self.metrics = LatencyRecorder("Fake")
+
+    @reports_startup
+    def on_trading_iteration(self):
+        return "done"
+
+class TestStartup(unittest.TestCase):
+
+    def test_steps_overlap(self):
+        """Test that independent steps run concurrently and their results are handed over."""
+        startup = Startup()
+        begin = time.perf_counter()
+        startup.submit("broker", lambda: time.sleep(0.2) or "broker")
+        startup.submit("history", lambda: time.sleep(0.2) or "history")
+        self.assertEqual(startup.result("broker"), "broker")
+        self.assertEqual(startup.result("history"), "history")
+        self.assertLess(time.perf_counter() - begin, 0.35)
+        self.assertGreaterEqual(startup.durations["history"], 0.2)
+
+    def test_failed_or_missing_step_returns_default(self):
+        """Test that a failing or unknown step falls back to the default."""
+        startup = Startup()
+        startup.submit("model", lambda: 1 / 0)
+        self.assertIsNone(startup.result("model"))
+        self.assertEqual(startup.result("missing", default="fallback"), "fallback")
+
+    def test_time_to_first_iteration_reported_once(self):
+        """Test that time-to-first-iteration is recorded after the first iteration only."""
+        startup = Startup()
+        startup.submit("history", lambda: None).result()
+        strategy = FakeStrategy(startup)
+        self.assertEqual(strategy.on_trading_iteration(), "done")
+        strategy.on_trading_iteration()
+
+        stages = strategy.metrics.snapshot()["stages"]
+        self.assertEqual(stages["startup.time_to_first_iteration"]["count"], 1)
+        self.assertIn("startup.history", stages)
+        self.assertGreater(startup.time_to_first_iteration, 0)
+
+    def test_entry_points_do_not_import_heavy_modules(self):
+        """Test that importing the strategies loads neither scikit-learn nor the backtesting machinery."""
+        code = ("import sys; import lumibot_swing_high, lumibot_buy_hold; "
+                "print(any(name.startswith('sklearn') for name in sys.modules), 'lumibot.backtesting' in sys.modules)")
+        output = subprocess.run([sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.split()[-2:], ["False", "False"])
+
+if __name__ == "__main__":
+    unittest.main()
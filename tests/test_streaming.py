@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+import pandas as pd
+
+# Import the streaming layer
+from src.streaming import AlpacaStream, FakeStream, StreamEvent, StreamRunner
+from src.instrumentation import LatencyRecorder
+
+class FakeStrategy:
+    """Minimal strategy exposing the streaming hooks."""
+
+    def __init__(self):
+        self.metrics = LatencyRecorder("Fake")
+        self.started = 0
+        self.prices = []
+
+    def stream_symbols(self):
+        return ["GOOG"]
+
+    def start_stream(self):
+        self.started += 1
+
+    def on_stream_event(self, event):
+        if event.price < 0:
+            raise ValueError("bad print")
+        self.prices.append(event.price)
+
+class TestFakeStream(unittest.TestCase):
+
+    def test_from_bars_filters_symbols(self):
+        """Test that bar closes become events and unsubscribed symbols are skipped."""
+        index = pd.date_range("2022-03-01 09:30", periods=3, freq="min", tz="America/New_York")
+        stream = FakeStream.from_bars("GOOG", pd.DataFrame({"close": [1.0, 2.0, 3.0]}, index=index))
+
+        async def collect(symbols):
+            return [event async for event in stream.subscribe(symbols)]
+
+        events = asyncio.run(collect(["GOOG"]))
+        self.assertEqual([event.price for event in events], [1.0, 2.0, 3.0])
+        self.assertEqual(events[-1].timestamp, index[-1])
+        self.assertEqual(asyncio.run(collect(["AAPL"])), [])
+
+class MockDataStream:
+    """Stand-in for alpaca's StockDataStream exposing only its public API."""
+
+    instances = []
+
+    def __init__(self, api_key, secret_key, feed=None, trades=(), forever=False):
+        self.trades = trades
+        self.forever = forever
+        self.handler = None
+        self.symbols = ()
+        self.stopped = threading.Event()
+        MockDataStream.instances.append(self)
+
+    def subscribe_trades(self, handler, *symbols):
+        self.handler = handler
+        self.symbols = symbols
+
+    def run(self):
+        async def push():
+            for symbol, price in self.trades:
+                await self.handler(MagicMock(symbol=symbol, price=price, timestamp=pd.Timestamp("2022-03-01 09:30")))
+        asyncio.run(push())
+        if self.forever:
+            self.stopped.wait(5)  # Stay connected until stop() is called
+
+    def stop(self):
+        self.stopped.set()
+
+class TestAlpacaStream(unittest.TestCase):
+
+    def setUp(self):
+        """Set up the config and clear the mock stream instances."""
+        self.config = {"API_KEY": "key", "API_SECRET": "secret"}
+        MockDataStream.instances = []
+
+    def collect(self, limit=None):
+        """Subscribe to GOOG and collect the events, stopping early after `limit` events."""
+        async def collect():
+            events = []
+            stream = AlpacaStream(self.config).subscribe(["GOOG"])
+            async for event in stream:
+                events.append(event)
+                if limit is not None and len(events) == limit:
+                    break
+            await stream.aclose()
+            return events
+        return asyncio.run(collect())
+
+    def test_trades_become_events_until_the_connection_ends(self):
+        """Test that trades pushed from the stream's own loop reach the consumer, which ends with the connection."""
+        stream = lambda *args, **kwargs: MockDataStream(*args, trades=[("GOOG", 1.0), ("GOOG", 2.0)], **kwargs)
+        with patch("alpaca.data.live.StockDataStream", side_effect=stream):
+            events = self.collect()
+        self.assertEqual([event.price for event in events], [1.0, 2.0])
+        self.assertEqual(MockDataStream.instances[0].symbols, ("GOOG",))
+
+    def test_consumer_stopping_stops_the_stream(self):
+        """Test that a consumer leaving early stops the websocket connection."""
+        stream = lambda *args, **kwargs: MockDataStream(*args, trades=[("GOOG", 1.0), ("GOOG", 2.0)], forever=True, **kwargs)
+        with patch("alpaca.data.live.StockDataStream", side_effect=stream):
+            events = self.collect(limit=1)
+        self.assertEqual(len(events), 1)
+        self.assertTrue(MockDataStream.instances[0].stopped.is_set())
+
+class TestStreamRunner(unittest.TestCase):
+
+    def test_run_handles_every_event_and_records_latency(self):
+        """Test that history is loaded once, errors are isolated and handling latency is recorded."""
+        strategy = FakeStrategy()
+        now = pd.Timestamp("2022-03-01 09:30", tz="America/New_York")
+        runner = StreamRunner(strategy, FakeStream([("GOOG", 1, now), ("GOOG", -1, now), ("GOOG", 2, now)]))
+        asyncio.run(runner.run())
+
+        self.assertEqual(strategy.started, 1)
+        self.assertEqual(strategy.prices, [1, 2])
+        self.assertEqual(runner.events, 3)
+        self.assertEqual(strategy.metrics.snapshot()["stages"]["stream_event"]["count"], 3)
+
+    def test_start_and_stop_in_background(self):
+        """Test that the runner consumes events on its own thread and stops on request."""
+        strategy = FakeStrategy()
+        now = pd.Timestamp("2022-03-01 09:30", tz="America/New_York")
+        runner = StreamRunner(strategy, FakeStream([StreamEvent("GOOG", i, now) for i in range(1000)], delay=0.01)).start()
+        deadline = time.time() + 5
+        while not strategy.prices and time.time() < deadline:
+            time.sleep(0.01)
+        runner.stop()
+        self.assertFalse(runner.thread.is_alive())
+        self.assertGreater(len(strategy.prices), 0)
+        self.assertLess(len(strategy.prices), 1000)
+
+if __name__ == "__main__":
+    unittest.main()
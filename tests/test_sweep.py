@@ -0,0 +1,68 @@
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from datetime import date
+import numpy as np
+import pandas as pd
+
+# Import the sweep runner
+from src.sweep import backtest_swing_high, expand_grid, rank_results, run_sweep
+
+def fake_fetch(symbol, start, end):
+    """Fake data source returning a rising close series on business days."""
+    index = pd.bdate_range(start, end, tz="America/New_York") + pd.Timedelta(hours=16)
+    close = np.linspace(100, 120, len(index))
+    return pd.DataFrame({"open": close, "high": close, "low": close, "close": close, "volume": 1.0}, index=index)
+
+def fake_evaluate(symbol, df, params, start, end):
+    """Fake evaluation whose score depends on the parameters and the data."""
+    return {"sharpe": params["take_profit_percent"] - params["stop_loss_percent"], "bars": len(df)}
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a temporary bar store."""
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary bar store."""
+        shutil.rmtree(self.root)
+
+    def test_expand_grid(self):
+        """Test that every combination of the grid is produced."""
+        combos = expand_grid({"a": [1, 2], "b": [3, 4, 5]})
+        self.assertEqual(len(combos), 6)
+        self.assertIn({"a": 2, "b": 5}, combos)
+
+    def test_rank_results(self):
+        """Test that results are ranked by the chosen metric, best first."""
+        ranked = rank_results([{"sharpe": 0.5}, {"sharpe": 2.0}, {"sharpe": None}])
+        self.assertEqual(list(ranked["rank"]), [1, 2, 3])
+        self.assertEqual(ranked["sharpe"].iloc[0], 2.0)
+
+    def test_run_sweep(self):
+        """Test that the sweep evaluates every combination on every symbol in worker processes."""
+        grid = {"stop_loss_percent": [0.5, 1.0], "take_profit_percent": [1.5, 3.0]}
+        results = run_sweep(grid, ["GOOG", "AAPL"], date(2022, 1, 1), date(2022, 1, 31),
+                            evaluate=fake_evaluate, processes=2, store_root=self.root, fetch=fake_fetch)
+
+        self.assertEqual(len(results), 8)
+        self.assertTrue(results["error"].isna().all())
+        self.assertTrue((results["bars"] == 21).all())  # Workers read the data from the store
+        self.assertEqual(results["sharpe"].iloc[0], 2.5)
+
+    @patch('src.sweep.SwingHigh.backtest')
+    def test_backtests_are_not_instrumented(self, mock_backtest):
+        """Test that sweep backtests run without latency instrumentation, so they leave no metrics files."""
+        mock_backtest.return_value = {"sharpe": 1.0}
+        df = fake_fetch("GOOG", date(2022, 1, 1), date(2022, 1, 31))
+        summary = backtest_swing_high("GOOG", df, {"stop_loss_percent": 1.0}, date(2022, 1, 1), date(2022, 1, 31))
+
+        self.assertEqual(summary["sharpe"], 1.0)
+        parameters = mock_backtest.call_args.kwargs["parameters"]
+        self.assertFalse(parameters["instrument"])
+        self.assertEqual(parameters["stop_loss_percent"], 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
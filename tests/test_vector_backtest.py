@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import numpy as np
+
+# Import the vectorized simulator and the event-driven strategy
+from src.vector_backtest import simulate, swing_high_signals, screen
+from src.lumibot_swing_high import SwingHigh
+from strategy_fixtures import bare_strategy
+
+def run_event_driven(prices, stop_loss_percent, take_profit_percent):
+    """Drive SwingHigh.on_trading_iteration bar by bar against a fake broker that fills instantly."""
+    strategy = bare_strategy(SwingHigh, stop_loss_percent=stop_loss_percent, take_profit_percent=take_profit_percent)
+
+    state = {"bar": 0, "held": False}
+    trades = []
+
+    def submit_order(order):
+        state["held"] = True
+        trades.append([state["bar"], -1])
+
+    def sell_all():
+        state["held"] = False
+        trades[-1][1] = state["bar"]
+
+    with patch.object(SwingHigh, "fetch_historical_data", return_value=MagicMock()), \
+            patch.object(SwingHigh, "calculate_indicators"), \
+            patch.object(SwingHigh, "update_indicators"), \
+            patch.object(SwingHigh, "train_model"), \
+            patch.object(SwingHigh, "is_backtesting", True), \
+            patch.object(SwingHigh, "create_order"), \
+            patch.object(SwingHigh, "submit_order", side_effect=submit_order), \
+            patch.object(SwingHigh, "sell_all", side_effect=sell_all), \
+            patch.object(SwingHigh, "get_position", side_effect=lambda symbol: state["held"]), \
+            patch.object(SwingHigh, "get_positions", return_value=[]), \
+            patch.object(SwingHigh, "get_last_price", side_effect=list(prices)):
+        for bar in range(len(prices)):
+            state["bar"] = bar
+            strategy.on_trading_iteration()
+    return trades
+
+class TestVectorBacktest(unittest.TestCase):
+
+    def test_signals(self):
+        """Test that signals fire only on three strictly rising prices after the warm-up."""
+        signals = swing_high_signals([1, 2, 3, 4, 3, 4, 5, 5])
+        self.assertEqual(list(np.flatnonzero(signals)), [3, 6])
+
+    def test_stop_loss_and_take_profit(self):
+        """Test that a position is closed at the stop loss and at the take profit."""
+        result = simulate([100, 100, 101, 102, 101, 99, 98, 99, 100, 102, 104], stop_loss_percent=2, take_profit_percent=1)
+        trades = result.trades
+        self.assertEqual(list(trades["entry_index"]), [3, 8, 10])
+        self.assertEqual(list(trades["exit_index"]), [5, 9, -1])  # Stop loss, take profit, still open
+        self.assertEqual(result.position[-1], 10)
+
+    def test_equity_curve(self):
+        """Test that the equity curve marks the open position to market."""
+        result = simulate([10, 10, 11, 12, 13, 14], stop_loss_percent=50, take_profit_percent=50, quantity=1, cash=100)
+        self.assertEqual(list(result.trades["exit_index"]), [-1])
+        np.testing.assert_allclose(result.equity, [100, 100, 100, 100, 101, 102])
+
+    def test_session_ends_force_exit(self):
+        """Test that positions are closed at the end of a session."""
+        session_ends = np.array([False, False, False, False, True, False])
+        result = simulate([10, 10, 11, 12, 12.01, 12.02], stop_loss_percent=50, take_profit_percent=50, session_ends=session_ends)
+        self.assertEqual(list(result.trades["exit_index"]), [4, -1])
+
+    def test_matches_event_driven_strategy(self):
+        """Test that the vectorized simulator trades on the same bars as the event-driven SwingHigh."""
+        rng = np.random.default_rng(7)
+        prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, 1500)))
+        for stop_loss_percent, take_profit_percent in [(0.5, 1.5), (0.25, 0.5), (1.0, 3.0)]:
+            expected = run_event_driven(prices, stop_loss_percent, take_profit_percent)
+            result = simulate(prices, stop_loss_percent=stop_loss_percent, take_profit_percent=take_profit_percent)
+            actual = result.trades[["entry_index", "exit_index"]].values.tolist()
+            self.assertGreater(len(actual), 5)
+            self.assertEqual(actual, expected)
+
+    def test_screen(self):
+        """Test that screening returns one summary row per symbol."""
+        rng = np.random.default_rng(1)
+        price_map = {symbol: 100 + np.cumsum(rng.normal(0, 1, 500)) for symbol in ["GOOG", "AAPL", "MSFT"]}
+        table = screen(price_map)
+        self.assertEqual(list(table["symbol"]), ["GOOG", "AAPL", "MSFT"])
+        self.assertIn("sharpe", table)
+
+if __name__ == "__main__":
+    unittest.main()
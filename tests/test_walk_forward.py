@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+# Import the walk-forward engine
+from src.walk_forward import build_features, walk_forward, walk_forward_folds
+
+def make_frames(symbols, rows=400):
+    """Synthetic daily closes whose next-bar direction follows the current bar's with some noise."""
+    frames = {}
+    for seed, symbol in enumerate(symbols):
+        rng = np.random.default_rng(seed)
+        returns = np.empty(rows)
+        returns[0] = 0.0
+        for i in range(1, rows):
+            returns[i] = 0.8 * returns[i - 1] + rng.normal(0, 0.01)  # Momentum the model can learn
+        index = pd.date_range("2020-01-01", periods=rows, freq="B", tz="America/New_York")
+        frames[symbol] = pd.DataFrame({"close": 100 * np.exp(np.cumsum(returns))}, index=index)
+    return frames
+
+class TestWalkForwardFolds(unittest.TestCase):
+
+    def test_expanding_and_rolling(self):
+        """Test that test windows tile the rows after the initial training window without overlap."""
+        folds = walk_forward_folds(100, initial_train=50, test_size=20)
+        self.assertEqual([(f[0].start, f[0].stop, f[1].start, f[1].stop) for f in folds],
+                         [(0, 50, 50, 70), (0, 70, 70, 90), (0, 90, 90, 100)])
+        rolling = walk_forward_folds(100, initial_train=50, test_size=20, train_size=30, gap=2)
+        self.assertEqual([(f[0].start, f[0].stop, f[1].start) for f in rolling], [(20, 50, 52), (40, 70, 72), (60, 90, 92)])
+
+class TestWalkForward(unittest.TestCase):
+
+    def test_labels_come_from_the_future_only(self):
+        """Test that each target is the next bar's direction, not the current bar's."""
+        df = make_frames(["GOOG"], rows=50)["GOOG"]
+        features = build_features(df, window_size=5)
+        closes = df["close"]
+        for timestamp in features.index[:10]:
+            position = closes.index.get_loc(timestamp)
+            self.assertEqual(features.loc[timestamp, "Target"], int(closes.iloc[position + 1] > closes.iloc[position]))
+        self.assertLess(features.index[-1], df.index[-1])  # The last bar has no label yet
+
+    def test_parallel_matches_inline(self):
+        """Test that parallel folds give the same out-of-sample series as running them inline."""
+        frames = make_frames(["GOOG", "AAPL"])
+        inline = walk_forward(frames, initial_train=200, test_size=50, processes=1)
+        parallel = walk_forward(frames, initial_train=200, test_size=50, processes=2)
+        pd.testing.assert_frame_equal(inline.signals, parallel.signals)
+        self.assertEqual(len(inline.folds), 2 * 4)
+        self.assertTrue(inline.folds["error"].isna().all())
+
+        # Every out-of-sample row comes after its fold's training window
+        self.assertTrue((inline.folds["test_start"] > inline.folds["train_end"]).all())
+        summary = inline.summary()
+        self.assertEqual(list(summary["folds"]), [4, 4])
+        self.assertGreater(summary.loc["GOOG", "accuracy"], 0.55)  # The momentum is learnable out of sample
+
+if __name__ == "__main__":
+    unittest.main()